@@ -15,9 +15,23 @@ from src.repo_map.file_processing import (
 from src.repo_map.llm_interaction import (
     parse_llm_response,
     get_llm_descriptions,
-    enhance_repo_with_llm
+    enhance_repo_with_llm,
+    summarize_directories
+)
+from src.repo_map.cache_management import (
+    load_cache,
+    load_global_cache,
+    touch_cache_entries,
+    gc_cache,
+    compact_cache,
+    prune_global_cache,
+    CacheBackend,
+    SqliteCacheBackend,
+    MemoryCacheBackend,
+    HttpCacheBackend,
+    TieredCacheBackend,
+    WriteBehindCacheBackend
 )
-from src.repo_map.cache_management import load_cache
 from src.repo_map.output_generation import (
     print_tree,
     save_tree_map,
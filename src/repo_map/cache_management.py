@@ -1,13 +1,38 @@
 import sqlite3
 import os
 import json
-from typing import List, Dict, Any
+import time
+import copy
+import logging
+import queue
+import threading
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import requests
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Cache namespaces. FILES is keyed by absolute path and therefore specific
+# to one checkout; the others are keyed by file contents and can be shared.
+FILES = 'files'
+ANALYSES = 'analyses'
+DESCRIPTIONS = 'descriptions'
+SHARED_NAMESPACES = (ANALYSES, DESCRIPTIONS)
+
+# How long gc_cache() keeps imported analyses and descriptions that no
+# cached file refers to yet, so a seeded cache survives until the files
+# they describe are scanned.
+IMPORT_GRACE_SECONDS = 30 * 24 * 3600
 
 def load_cache(repo_root: str, db_name: str = '.repo-map-cache.db') -> sqlite3.Connection:
     cache_file_path = os.path.join(repo_root, db_name)
-    conn = sqlite3.connect(cache_file_path)
+    conn = sqlite3.connect(cache_file_path, check_same_thread=False)
     cursor = conn.cursor()
-    
+
+    # Only takes effect for a freshly created database; older caches are
+    # converted the first time compact_cache() runs.
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS cache (
             path TEXT PRIMARY KEY,
@@ -15,20 +40,741 @@ def load_cache(repo_root: str, db_name: str = '.repo-map-cache.db') -> sqlite3.C
             description TEXT,
             developer_consideration TEXT,
             imports TEXT,
-            functions TEXT
+            functions TEXT,
+            classes TEXT,
+            constants TEXT,
+            last_seen REAL,
+            fingerprint TEXT,
+            symbol_hashes TEXT
         )
     """)
-    
+
     cursor.execute("PRAGMA table_info(cache)")
     existing_columns = [info[1] for info in cursor.fetchall()]
-    
+
     new_columns = {
-        'developer_consideration',
+        'developer_consideration': 'TEXT',
+        'classes': 'TEXT',
+        'constants': 'TEXT',
+        'last_seen': 'REAL',
+        'fingerprint': 'TEXT',
+        'symbol_hashes': 'TEXT',
     }
-    
-    for column in new_columns:
+
+    for column, column_type in new_columns.items():
         if column not in existing_columns:
-            cursor.execute(f"ALTER TABLE cache ADD COLUMN {column} TEXT")
-    
+            cursor.execute(f"ALTER TABLE cache ADD COLUMN {column} {column_type}")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_seen ON cache (last_seen)")
+    _create_content_tables(cursor)
+
     conn.commit()
     return conn
+
+def _create_content_tables(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the content-addressed tables shared by the per-repo and global caches.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analyses (
+            hash TEXT PRIMARY KEY,
+            classes TEXT,
+            functions TEXT,
+            constants TEXT,
+            imports TEXT,
+            docstring TEXT,
+            last_used REAL
+        )
+    """)
+    # LLM descriptions are keyed by what produced them, so results for several
+    # models and prompt versions can coexist for the same file contents.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS descriptions (
+            fingerprint TEXT NOT NULL,
+            model TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            description TEXT,
+            developer_consideration TEXT,
+            created_at REAL,
+            PRIMARY KEY (fingerprint, model, prompt_version)
+        )
+    """)
+    # imported_at is set by import_snapshot() and cleared once a cached file
+    # refers to the entry (see gc_cache())
+    for table, columns in (('analyses', ('imported_at',)), ('descriptions', ('last_used', 'imported_at'))):
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing_columns = [info[1] for info in cursor.fetchall()]
+        for column in columns:
+            if column not in existing_columns:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} REAL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_analyses_last_used ON analyses (last_used)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_descriptions_last_used ON descriptions (last_used)")
+
+def description_key(fingerprint: str, model: str, prompt_version: str) -> str:
+    """
+    Build the DESCRIPTIONS key. The model goes last because model names may
+    themselves contain ':' (e.g. 'vendor/model:free').
+    """
+    return f"{fingerprint}:{prompt_version}:{model}"
+
+def split_description_key(key: str) -> Tuple[str, str, str]:
+    fingerprint, prompt_version, model = key.split(':', 2)
+    return fingerprint, model, prompt_version
+
+def file_cache_record(file_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the FILES record stored for a scanned file.
+    """
+    return {
+        'hash': file_info.get('hash', ''),
+        'description': file_info.get('description', ''),
+        'developer_consideration': file_info.get('developer_consideration', ''),
+        'imports': file_info.get('imports', []),
+        'functions': file_info.get('functions', []),
+        'classes': file_info.get('classes', {}),
+        'constants': file_info.get('constants', []),
+        'last_seen': time.time(),
+        'fingerprint': file_info.get('fingerprint', ''),
+        'symbol_hashes': file_info.get('symbol_hashes', [])
+    }
+
+def apply_file_record(file_info: Dict[str, Any], record: Dict[str, Any]) -> None:
+    file_info.update({
+        'description': record.get('description') or '',
+        'developer_consideration': record.get('developer_consideration') or '',
+        'imports': record.get('imports') or [],
+        'functions': record.get('functions') or [],
+        'classes': record.get('classes') or {},
+        'constants': record.get('constants') or [],
+        'hash': record.get('hash', '')
+    })
+
+class CacheBackend:
+    """
+    Key-value interface over the repo-map cache.
+
+    Values are JSON-serializable dicts grouped into namespaces (FILES,
+    ANALYSES, DESCRIPTIONS). Implementations must be safe to call from
+    multiple threads.
+    """
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def put_many(self, namespace: str, items: Dict[str, Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def delete(self, namespace: str, keys: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def iter_items(self, namespace: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield every (key, value) pair in a namespace. Optional: remote backends
+        need not support enumeration.
+        """
+        raise NotImplementedError
+
+    def write_many(self, puts: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+                   deletes: Optional[Dict[str, List[str]]] = None) -> None:
+        """
+        Apply deletes and then puts across namespaces. Backends that can
+        apply them in a single transaction should override this.
+        """
+        for namespace, keys in (deletes or {}).items():
+            self.delete(namespace, keys)
+        for namespace, items in (puts or {}).items():
+            self.put_many(namespace, items)
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        return self.get_many(namespace, [key]).get(key)
+
+    def put(self, namespace: str, key: str, value: Dict[str, Any]) -> None:
+        self.put_many(namespace, {key: value})
+
+    def close(self) -> None:
+        pass
+
+# namespace -> (table, key columns, value columns)
+_SQLITE_TABLES = {
+    FILES: ('cache', ('path',), ('hash', 'description', 'developer_consideration', 'imports',
+                                 'functions', 'classes', 'constants', 'last_seen', 'fingerprint',
+                                 'symbol_hashes')),
+    ANALYSES: ('analyses', ('hash',), ('classes', 'functions', 'constants', 'imports', 'docstring')),
+    DESCRIPTIONS: ('descriptions', ('fingerprint', 'model', 'prompt_version'),
+                   ('description', 'developer_consideration', 'created_at')),
+}
+_JSON_COLUMNS = {'imports', 'functions', 'classes', 'constants', 'symbol_hashes'}
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Cache backend over a connection returned by load_cache() or load_global_cache().
+
+    With `track_usage`, reads of content-addressed entries refresh their
+    last_used timestamp so prune_global_cache() can evict least recently used
+    entries first.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, track_usage: bool = False):
+        self.conn = conn
+        self.track_usage = track_usage
+        self._lock = threading.RLock()
+
+    def _key_values(self, namespace: str, key: str) -> Tuple[str, ...]:
+        if namespace == DESCRIPTIONS:
+            return split_description_key(key)
+        return (key,)
+
+    def _decode(self, value_columns: Tuple[str, ...], row: Tuple[Any, ...]) -> Dict[str, Any]:
+        return {
+            column: json.loads(value) if column in _JSON_COLUMNS and value else value
+            for column, value in zip(value_columns, row)
+        }
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        table, key_columns, value_columns = _SQLITE_TABLES[namespace]
+        where = ' AND '.join(f"{column} = ?" for column in key_columns)
+        query = f"SELECT {', '.join(value_columns)} FROM {table} WHERE {where}"
+        found = {}
+        with self._lock:
+            cursor = self.conn.cursor()
+            for key in keys:
+                cursor.execute(query, self._key_values(namespace, key))
+                row = cursor.fetchone()
+                if row is None:
+                    continue
+                found[key] = self._decode(value_columns, row)
+            if found and self.track_usage and namespace in SHARED_NAMESPACES:
+                cursor.executemany(
+                    f"UPDATE {table} SET last_used = ? WHERE {where}",
+                    [(time.time(),) + self._key_values(namespace, key) for key in found]
+                )
+                self.conn.commit()
+        return found
+
+    def _insert_rows(self, namespace: str, items: Dict[str, Dict[str, Any]]) -> Tuple[str, List[List[Any]]]:
+        table, key_columns, value_columns = _SQLITE_TABLES[namespace]
+        columns = list(key_columns) + list(value_columns)
+        if namespace in SHARED_NAMESPACES:
+            columns.extend(['last_used', 'imported_at'])
+        rows = []
+        now = time.time()
+        for key, value in items.items():
+            row = list(self._key_values(namespace, key))
+            for column in value_columns:
+                field = value.get(column)
+                if column in _JSON_COLUMNS:
+                    field = json.dumps(field if field is not None else [])
+                elif column == 'created_at' and field is None:
+                    field = now
+                row.append(field)
+            if namespace in SHARED_NAMESPACES:
+                row.extend([now, value.get('imported_at')])
+            rows.append(row)
+        query = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        return query, rows
+
+    def put_many(self, namespace: str, items: Dict[str, Dict[str, Any]]) -> None:
+        if items:
+            self.write_many(puts={namespace: items})
+
+    def delete(self, namespace: str, keys: Iterable[str]) -> None:
+        self.write_many(deletes={namespace: list(keys)})
+
+    def write_many(self, puts: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+                   deletes: Optional[Dict[str, List[str]]] = None) -> None:
+        # One transaction and one commit (one fsync) for the whole group
+        with self._lock:
+            for namespace, keys in (deletes or {}).items():
+                table, key_columns, _ = _SQLITE_TABLES[namespace]
+                where = ' AND '.join(f"{column} = ?" for column in key_columns)
+                self.conn.executemany(
+                    f"DELETE FROM {table} WHERE {where}",
+                    [self._key_values(namespace, key) for key in keys]
+                )
+            for namespace, items in (puts or {}).items():
+                if items:
+                    self.conn.executemany(*self._insert_rows(namespace, items))
+            self.conn.commit()
+
+    def iter_items(self, namespace: str, batch_size: int = 500) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        table, key_columns, value_columns = _SQLITE_TABLES[namespace]
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT {', '.join(key_columns + value_columns)} FROM {table}")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    key_values = row[:len(key_columns)]
+                    if namespace == DESCRIPTIONS:
+                        fingerprint, model, prompt_version = key_values
+                        key = description_key(fingerprint, model, prompt_version)
+                    else:
+                        key = key_values[0]
+                    yield key, self._decode(value_columns, row[len(key_columns):])
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process cache backend, used for tests and by the reference cache server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            entries = self._data.get(namespace, {})
+            return {key: copy.deepcopy(entries[key]) for key in keys if key in entries}
+
+    def put_many(self, namespace: str, items: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            entries = self._data.setdefault(namespace, {})
+            for key, value in items.items():
+                entries[key] = copy.deepcopy(value)
+
+    def delete(self, namespace: str, keys: Iterable[str]) -> None:
+        with self._lock:
+            entries = self._data.get(namespace, {})
+            for key in keys:
+                entries.pop(key, None)
+
+    def iter_items(self, namespace: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            items = list(self._data.get(namespace, {}).items())
+        for key, value in items:
+            yield key, copy.deepcopy(value)
+
+class HttpCacheBackend(CacheBackend):
+    """
+    Client for the repo-map HTTP key-value cache protocol.
+
+    Every operation is a JSON POST to `<base_url>/v1/<operation>`:
+      get:    {"namespace": ..., "keys": [...]}   -> {"items": {key: value}}
+      put:    {"namespace": ..., "items": {...}}  -> {}
+      delete: {"namespace": ..., "keys": [...]}   -> {}
+    A remote cache is an optimization only: network and server errors are
+    logged and treated as cache misses so they never fail a run.
+    """
+
+    def __init__(self, base_url: str, token: Optional[str] = None, timeout: float = 10.0, batch_size: int = 500):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._session = requests.Session()
+        self._session.headers['Content-Type'] = 'application/json'
+        if token:
+            self._session.headers['Authorization'] = f"Bearer {token}"
+
+    def _post(self, operation: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            response = self._session.post(f"{self.base_url}/v1/{operation}", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Remote cache {operation} failed: {e}")
+            return None
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), self.batch_size):
+            result = self._post('get', {'namespace': namespace, 'keys': keys[start:start + self.batch_size]})
+            if result:
+                found.update(result.get('items', {}))
+        return found
+
+    def put_many(self, namespace: str, items: Dict[str, Dict[str, Any]]) -> None:
+        keys = list(items)
+        for start in range(0, len(keys), self.batch_size):
+            batch = {key: items[key] for key in keys[start:start + self.batch_size]}
+            self._post('put', {'namespace': namespace, 'items': batch})
+
+    def delete(self, namespace: str, keys: Iterable[str]) -> None:
+        self._post('delete', {'namespace': namespace, 'keys': list(keys)})
+
+    def close(self) -> None:
+        self._session.close()
+
+class TieredCacheBackend(CacheBackend):
+    """
+    Per-repo cache backed by shared tiers (global user cache, remote cache).
+
+    FILES entries only ever touch the primary backend. For content-addressed
+    namespaces, misses fall through the shared tiers in order and hits are
+    copied into the tiers in front of them; writes go to every tier. Deletes
+    only affect the primary backend so local GC never purges shared caches.
+    """
+
+    def __init__(self, primary: CacheBackend, shared: Optional[List[CacheBackend]] = None):
+        self.primary = primary
+        self.shared = list(shared or [])
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list(keys)
+        found = self.primary.get_many(namespace, keys)
+        if namespace not in SHARED_NAMESPACES:
+            return found
+        missed_tiers = [self.primary]
+        for tier in self.shared:
+            missing = [key for key in keys if key not in found]
+            if not missing:
+                break
+            hits = tier.get_many(namespace, missing)
+            if hits:
+                for earlier in missed_tiers:
+                    earlier.put_many(namespace, hits)
+                found.update(hits)
+            missed_tiers.append(tier)
+        return found
+
+    def put_many(self, namespace: str, items: Dict[str, Dict[str, Any]]) -> None:
+        self.primary.put_many(namespace, items)
+        if namespace in SHARED_NAMESPACES:
+            for tier in self.shared:
+                tier.put_many(namespace, items)
+
+    def write_many(self, puts: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+                   deletes: Optional[Dict[str, List[str]]] = None) -> None:
+        self.primary.write_many(puts, deletes)
+        shared_puts = {
+            namespace: items for namespace, items in (puts or {}).items()
+            if namespace in SHARED_NAMESPACES and items
+        }
+        if shared_puts:
+            for tier in self.shared:
+                tier.write_many(shared_puts)
+
+    def delete(self, namespace: str, keys: Iterable[str]) -> None:
+        self.primary.delete(namespace, keys)
+
+    def iter_items(self, namespace: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return self.primary.iter_items(namespace)
+
+    def close(self) -> None:
+        self.primary.close()
+        for tier in self.shared:
+            tier.close()
+
+class WriteBehindCacheBackend(CacheBackend):
+    """
+    Wraps another backend so callers never wait for its writes.
+
+    Puts and deletes update an in-memory snapshot and are queued for a single
+    writer thread, which applies everything queued since its last round with
+    one write_many() call (one transaction and one commit for SQLite: group
+    commit). Reads are answered from the snapshot, which holds every write
+    made through this wrapper and whatever prefetch() or earlier reads
+    loaded; only keys never seen fall through to the wrapped backend.
+
+    flush() blocks until queued writes are applied, stop() also ends the
+    writer thread, and close() stops it and closes the wrapped backend.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        # namespace -> key -> value, or None for a key known to be absent
+        self._snapshot: Dict[str, Dict[str, Optional[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='repo-map-cache-writer', daemon=True)
+        self._writer.start()
+
+    def _write_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            operations = [self._queue.get()]
+            while True:
+                try:
+                    operations.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            puts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            deletes: Dict[str, List[str]] = {}
+            flushed = []
+            for operation in operations:
+                if operation is None:
+                    stopping = True
+                elif isinstance(operation, threading.Event):
+                    flushed.append(operation)
+                elif operation[0] == 'put':
+                    _, namespace, items = operation
+                    puts.setdefault(namespace, {}).update(items)
+                else:
+                    _, namespace, keys = operation
+                    pending = puts.get(namespace, {})
+                    for key in keys:
+                        # Deletes are applied before puts, so drop earlier puts
+                        pending.pop(key, None)
+                    deletes.setdefault(namespace, []).extend(keys)
+            if puts or deletes:
+                try:
+                    self.backend.write_many(puts, deletes)
+                except Exception as e:
+                    logger.warning(f"Cache write failed: {e}")
+            for event in flushed:
+                event.set()
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        missing = []
+        with self._lock:
+            snapshot = self._snapshot.setdefault(namespace, {})
+            for key in keys:
+                if key not in snapshot:
+                    missing.append(key)
+                elif snapshot[key] is not None:
+                    found[key] = copy.deepcopy(snapshot[key])
+        if missing:
+            fetched = self.backend.get_many(namespace, missing)
+            with self._lock:
+                for key in missing:
+                    # A write made while the backend was read takes precedence
+                    value = snapshot.setdefault(key, fetched.get(key))
+                    if value is not None:
+                        found[key] = copy.deepcopy(value)
+        return found
+
+    def prefetch(self, namespace: str, keys: Optional[Iterable[str]] = None) -> None:
+        """
+        Load `keys`, or every entry of `namespace` the wrapped backend can
+        enumerate, into the read snapshot.
+        """
+        if keys is not None:
+            self.get_many(namespace, keys)
+            return
+        try:
+            items = list(self.backend.iter_items(namespace))
+        except NotImplementedError:
+            return
+        with self._lock:
+            snapshot = self._snapshot.setdefault(namespace, {})
+            for key, value in items:
+                snapshot.setdefault(key, value)
+
+    def put_many(self, namespace: str, items: Dict[str, Dict[str, Any]]) -> None:
+        if not items:
+            return
+        items = copy.deepcopy(items)
+        with self._lock:
+            self._snapshot.setdefault(namespace, {}).update(items)
+        self._queue.put(('put', namespace, items))
+
+    def delete(self, namespace: str, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        with self._lock:
+            snapshot = self._snapshot.setdefault(namespace, {})
+            for key in keys:
+                snapshot[key] = None
+        self._queue.put(('delete', namespace, keys))
+
+    def iter_items(self, namespace: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        self.flush()
+        return self.backend.iter_items(namespace)
+
+    def flush(self) -> None:
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def stop(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def close(self) -> None:
+        self.stop()
+        self.backend.close()
+
+def as_cache_backend(cache: Any) -> CacheBackend:
+    """
+    Accept either a CacheBackend or a raw connection from load_cache().
+    """
+    if isinstance(cache, CacheBackend):
+        return cache
+    return SqliteCacheBackend(cache)
+
+def touch_cache_entries(conn: sqlite3.Connection, paths: Iterable[str], timestamp: Optional[float] = None) -> None:
+    """
+    Mark cache rows for the given paths as seen at `timestamp` (defaults to now).
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    conn.executemany(
+        "UPDATE cache SET last_seen = ? WHERE path = ?",
+        ((timestamp, path) for path in paths)
+    )
+    conn.commit()
+
+def gc_cache(conn: sqlite3.Connection, live_paths: Optional[Iterable[str]] = None, max_entries: Optional[int] = None) -> int:
+    """
+    Evict stale cache rows and return the number of rows removed.
+
+    Rows whose path is not in `live_paths` are deleted when it is given. When
+    `max_entries` is set, the least recently seen rows beyond that cap are
+    deleted as well. Analyses and descriptions no cached file refers to are
+    deleted last, unless no file is cached at all: such a cache was seeded
+    (see import_snapshot()) or belongs to a repository that is not there,
+    and its content would otherwise be lost before the first scan. Imported
+    entries are kept for IMPORT_GRACE_SECONDS until a cached file refers to
+    them; from then on they follow the same rules as any other entry.
+    """
+    cursor = conn.cursor()
+    removed = 0
+
+    if live_paths is not None:
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS live_paths (path TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM live_paths")
+        cursor.executemany(
+            "INSERT OR IGNORE INTO live_paths (path) VALUES (?)",
+            ((path,) for path in live_paths)
+        )
+        cursor.execute("DELETE FROM cache WHERE path NOT IN (SELECT path FROM live_paths)")
+        removed += cursor.rowcount
+        cursor.execute("DROP TABLE live_paths")
+
+    if max_entries is not None:
+        cursor.execute("""
+            DELETE FROM cache WHERE path IN (
+                SELECT path FROM cache
+                ORDER BY COALESCE(last_seen, 0) DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (max(max_entries, 0),))
+        removed += cursor.rowcount
+
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM cache)")
+    if not cursor.fetchone()[0]:
+        logger.warning("No cached files left; keeping cached analyses and descriptions")
+        conn.commit()
+        return removed
+
+    # Analyses are only reachable through a cached file hash, descriptions
+    # through the prompt-input fingerprint or symbol hashes of a cached file.
+    imported_since = time.time() - IMPORT_GRACE_SECONDS
+    live_hashes = "SELECT hash FROM cache WHERE hash IS NOT NULL"
+    cursor.execute(f"UPDATE analyses SET imported_at = NULL WHERE imported_at IS NOT NULL AND hash IN ({live_hashes})")
+    cursor.execute(f"""
+        DELETE FROM analyses WHERE hash NOT IN ({live_hashes})
+        AND (imported_at IS NULL OR imported_at < ?)
+    """, (imported_since,))
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS live_fingerprints (fingerprint TEXT PRIMARY KEY)")
+    cursor.execute("DELETE FROM live_fingerprints")
+    cursor.execute(
+        "INSERT OR IGNORE INTO live_fingerprints SELECT fingerprint FROM cache WHERE fingerprint IS NOT NULL"
+    )
+    cursor.execute("SELECT symbol_hashes FROM cache WHERE symbol_hashes IS NOT NULL AND symbol_hashes != '[]'")
+    symbol_hashes = [(symbol_hash,) for (value,) in cursor.fetchall() for symbol_hash in json.loads(value)]
+    cursor.executemany("INSERT OR IGNORE INTO live_fingerprints (fingerprint) VALUES (?)", symbol_hashes)
+    cursor.execute("""
+        UPDATE descriptions SET imported_at = NULL
+        WHERE imported_at IS NOT NULL AND fingerprint IN (SELECT fingerprint FROM live_fingerprints)
+    """)
+    cursor.execute("""
+        DELETE FROM descriptions WHERE fingerprint NOT IN (SELECT fingerprint FROM live_fingerprints)
+        AND (imported_at IS NULL OR imported_at < ?)
+    """, (imported_since,))
+    cursor.execute("DROP TABLE live_fingerprints")
+
+    conn.commit()
+    return removed
+
+def compact_cache(conn: sqlite3.Connection, max_pages: Optional[int] = None) -> None:
+    """
+    Return free pages to the filesystem with an incremental VACUUM.
+
+    Caches created before auto_vacuum was enabled are rebuilt once with a full
+    VACUUM so that later runs can vacuum incrementally.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA auto_vacuum")
+    if cursor.fetchone()[0] != 2:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.commit()
+        conn.execute("VACUUM")
+        return
+
+    cursor.execute("PRAGMA freelist_count")
+    if cursor.fetchone()[0] == 0:
+        return
+    if max_pages is None:
+        cursor.execute("PRAGMA incremental_vacuum")
+    else:
+        cursor.execute(f"PRAGMA incremental_vacuum({int(max_pages)})")
+    cursor.fetchall()
+    conn.commit()
+
+def list_existing_paths(conn: sqlite3.Connection) -> List[str]:
+    """
+    Return the cached paths that still exist on disk.
+
+    Scans store absolute paths, so the check does not depend on where the
+    command is run. Relative paths written by older versions cannot be
+    resolved reliably and are treated as gone; the next scan caches those
+    files again under their absolute path.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT path FROM cache")
+    return [row[0] for row in cursor.fetchall() if os.path.isabs(row[0]) and os.path.exists(row[0])]
+
+def default_global_cache_dir() -> str:
+    """
+    Return the user-level cache directory shared by every checkout on this machine.
+    """
+    if os.getenv('REPO_MAP_CACHE_DIR'):
+        return os.getenv('REPO_MAP_CACHE_DIR')
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'repo-map')
+
+def load_global_cache(cache_dir: Optional[str] = None, db_name: str = 'global-cache.db') -> sqlite3.Connection:
+    """
+    Open the content-addressed cache shared across repositories and worktrees.
+
+    Entries are keyed only by file contents (and model/prompt version for
+    descriptions), never by path. WAL mode and a busy timeout let several
+    repo-map processes read and write the store concurrently.
+    """
+    cache_dir = cache_dir or default_global_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, db_name), timeout=30, check_same_thread=False)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA busy_timeout = 30000")
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    _create_content_tables(cursor)
+    conn.commit()
+    return conn
+
+def prune_global_cache(conn: sqlite3.Connection, max_entries: int) -> int:
+    """
+    Keep at most `max_entries` rows in each table of the global cache, evicting
+    the least recently used first. Returns the number of rows removed.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        DELETE FROM analyses WHERE hash IN (
+            SELECT hash FROM analyses
+            ORDER BY COALESCE(last_used, 0) DESC
+            LIMIT -1 OFFSET ?
+        )
+    """, (max(max_entries, 0),))
+    removed = cursor.rowcount
+    cursor.execute("""
+        DELETE FROM descriptions WHERE rowid IN (
+            SELECT rowid FROM descriptions
+            ORDER BY COALESCE(last_used, created_at, 0) DESC
+            LIMIT -1 OFFSET ?
+        )
+    """, (max(max_entries, 0),))
+    removed += cursor.rowcount
+    conn.commit()
+    if removed:
+        compact_cache(conn)
+    return removed
@@ -0,0 +1,104 @@
+"""
+Reference server for the repo-map HTTP cache protocol (see HttpCacheBackend).
+
+Intended for tests and small deployments, e.g. a CI fleet sharing one warm
+description cache:
+
+    python -m src.repo_map.cache_server --port 8765 --db /var/cache/repo-map
+"""
+
+import argparse
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+from src.repo_map.cache_management import (
+    CacheBackend,
+    MemoryCacheBackend,
+    SqliteCacheBackend,
+    load_global_cache,
+    SHARED_NAMESPACES
+)
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def make_handler(backend: CacheBackend, token: Optional[str] = None):
+    class CacheRequestHandler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if token and self.headers.get('Authorization') != f"Bearer {token}":
+                self._reply(401, {'error': 'unauthorized'})
+                return
+            operation = self.path.rstrip('/').rsplit('/', 1)[-1]
+            if not self.path.startswith('/v1/') or operation not in ('get', 'put', 'delete'):
+                self._reply(404, {'error': f"unknown endpoint {self.path}"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._reply(400, {'error': 'invalid JSON body'})
+                return
+            namespace = request.get('namespace')
+            if namespace not in SHARED_NAMESPACES:
+                # Only content-addressed entries make sense to share between machines.
+                self._reply(400, {'error': f"unsupported namespace {namespace!r}"})
+                return
+
+            if operation == 'get':
+                self._reply(200, {'items': backend.get_many(namespace, request.get('keys', []))})
+            elif operation == 'put':
+                backend.put_many(namespace, request.get('items', {}))
+                self._reply(200, {})
+            else:
+                backend.delete(namespace, request.get('keys', []))
+                self._reply(200, {})
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return CacheRequestHandler
+
+def serve_cache(host: str = '127.0.0.1', port: int = 0, backend: Optional[CacheBackend] = None,
+                token: Optional[str] = None) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """
+    Start a cache server in a background thread and return it with its thread.
+    Pass port=0 to bind a free port; the bound address is `server.server_address`.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(backend or MemoryCacheBackend(), token))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference HTTP cache server for repo-map.")
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to bind (default: 127.0.0.1).')
+    parser.add_argument('--port', type=int, default=8765, help='Port to bind (default: 8765).')
+    parser.add_argument('--db', type=str, default=None,
+                        help='Directory for a persistent SQLite store (default: in-memory).')
+    parser.add_argument('--token', type=str, default=None, help='Require this bearer token on every request.')
+    args = parser.parse_args()
+
+    backend = SqliteCacheBackend(load_global_cache(args.db), track_usage=True) if args.db else MemoryCacheBackend()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(backend, args.token))
+    logger.warning(f"repo-map cache server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        backend.close()
+
+if __name__ == "__main__":
+    main()
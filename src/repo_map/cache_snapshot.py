@@ -0,0 +1,101 @@
+import gzip
+import json
+import time
+import logging
+from typing import Dict, Any, Tuple
+
+from src.repo_map.cache_management import (
+    CacheBackend,
+    SHARED_NAMESPACES,
+    DESCRIPTIONS
+)
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 'repo-map-cache-snapshot'
+SNAPSHOT_VERSION = 1
+
+def export_snapshot(cache: CacheBackend, output_path: str) -> int:
+    """
+    Stream the content-addressed part of the cache to a gzip-compressed JSON
+    Lines file and return the number of entries written.
+
+    Path-keyed FILES entries are left out: they are specific to one checkout,
+    and a scan rebuilds them cheaply from ANALYSES keyed by file hash. The
+    snapshot can therefore seed any clone of the repository.
+    """
+    count = 0
+    with gzip.open(output_path, 'wt', encoding='utf-8') as f:
+        header = {'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION, 'created_at': time.time()}
+        f.write(json.dumps(header) + '\n')
+        for namespace in SHARED_NAMESPACES:
+            for key, value in cache.iter_items(namespace):
+                f.write(json.dumps({'namespace': namespace, 'key': key, 'value': value}, separators=(',', ':')) + '\n')
+                count += 1
+    return count
+
+def _prefer_incoming(namespace: str, existing: Dict[str, Any], incoming: Dict[str, Any]) -> bool:
+    """
+    Resolve a key conflict. Keys already pin the content fingerprint (and model
+    and prompt version for descriptions), so the only question is which
+    description is fresher; analyses of identical contents are interchangeable.
+    """
+    if namespace != DESCRIPTIONS:
+        return False
+    return (incoming.get('created_at') or 0) > (existing.get('created_at') or 0)
+
+def import_snapshot(cache: CacheBackend, input_path: str, batch_size: int = 500) -> Tuple[int, int]:
+    """
+    Merge a snapshot written by export_snapshot() into `cache`, streaming it in
+    batches. Returns (imported, skipped).
+
+    Merged entries are marked as imported, so gc_cache() keeps them until
+    the files they describe have been scanned.
+    """
+    imported = 0
+    skipped = 0
+    imported_at = time.time()
+
+    def flush(namespace: str, batch: Dict[str, Dict[str, Any]]) -> None:
+        nonlocal imported, skipped
+        existing = cache.get_many(namespace, list(batch))
+        accepted = {
+            key: dict(value, imported_at=imported_at) for key, value in batch.items()
+            if key not in existing or _prefer_incoming(namespace, existing[key], value)
+        }
+        cache.put_many(namespace, accepted)
+        imported += len(accepted)
+        skipped += len(batch) - len(accepted)
+
+    with gzip.open(input_path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"{input_path} is not a repo-map cache snapshot")
+        if header.get('version', 0) > SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {header.get('version')} in {input_path}")
+
+        batches: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for line_number, line in enumerate(f, start=2):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                namespace, key, value = entry['namespace'], entry['key'], entry['value']
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Skipping malformed snapshot line {line_number}: {e}")
+                skipped += 1
+                continue
+            if namespace not in SHARED_NAMESPACES:
+                skipped += 1
+                continue
+            batch = batches.setdefault(namespace, {})
+            batch[key] = value
+            if len(batch) >= batch_size:
+                flush(namespace, batch)
+                batches[namespace] = {}
+        for namespace, batch in batches.items():
+            if batch:
+                flush(namespace, batch)
+
+    return imported, skipped
@@ -162,6 +162,104 @@ def get_python_structure(file_path: str) -> Tuple[Dict[str, List[str]], List[str
     
     return classes, functions, constants
 
+def get_python_symbols(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Return the top-level classes and functions (async ones included) with
+    their source segments (decorators included). Each symbol's `hash`
+    covers only its own segment, so editing one function leaves the hashes of
+    the others unchanged.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            source = file.read()
+        tree = ast.parse(source)
+    except (SyntaxError, IOError) as e:
+        logger.error(f"Error parsing {file_path}: {e}")
+        return []
+
+    def first_line(node: ast.AST) -> int:
+        return min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])])
+
+    lines = source.splitlines(keepends=True)
+    nodes = list(ast.iter_child_nodes(tree))
+    symbols = []
+    for position, node in enumerate(nodes):
+        if not isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        start = first_line(node)
+        end = getattr(node, 'end_lineno', None)
+        if end is None:
+            # Python 3.7 has no end positions; the symbol runs up to the next statement
+            end = first_line(nodes[position + 1]) - 1 if position + 1 < len(nodes) else len(lines)
+        segment = ''.join(lines[start - 1:end])
+        kind = 'class' if isinstance(node, ast.ClassDef) else 'function'
+        symbols.append({
+            'name': node.name,
+            'kind': kind,
+            'source': segment,
+            'hash': hashlib.sha256(f"{kind}:{segment}".encode('utf-8')).hexdigest()
+        })
+    return symbols
+
+# Longest source excerpt returned by get_python_excerpts(), in characters.
+EXCERPT_LIMIT = 200
+
+def get_python_excerpts(file_path: str) -> List[str]:
+    """
+    Return short source excerpts of a Python file, most informative first:
+    the module docstring's first paragraph, then the signature and docstring
+    summary of each public class, function and method, then those of private
+    ones. Used to give the LLM more to go on than names (see
+    select_excerpts()).
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            source = file.read()
+        tree = ast.parse(source)
+    except (SyntaxError, IOError) as e:
+        logger.error(f"Error parsing {file_path}: {e}")
+        return []
+
+    lines = source.splitlines()
+
+    def shorten(text: str) -> str:
+        text = ' '.join(text.split())
+        return text if len(text) <= EXCERPT_LIMIT else text[:EXCERPT_LIMIT - 3] + '...'
+
+    def signature(node: ast.AST, owner: str = '') -> str:
+        body_start = node.body[0].lineno
+        header = lines[node.lineno - 1:max(node.lineno, body_start - 1)]
+        if body_start == node.lineno:
+            # One-liner: the body follows the colon on the same line
+            header = [header[0][:node.body[0].col_offset]]
+        # Trailing comments, unless a quote follows the '#'
+        text = ' '.join(re.sub(r'#[^\'"]*$', '', line).strip() for line in header).rstrip(':').strip()
+        if owner:
+            text = re.sub(rf'\bdef\s+{node.name}\b', f"def {owner}.{node.name}", text, count=1)
+        summary = (ast.get_docstring(node) or '').strip().split('\n')[0]
+        return shorten(f"{text}: {summary}" if summary else text)
+
+    def private(name: str) -> bool:
+        return name.startswith('_') and name != '__init__'
+
+    definitions = (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+    public, members, hidden = [], [], []
+    for node in tree.body:
+        if not isinstance(node, definitions):
+            continue
+        (hidden if private(node.name) else public).append(signature(node))
+        if isinstance(node, ast.ClassDef):
+            for member in node.body:
+                if isinstance(member, definitions):
+                    is_private = private(node.name) or private(member.name)
+                    (hidden if is_private else members).append(signature(member, node.name))
+
+    excerpts = []
+    docstring = (ast.get_docstring(tree) or '').strip()
+    if docstring:
+        excerpts.append(shorten(docstring.split('\n\n')[0]))
+    return excerpts + public + members + hidden
+
 def get_java_structure(file_path: str) -> Tuple[Dict[str, List[str]], List[str], List[str]]:
     classes = {}
     functions = []
@@ -258,6 +356,72 @@ def get_csharp_structure(file_path: str) -> Tuple[Dict[str, List[str]], List[str
     
     return classes, functions, constants
 
+def get_go_structure(file_path: str) -> Tuple[Dict[str, List[str]], List[str], List[str]]:
+    """
+    Types (with the methods declared on them), functions and constants of a
+    Go file.
+    """
+    classes = {}
+    functions = []
+    constants = []
+    type_pattern = re.compile(r'^type\s+(\w+)')
+    method_pattern = re.compile(r'^func\s*\(\s*\w*\s*\*?\s*(\w+)(?:\[[^\]]*\])?\s*\)\s*(\w+)')
+    function_pattern = re.compile(r'^func\s+(\w+)')
+    constant_pattern = re.compile(r'^const\s+(\w+)')
+    # First name on an indented line of a const ( ... ) or type ( ... ) block
+    block_name_pattern = re.compile(r'^\s+(\w+)\b')
+
+    in_constant_block = False
+    in_type_block = False
+    type_block_depth = 0
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if in_type_block:
+                    if type_block_depth == 0:
+                        if line.startswith(')'):
+                            in_type_block = False
+                            continue
+                        # Types are named at the top level of the block, not in their bodies
+                        type_match = block_name_pattern.match(line)
+                        if type_match:
+                            classes.setdefault(type_match.group(1), [])
+                    type_block_depth += line.count('{') - line.count('}')
+                    continue
+                if in_constant_block:
+                    if line.startswith(')'):
+                        in_constant_block = False
+                        continue
+                    constant_match = block_name_pattern.match(line)
+                    if constant_match:
+                        constants.append(constant_match.group(1))
+                    continue
+                if re.match(r'^const\s*\(', line):
+                    in_constant_block = True
+                    continue
+                if re.match(r'^type\s*\(', line):
+                    in_type_block = True
+                    continue
+                type_match = type_pattern.match(line)
+                if type_match:
+                    classes.setdefault(type_match.group(1), [])
+                    continue
+                method_match = method_pattern.match(line)
+                if method_match:
+                    classes.setdefault(method_match.group(1), []).append(method_match.group(2))
+                    continue
+                function_match = function_pattern.match(line)
+                if function_match:
+                    functions.append(function_match.group(1))
+                    continue
+                constant_match = constant_pattern.match(line)
+                if constant_match:
+                    constants.append(constant_match.group(1))
+    except IOError as e:
+        logger.error(f"Error reading Go file {file_path}: {e}")
+
+    return classes, functions, constants
+
 def get_module_docstring(file_path: str, language: str) -> str:
     if language == 'Python':
         try:
@@ -305,8 +469,8 @@ def get_imports(file_path: str, language: str) -> List[str]:
     elif language in ['Java', 'JavaScript', 'TypeScript', 'C#', 'PHP']:
         import_patterns = {
             'Java': re.compile(r'import\s+([\w\.]+);'),
-            'JavaScript': re.compile(r'import\s+.*?\s+from\s+[\'"]([\w\.\/]+)[\'"];'),
-            'TypeScript': re.compile(r'import\s+.*?\s+from\s+[\'"]([\w\.\/]+)[\'"];'),
+            'JavaScript': re.compile(r'import\s+.*?\s+from\s+[\'"]([\w@\.\/\-]+)[\'"]'),
+            'TypeScript': re.compile(r'import\s+.*?\s+from\s+[\'"]([\w@\.\/\-]+)[\'"]'),
             'C#': re.compile(r'using\s+([\w\.]+);'),
             'PHP': re.compile(r'use\s+([\w\\]+);'),
         }
@@ -320,6 +484,28 @@ def get_imports(file_path: str, language: str) -> List[str]:
                             imports.append(match.group(1))
             except IOError as e:
                 logger.error(f"Error reading imports from {file_path}: {e}")
+    elif language == 'Go':
+        # import "fmt", import alias "path", or one path per line of an import ( ... ) block
+        import_pattern = re.compile(r'^(?:import\s+)?(?:[\w\.]+\s+)?"([^"]+)"')
+        in_import_block = False
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    stripped = line.strip()
+                    if in_import_block:
+                        if stripped.startswith(')'):
+                            in_import_block = False
+                            continue
+                        match = import_pattern.match(stripped)
+                    elif re.match(r'^import\s*\(', stripped):
+                        in_import_block = True
+                        continue
+                    else:
+                        match = import_pattern.match(stripped) if stripped.startswith('import') else None
+                    if match:
+                        imports.append(match.group(1))
+        except IOError as e:
+            logger.error(f"Error reading imports from {file_path}: {e}")
     return imports
 
 def get_constants(file_path: str, language: str) -> List[str]:
@@ -353,5 +539,7 @@ def get_structure(file_path: str, language: str) -> Tuple[Dict[str, List[str]],
         return get_javascript_structure(file_path)
     elif language == 'C#':
         return get_csharp_structure(file_path)
+    elif language == 'Go':
+        return get_go_structure(file_path)
     else:
         return {}, [], []
@@ -0,0 +1,71 @@
+"""
+Record/replay of LLM responses.
+
+In record mode every successful completion is appended to a JSON Lines file,
+keyed by a hash of the request (model, messages and response format). In
+replay mode those responses are served without any network access, so runs
+are deterministic and need no API key; requests missing from the cassette
+fail like an unreachable provider.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import logging
+from typing import Dict, Any, List, Optional
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+def request_key(model: str, messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Stable hash of the parts of a request that determine its answer.
+    """
+    canonical = json.dumps(
+        {'model': model, 'messages': messages, 'response_format': response_format},
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class Cassette:
+    def __init__(self, path: str, mode: str = REPLAY):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}' (use '{RECORD}' or '{REPLAY}')")
+        if mode == REPLAY and not os.path.exists(path):
+            raise ValueError(f"Cassette {path} does not exist; record it first")
+        self.path = path
+        self.mode = mode
+        self._responses: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses[entry['key']] = entry['content']
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def replay(self, key: str) -> Optional[str]:
+        content = self._responses.get(key)
+        if content is None:
+            logger.warning(f"No recorded response for request {key[:12]} in {self.path}")
+        return content
+
+    def record(self, key: str, content: str) -> None:
+        with self._lock:
+            if self._responses.get(key) == content:
+                return
+            self._responses[key] = content
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'content': content}) + '\n')
@@ -1,12 +1,34 @@
 import os
 import json
+import hashlib
+import functools
 import asyncio
 import re
-from typing import List, Dict, Any, Optional
-import sqlite3
+import ssl
+import time
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 import aiohttp
+import certifi
+from src.repo_map.rate_limiting import RateLimiter, LLMBudget, backoff_delay, count_tokens
+from src.repo_map.llm_providers import LLMProvider, get_provider
+from src.repo_map.llm_cassette import Cassette, request_key
+from src.repo_map.response_cache import ResponseCache, prompt_key
+from src.repo_map.work_scheduler import ImportanceRanker, PriorityWorkQueue
+from src.repo_map.resilience import CircuitBreaker, RequestHedger
+from src.repo_map.load_balancer import Endpoint, LoadBalancer
 from dotenv import load_dotenv
+from src.repo_map.file_processing import get_python_symbols, get_python_excerpts
+from src.repo_map.prompt_builder import FILE_PROMPT_TOKENS, fit_sections, select_excerpts
+from src.repo_map.prompt_packs import PROMPT_PACKS, PromptPack, get_prompt_pack, is_eligible
+from src.repo_map.cache_management import (
+    as_cache_backend,
+    description_key,
+    file_cache_record,
+    WriteBehindCacheBackend,
+    FILES,
+    DESCRIPTIONS
+)
 
 def load_env_file():
     """Manually load .env file"""
@@ -24,147 +46,1184 @@ load_env_file()
 logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-async def get_llm_descriptions(structure: List[Dict[str, Any]], file_index: int, file: Dict[str, Any], model: str, max_retries: int = 3) -> None:
+# Bump whenever the prompt template or response format changes so cached
+# descriptions produced by the old prompt are no longer served.
+PROMPT_VERSION = "2"
+
+# Expected completion size, charged against the tokens-per-minute budget.
+EXPECTED_RESPONSE_TOKENS = 200
+
+# Output cap (max_tokens) per described file or symbol.
+MAX_RESPONSE_TOKENS = 2 * EXPECTED_RESPONSE_TOKENS
+
+OPENROUTER_URL = get_provider('openrouter').chat_url
+
+# Version of the symbol-level prompt, kept separate from PROMPT_VERSION; it
+# must not contain ':' (see description_key()).
+SYMBOL_PROMPT_VERSION = "s1"
+
+# Longest symbol source sent to the LLM, in characters.
+SYMBOL_SOURCE_LIMIT = 12000
+
+# Version of the directory-summary prompt; must not contain ':' either.
+DIRECTORY_PROMPT_VERSION = "d1"
+
+# Children listed per directory in its summary prompt, and the longest child
+# description quoted there, in characters.
+DIRECTORY_CHILD_LIMIT = 50
+DIRECTORY_DESCRIPTION_LIMIT = 300
+
+# Extra requests allowed per file to repair a response that fails validation.
+MAX_REPAIR_ATTEMPTS = 2
+
+DESCRIPTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "description": {"type": "string", "minLength": 1},
+        "developer_consideration": {"type": "string"}
+    },
+    "required": ["description", "developer_consideration"],
+    "additionalProperties": False
+}
+
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "files": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "description": {"type": "string", "minLength": 1},
+                    "developer_consideration": {"type": "string"}
+                },
+                "required": ["id", "description", "developer_consideration"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["files"],
+    "additionalProperties": False
+}
+
+def json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Get descriptions for a file using LLM via OpenRouter API.
+    Build an OpenAI/OpenRouter `response_format` requesting structured output.
+    Providers without structured output ignore it; responses are validated
+    locally either way.
     """
-    api_key = os.getenv('OPENROUTER_API_KEY')
-    if not api_key:
-        logger.warning(f"No OpenRouter API key found, skipping LLM enhancement for {file['name']}")
-        return
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
 
-    # Debug log for API key (first 10 chars only for security)
-    logger.warning(f"Using API key starting with: {api_key[:10]}...")
+def create_llm_session(limit: int = 8, keepalive_timeout: float = 60.0, dns_cache_ttl: int = 600) -> aiohttp.ClientSession:
+    """
+    Create the HTTP session shared by every LLM request in a run.
+
+    The connector keeps up to `limit` connections alive between requests and
+    caches DNS lookups, so only the first requests pay for DNS, TCP and TLS
+    setup. Certificates are verified against certifi's CA bundle.
+    """
+    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_cache_ttl,
+        ssl=ssl_context
+    )
+    return aiohttp.ClientSession(connector=connector)
 
-    # Prepare the content for LLM
+async def warm_up_session(session: aiohttp.ClientSession, url: str = OPENROUTER_URL) -> None:
+    """
+    Resolve DNS and complete the TLS handshake ahead of the first LLM request,
+    leaving a pooled keep-alive connection behind. Failures are ignored; the
+    real requests handle their own errors.
+    """
+    try:
+        async with session.head(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            await response.read()
+    except Exception as e:
+        logger.debug(f"LLM connection warm-up failed: {e}")
+
+def file_prompt_pack(file: Dict[str, Any]) -> PromptPack:
+    """
+    The PromptPack for `file`'s language; the Python pack for files without one.
+    """
+    return get_prompt_pack(file.get('language')) or PROMPT_PACKS['Python']
+
+def build_file_details(file: Dict[str, Any], token_budget: int = FILE_PROMPT_TOKENS) -> str:
+    """
+    Describe a file's extracted code elements for the LLM prompt, as titled
+    by its language's PromptPack, within about `token_budget` tokens (see
+    fit_sections()), followed by the source excerpts selected for it, if any
+    (see get_python_excerpts()).
+    """
+    pack = file_prompt_pack(file)
     content = f"File: {file['name']}\n"
-    if file.get('imports'):
-        content += "Imports:\n" + "\n".join([f"- {imp}" for imp in file['imports']]) + "\n"
-    if file.get('functions'):
-        content += "Functions:\n" + "\n".join([f"- {func}" for func in file['functions']]) + "\n"
-    if file.get('classes'):
-        content += "Classes:\n" + "\n".join([f"- {cls}" for cls in file['classes']]) + "\n"
-    if file.get('constants'):
-        content += "Constants:\n" + "\n".join([f"- {const}" for const in file['constants']]) + "\n"
+    content += fit_sections(pack.sections(file), token_budget)
     if not any([file.get('imports'), file.get('functions'), file.get('classes'), file.get('constants')]):
-        content += "Note: This is an empty or utility Python file.\n"
+        content += f"Note: This is an empty or utility {pack.noun}.\n"
+    if file.get('excerpts'):
+        content += "Excerpts:\n" + "\n".join([f"- {excerpt}" for excerpt in file['excerpts']]) + "\n"
+    return content
 
-    prompt = f"""Analyze this Python file and provide:
-1. A concise description of its purpose and functionality based on its name, location, and available code elements
-2. A key developer consideration for maintaining or modifying this file
+def prompt_fingerprint(file: Dict[str, Any]) -> str:
+    """
+    Hash of exactly the features the prompt is built from (name, imports,
+    functions, classes, constants and any source excerpts). Edits that leave
+    them unchanged, such as reformatting, comments or function bodies, keep
+    the fingerprint and therefore the cached description.
+    """
+    features = f"{file.get('language', '')}\n{build_file_details(file)}"
+    return hashlib.sha256(features.encode('utf-8')).hexdigest()
 
-Format your response exactly as:
-Description: [your description]
-Developer Consideration: "[your consideration]"
+def directory_fingerprint(children: List[Dict[str, Any]]) -> str:
+    """
+    Merkle hash of a directory: covers each child's name and type, the
+    description of each file and the directory_fingerprint() of each
+    subdirectory (set as its `fingerprint`). A changed description changes
+    the hash of every directory above it and of nothing else.
+    """
+    digest = hashlib.sha256()
+    for child in sorted(children, key=lambda child: (child['type'], child['name'])):
+        content = child.get('fingerprint', '') if child['type'] == 'directory' else child.get('description', '')
+        digest.update(f"{child['type']}\0{child['name']}\0{content}\n".encode('utf-8'))
+    return digest.hexdigest()
 
-File details:
-{content}"""
+def build_directory_details(name: str, children: List[Dict[str, Any]]) -> str:
+    """
+    Describe a directory for the LLM prompt by its children's descriptions
+    (subdirectory summaries and file descriptions).
+    """
+    def listing(items: List[Dict[str, Any]], suffix: str) -> List[str]:
+        lines = []
+        for child in items[:DIRECTORY_CHILD_LIMIT]:
+            description = child.get('description', '')
+            if len(description) > DIRECTORY_DESCRIPTION_LIMIT:
+                description = description[:DIRECTORY_DESCRIPTION_LIMIT] + "..."
+            lines.append(f"- {child['name']}{suffix}: {description}" if description else f"- {child['name']}{suffix}")
+        if len(items) > DIRECTORY_CHILD_LIMIT:
+            lines.append(f"- ... and {len(items) - DIRECTORY_CHILD_LIMIT} more")
+        return lines
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://github.com/repo-map",
-        "X-Title": "repo-map"
-    }
+    ordered = sorted(children, key=lambda child: child['name'])
+    subdirectories = [child for child in ordered if child['type'] == 'directory']
+    files = [child for child in ordered if child['type'] != 'directory']
+    content = f"Directory: {name}\n"
+    if subdirectories:
+        content += "Subdirectories:\n" + "\n".join(listing(subdirectories, '/')) + "\n"
+    if files:
+        content += "Files:\n" + "\n".join(listing(files, '')) + "\n"
+    return content
+
+def _request_headers(provider: LLMProvider) -> Dict[str, str]:
+    headers = provider.request_headers()
 
     # Debug log for headers (excluding full API key)
     safe_headers = headers.copy()
-    safe_headers["Authorization"] = f"Bearer {api_key[:10]}..."
-    logger.warning(f"Request headers: {json.dumps(safe_headers, indent=2)}")
+    if "Authorization" in safe_headers:
+        safe_headers["Authorization"] = safe_headers["Authorization"][:17] + "..."
+    logger.debug(f"Request headers: {json.dumps(safe_headers, indent=2)}")
+    return headers
+
+def response_end(content: str) -> Optional[int]:
+    """
+    Length of the complete answer at the start of a partial response, or None
+    while it is still being generated: the first top-level JSON object, or
+    array of objects (a bare batch answer), once it is closed, or an
+    older-format answer once its quoted "Developer Consideration" has ended.
+    Anything generated after that is discarded by the parsers, so a stream
+    can be closed there.
+    """
+    # An array only counts once it visibly holds objects, so a bracket in
+    # prose before the answer is not mistaken for it
+    opening = re.search(r'\{|\[\s*[{\]]', content)
+    if opening:
+        start = opening.start()
+        depth = 0
+        in_string = escaped = False
+        for position in range(start, len(content)):
+            char = content[position]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in '{[':
+                depth += 1
+            elif char in '}]':
+                depth -= 1
+                if depth == 0:
+                    return position + 1
+        return None
+    match = re.search(r'Description:.*?Developer Consideration:\s*"[^"]*"', content, re.DOTALL)
+    return match.end() if match else None
+
+async def _read_stream(response: aiohttp.ClientResponse) -> Tuple[str, bool]:
+    """
+    Collect the content of a server-sent-events completion. Returns the text
+    and whether the stream was closed early because the answer was complete.
+    """
+    parts = []
+    async for raw_line in response.content:
+        line = raw_line.decode('utf-8').strip()
+        if not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            break
+        choices = json.loads(data).get('choices') or []
+        delta = (choices[0].get('delta') or {}).get('content') if choices else None
+        if not delta:
+            continue
+        parts.append(delta)
+        content = ''.join(parts)
+        end = response_end(content)
+        if end is not None:
+            # Stop the generation; the parsers would ignore the rest
+            response.close()
+            return content[:end], True
+    return ''.join(parts), False
+
+async def request_completion(messages: List[Dict[str, str]], model: str, label: str,
+                             expected_tokens: int = EXPECTED_RESPONSE_TOKENS, max_retries: int = 3,
+                             session: Optional[aiohttp.ClientSession] = None,
+                             rate_limiter: Optional[RateLimiter] = None,
+                             response_format: Optional[Dict[str, Any]] = None,
+                             provider: Optional[LLMProvider] = None,
+                             cassette: Optional[Cassette] = None,
+                             response_cache: Optional[ResponseCache] = None,
+                             budget: Optional[LLMBudget] = None,
+                             breaker: Optional[CircuitBreaker] = None,
+                             hedger: Optional[RequestHedger] = None,
+                             max_tokens: Optional[int] = None,
+                             balancer: Optional[LoadBalancer] = None) -> Optional[str]:
+    """
+    Send one chat completion request to `provider` (OpenRouter by default) and
+    return the response text, or None once `max_retries` attempts have failed.
+    `label` names the file(s) in logs. A replaying `cassette` answers from its
+    recordings without touching the network; a recording one stores every
+    successful response. Output is capped at `max_tokens`
+    (MAX_RESPONSE_TOKENS per expected answer by default). A streaming provider's response is read
+    as server-sent events and closed as soon as it holds a complete answer
+    (see response_end()).
+
+    Pass the run's shared `session` to reuse pooled connections; otherwise a
+    short-lived session is created for this call. With a shared `rate_limiter`,
+    every attempt waits for request/token budget and 429 responses pause all
+    callers for the provider's Retry-After. With a shared `response_cache`,
+    identical prompts are sent once per run. Every attempt is charged to
+    `budget`; once it is exhausted no request is sent and None is returned.
+
+    Failed attempts are reported to the run's `breaker`; while it is open no
+    request is sent and None is returned at once. With a `hedger`, an attempt
+    still unanswered after its latency quantile is duplicated and the first
+    successful answer wins.
+
+    With a `balancer`, each attempt goes to one of its endpoints (see
+    LoadBalancer), and that endpoint's own rate limiter and breaker are used
+    instead of `provider`, `rate_limiter` and `breaker`. A failed attempt is
+    retried on another endpoint right away when one is healthy, and hedges
+    go to a different endpoint when one has a free slot.
+    """
+    if response_cache is not None:
+        return await response_cache.get_or_fetch(
+            prompt_key(model, messages, response_format),
+            lambda: request_completion(messages, model, label, expected_tokens, max_retries, session,
+                                       rate_limiter, response_format, provider, cassette, budget=budget,
+                                       breaker=breaker, hedger=hedger, max_tokens=max_tokens,
+                                       balancer=balancer)
+        )
+
+    key = request_key(model, messages, response_format) if cassette is not None else None
+    if cassette is not None and cassette.replaying:
+        return cassette.replay(key)
+
+    provider = provider or get_provider()
+    if balancer is None and not provider.is_configured():
+        logger.warning(f"No {provider.api_key_env} found, skipping LLM enhancement for {label}")
+        return None
+
+    def build_payload(target: LLMProvider, target_model: str) -> Dict[str, Any]:
+        payload = {
+            "model": target_model,
+            "messages": messages,
+            "temperature": 0.2,
+            "top_p": 1,
+            "frequency_penalty": 0,
+            "presence_penalty": 0
+        }
+        payload.update(target.extra_params)
+        payload["max_tokens"] = max_tokens or MAX_RESPONSE_TOKENS * max(1, expected_tokens // EXPECTED_RESPONSE_TOKENS)
+        if target.stream:
+            payload["stream"] = True
+        if response_format is not None:
+            payload["response_format"] = response_format
+        return payload
+
+    prompt_tokens = sum(count_tokens(message['content']) for message in messages)
+    estimated_tokens = prompt_tokens + expected_tokens
+
+    owns_session = session is None
+    if owns_session:
+        session = create_llm_session(limit=1)
+
+    async def send(endpoint: Optional[Endpoint]) -> Tuple[int, Any, Any, float]:
+        """
+        POST the request once, to `endpoint` or to `provider`, and return
+        (status, parsed body or error text, response headers, latency).
+        """
+        target = endpoint.provider if endpoint is not None else provider
+        target_model = (endpoint.model if endpoint is not None else None) or model
+        remaining = budget.remaining_time() if budget is not None else None
+        # Never wait on a response past the deadline
+        timeout = aiohttp.ClientTimeout(total=min(target.timeout, remaining)
+                                        if remaining is not None else target.timeout)
+        started = time.monotonic()
+        async with session.post(target.chat_url, headers=_request_headers(target),
+                                json=build_payload(target, target_model), timeout=timeout) as response:
+            if response.status != 200:
+                body = await response.text()
+            elif 'text/event-stream' in response.headers.get('Content-Type', ''):
+                content, closed_early = await _read_stream(response)
+                if closed_early:
+                    logger.debug(f"Closed the response stream for {label} once the answer was complete")
+                # Streams carry no usage; charge what was actually generated
+                body = {
+                    'choices': [{'message': {'content': content}}],
+                    'usage': {'total_tokens': prompt_tokens + count_tokens(content)}
+                }
+            else:
+                body = await response.json()
+            return response.status, body, response.headers, time.monotonic() - started
+
+    async def send_hedge(endpoint: Optional[Endpoint]) -> Tuple[int, Any, Any, float]:
+        limiter = endpoint.rate_limiter if endpoint is not None else rate_limiter
+        if limiter is not None:
+            await limiter.acquire(estimated_tokens)
+        return await send(endpoint)
 
-    timeout = aiohttp.ClientTimeout(total=30)
-    async with aiohttp.ClientSession() as session:
+    async def send_hedged(endpoint: Optional[Endpoint]) -> Tuple[int, Any, Any, float, Optional[Endpoint]]:
+        """
+        send() with hedging; also returns the endpoint that answered.
+        """
+        delay = hedger.delay() if hedger is not None else None
+        primary = asyncio.ensure_future(send(endpoint))
+        if delay is None:
+            return (*await primary, endpoint)
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or (budget is not None and not budget.try_spend(estimated_tokens)):
+            return (*await primary, endpoint)
+        # The request is in the slow tail; race a duplicate against it,
+        # on another endpoint when one has a free slot
+        hedge_endpoint = balancer.try_acquire(exclude=[endpoint]) if balancer is not None else None
+        hedger.hedged += 1
+        hedge = asyncio.ensure_future(send_hedge(hedge_endpoint or endpoint))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result()[0] == 200:
+                        if task is hedge:
+                            hedger.hedge_wins += 1
+                            return (*task.result(), hedge_endpoint or endpoint)
+                        return (*task.result(), endpoint)
+            return (*await primary, endpoint)
+        finally:
+            for task in pending:
+                task.cancel()
+            if hedge_endpoint is not None:
+                balancer.release(hedge_endpoint)
+
+    try:
         for attempt in range(max_retries):
+            if budget is not None and not budget.try_spend(estimated_tokens):
+                return None
+            endpoint = None
+            if balancer is not None:
+                endpoint = await balancer.acquire()
+                if endpoint is None:
+                    # Every endpoint's breaker is open
+                    if budget is not None:
+                        budget.refund(estimated_tokens)
+                    return None
+            elif breaker is not None and not breaker.allow():
+                if budget is not None:
+                    budget.refund(estimated_tokens)
+                return None
+            limiter = endpoint.rate_limiter if endpoint is not None else rate_limiter
+            retry_elsewhere = released = False
             try:
-                async with session.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers=headers,
-                    json={
-                        "model": model,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.2,
-                        "top_p": 1,
-                        "frequency_penalty": 0,
-                        "presence_penalty": 0,
-                        "repetition_penalty": 1,
-                        "top_k": 0
-                    },
-                    timeout=timeout
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result['choices'][0]['message']['content']
-                        parse_llm_response(content, file)
-                        return
+                if limiter is not None:
+                    await limiter.acquire(estimated_tokens)
+                status, body, response_headers, latency, answered_by = await send_hedged(endpoint)
+                if status == 200:
+                    content = body['choices'][0]['message']['content']
+                    if answered_by is not None:
+                        answered_by.record_success(latency, response_headers)
+                    else:
+                        if rate_limiter is not None:
+                            rate_limiter.record_success(latency, response_headers)
+                        if breaker is not None:
+                            breaker.record_success()
+                    if hedger is not None:
+                        hedger.record(latency)
+                    usage = body.get('usage') or {}
+                    if budget is not None and usage.get('total_tokens'):
+                        budget.record_usage(estimated_tokens, usage['total_tokens'])
+                    if cassette is not None:
+                        cassette.record(key, content)
+                    return content
+                where = f" from {endpoint.name}" if endpoint is not None else ""
+                logger.warning(f"API request failed with status {status}{where}: {body}")
+                if endpoint is not None:
+                    # Throttling pauses only this endpoint; the retry may go elsewhere
+                    endpoint.record_failure(status, response_headers, attempt)
+                    retry_elsewhere = balancer.has_alternative(endpoint)
+                    # Released after the failure is recorded, so no waiting
+                    # request picks this endpoint on its stale health
+                    balancer.release(endpoint)
+                    released = True
+                elif breaker is not None:
+                    if status == 429:
+                        breaker.record_throttle()
                     else:
-                        error_text = await response.text()
-                        logger.warning(f"API request failed with status {response.status}: {error_text}")
-                        if attempt == max_retries - 1:
-                            logger.warning(f"Max retries reached for {file['name']}, skipping LLM enhancement")
-                            return
-                        await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                        breaker.record_failure()
+                if attempt == max_retries - 1:
+                    logger.warning(f"Max retries reached for {label}, skipping LLM enhancement")
+                    return None
+                if endpoint is not None:
+                    if not retry_elsewhere and status != 429:
+                        await asyncio.sleep(backoff_delay(attempt))
+                elif status == 429 and rate_limiter is not None:
+                    # The limiter pauses every caller; the next acquire() waits it out.
+                    rate_limiter.record_throttle(response_headers, attempt)
+                else:
+                    await asyncio.sleep(backoff_delay(attempt))  # Exponential backoff with jitter
             except Exception as e:
-                logger.warning(f"Error during API request for {file['name']}: {str(e)}")
+                where = f" to {endpoint.name}" if endpoint is not None else ""
+                logger.warning(f"Error during API request{where} for {label}: {str(e)}")
+                if endpoint is not None and not released:
+                    endpoint.record_failure()
+                    retry_elsewhere = balancer.has_alternative(endpoint)
+                    balancer.release(endpoint)
+                    released = True
+                elif breaker is not None:
+                    breaker.record_failure()
                 if attempt == max_retries - 1:
-                    logger.warning(f"Max retries reached for {file['name']}, skipping LLM enhancement")
-                    return
-                await asyncio.sleep(2 ** attempt)
+                    logger.warning(f"Max retries reached for {label}, skipping LLM enhancement")
+                    return None
+                if not retry_elsewhere:
+                    await asyncio.sleep(backoff_delay(attempt))
+            finally:
+                if endpoint is not None and not released:
+                    balancer.release(endpoint)
+        return None
+    finally:
+        if owns_session:
+            await session.close()
+
+async def get_llm_descriptions(structure: List[Dict[str, Any]], file_index: int, file: Dict[str, Any], model: str,
+                               max_retries: int = 3, session: Optional[aiohttp.ClientSession] = None,
+                               rate_limiter: Optional[RateLimiter] = None,
+                               provider: Optional[LLMProvider] = None, cassette: Optional[Cassette] = None,
+                               response_cache: Optional[ResponseCache] = None,
+                               budget: Optional[LLMBudget] = None, breaker: Optional[CircuitBreaker] = None,
+                               hedger: Optional[RequestHedger] = None,
+                               balancer: Optional[LoadBalancer] = None) -> bool:
+    """
+    Get descriptions for a file using an LLM. See request_completion() for
+    `session`, `rate_limiter`, `provider`, `cassette`, `response_cache`,
+    `budget`, `breaker`, `hedger` and `balancer`.
+
+    Responses are requested as JSON and validated. An invalid response is sent
+    back with the validation error for a corrected answer, up to
+    MAX_REPAIR_ATTEMPTS times. Returns True only if the file received a valid
+    description, so callers never cache a failed parse.
+
+    The prompt names the file's language and adds its guidance, if any (see
+    PromptPack).
+    """
+    pack = file_prompt_pack(file)
+    guidance = f"{pack.guidance}\n" if pack.guidance else ""
+    prompt = f"""Analyze this {pack.noun} and provide:
+1. A concise description of its purpose and functionality based on its name, location, and available code elements
+2. A key developer consideration for maintaining or modifying this file
+{guidance}
+Respond with only a JSON object:
+{{"description": "...", "developer_consideration": "..."}}
+
+File details:
+{build_file_details(file)}"""
+
+    return await _request_description(prompt, file, file['name'], model, max_retries=max_retries, session=session,
+                                      rate_limiter=rate_limiter, provider=provider, cassette=cassette,
+                                      response_cache=response_cache, budget=budget, breaker=breaker,
+                                      hedger=hedger, balancer=balancer)
+
+async def get_llm_symbol_description(file: Dict[str, Any], symbol: Dict[str, Any], model: str,
+                                     max_retries: int = 3, session: Optional[aiohttp.ClientSession] = None,
+                                     rate_limiter: Optional[RateLimiter] = None,
+                                     provider: Optional[LLMProvider] = None, cassette: Optional[Cassette] = None,
+                                     response_cache: Optional[ResponseCache] = None,
+                                     budget: Optional[LLMBudget] = None, breaker: Optional[CircuitBreaker] = None,
+                                     hedger: Optional[RequestHedger] = None,
+                                     balancer: Optional[LoadBalancer] = None) -> bool:
+    """
+    Describe one top-level class or function (see get_python_symbols()) from
+    its source, setting `description` and `developer_consideration` on
+    `symbol`. Returns True only for a valid answer.
+    """
+    source = symbol['source']
+    if len(source) > SYMBOL_SOURCE_LIMIT:
+        source = source[:SYMBOL_SOURCE_LIMIT] + "\n# ... (truncated)\n"
+    prompt = f"""Analyze the top-level {symbol['kind']} `{symbol['name']}` from the Python file {file['name']} and provide:
+1. A concise description of what it does
+2. A key developer consideration for maintaining or modifying it
+
+Respond with only a JSON object:
+{{"description": "...", "developer_consideration": "..."}}
 
-def parse_llm_response(content: str, file: Dict[str, Any]) -> None:
+Source:
+```python
+{source}
+```"""
+
+    label = f"{file['name']}:{symbol['name']}"
+    return await _request_description(prompt, symbol, label, model, max_retries=max_retries, session=session,
+                                      rate_limiter=rate_limiter, provider=provider, cassette=cassette,
+                                      response_cache=response_cache, budget=budget, breaker=breaker,
+                                      hedger=hedger, balancer=balancer)
+
+async def get_llm_directory_summary(directory: Dict[str, Any], name: str, children: List[Dict[str, Any]],
+                                    model: str, max_retries: int = 3,
+                                    session: Optional[aiohttp.ClientSession] = None,
+                                    rate_limiter: Optional[RateLimiter] = None,
+                                    provider: Optional[LLMProvider] = None, cassette: Optional[Cassette] = None,
+                                    response_cache: Optional[ResponseCache] = None,
+                                    budget: Optional[LLMBudget] = None, breaker: Optional[CircuitBreaker] = None,
+                                    hedger: Optional[RequestHedger] = None,
+                                    balancer: Optional[LoadBalancer] = None) -> bool:
+    """
+    Summarize a directory from the descriptions of its `children`, setting
+    `description` and `developer_consideration` on `directory`. `name` is
+    the path shown to the LLM. Returns True only for a valid answer.
+    """
+    prompt = f"""Summarize this directory of a software repository from the descriptions of its contents and provide:
+1. A concise description of what the directory is for as a whole
+2. A key developer consideration for working in it
+
+Respond with only a JSON object:
+{{"description": "...", "developer_consideration": "..."}}
+
+{build_directory_details(name, children)}"""
+
+    return await _request_description(prompt, directory, f"{name}/", model, max_retries=max_retries,
+                                      session=session, rate_limiter=rate_limiter, provider=provider,
+                                      cassette=cassette, response_cache=response_cache, budget=budget,
+                                      breaker=breaker, hedger=hedger, balancer=balancer)
+
+async def _request_description(prompt: str, target: Dict[str, Any], label: str, model: str,
+                               **request_options: Any) -> bool:
+    """
+    Request a JSON description for `prompt` and store it on `target`. An
+    invalid response is sent back with the validation error for a corrected
+    answer, up to MAX_REPAIR_ATTEMPTS times.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    response_format = json_schema_format("file_description", DESCRIPTION_SCHEMA)
+    for repair in range(MAX_REPAIR_ATTEMPTS + 1):
+        content = await request_completion(messages, model, label, response_format=response_format,
+                                           **request_options)
+        if content is None:
+            return False
+        if parse_llm_response(content, target):
+            return True
+        _, error = parse_structured_response(content)
+        logger.warning(f"Invalid LLM response for {label} ({error}), requesting a corrected answer")
+        messages = messages[:1] + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": f"That response was invalid: {error}. "
+                                        "Reply with only the JSON object described above."}
+        ]
+    logger.warning(f"No valid LLM response for {label}, leaving it undescribed")
+    return False
+
+def compose_file_description(file: Dict[str, Any], symbols: List[Dict[str, Any]]) -> None:
+    """
+    Build a file's description and developer consideration from its symbol
+    descriptions, and attach the per-symbol results as `file['symbols']`.
+    """
+    described = [symbol for symbol in symbols if symbol.get('description')]
+    file['symbols'] = [{
+        'name': symbol['name'],
+        'kind': symbol['kind'],
+        'description': symbol.get('description', ''),
+        'developer_consideration': symbol.get('developer_consideration', '')
+    } for symbol in symbols]
+    file['symbol_hashes'] = [symbol['hash'] for symbol in symbols]
+    if described:
+        file['description'] = "; ".join(f"{symbol['name']}: {symbol['description']}" for symbol in described)
+        considerations = [
+            f"{symbol['name']}: {symbol['developer_consideration']}"
+            for symbol in described if symbol.get('developer_consideration')
+        ]
+        file['developer_consideration'] = "; ".join(considerations)
+
+def _extract_json(content: str, opening: str, closing: str) -> Any:
+    # Models often wrap JSON in prose or code fences; take the outermost value.
+    start = content.find(opening)
+    end = content.rfind(closing)
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(content[start:end + 1])
+    except ValueError:
+        return None
+
+def validate_description(data: Any) -> Optional[str]:
+    """
+    Check a decoded response against DESCRIPTION_SCHEMA. Returns an error
+    message, or None if the response is valid.
+    """
+    if not isinstance(data, dict):
+        return "expected a JSON object"
+    description = data.get('description')
+    if not isinstance(description, str) or not description.strip():
+        return '"description" must be a non-empty string'
+    consideration = data.get('developer_consideration', '')
+    if not isinstance(consideration, str):
+        return '"developer_consideration" must be a string'
+    return None
+
+def parse_structured_response(content: str) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """
+    Decode and validate a JSON description. Returns (fields, None) on success
+    and (None, error) otherwise.
+    """
+    data = _extract_json(content, '{', '}')
+    if data is None:
+        return None, "no JSON object found"
+    error = validate_description(data)
+    if error:
+        return None, error
+    return {
+        'description': data['description'].strip(),
+        'developer_consideration': (data.get('developer_consideration') or '').strip()
+    }, None
+
+def parse_llm_response(content: str, file: Dict[str, Any]) -> bool:
     """
     Parse LLM response and update file info with description and developer consideration.
+    JSON responses are validated; the older "Description: ..." text format is
+    still accepted. Returns True if a description was found.
     """
+    fields, _ = parse_structured_response(content)
+    if fields is not None:
+        file.update(fields)
+        return True
+
     file_desc_pattern = r"Description:\s*(.*?)(?=Developer Consideration:|$)"
     considerations_pattern = r"Developer Consideration:\s*\"(.*?)\""
 
+    found = False
     file_desc_match = re.search(file_desc_pattern, content, re.DOTALL)
-    if file_desc_match:
+    if file_desc_match and file_desc_match.group(1).strip():
         file['description'] = file_desc_match.group(1).strip()
+        found = True
 
     considerations_match = re.search(considerations_pattern, content)
     if considerations_match:
         file['developer_consideration'] = considerations_match.group(1).strip()
+    return found
+
+def plan_batches(files: List[Dict[str, Any]], max_files: int, token_budget: int) -> List[List[Dict[str, Any]]]:
+    """
+    Pack files, in order, into batches of at most `max_files` whose prompt
+    details fit in `token_budget` tokens. A file larger than the budget gets a
+    batch of its own.
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = 0
+    for file in files:
+        tokens = count_tokens(build_file_details(file))
+        if current and (len(current) >= max_files or used + tokens > token_budget):
+            batches.append(current)
+            current, used = [], 0
+        current.append(file)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def parse_batch_response(content: str, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Split a multi-file response back out per file and return the files whose
+    answer was missing or failed validation.
+
+    The response is a {"files": [...]} object (a bare array is accepted too)
+    of {"id", "description", "developer_consideration"} entries, where id is
+    the file's 1-based position in the prompt.
+    """
+    data = _extract_json(content, '{', '}')
+    entries = data.get('files') if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        entries = _extract_json(content, '[', ']')
+    answered = set()
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or validate_description(entry):
+            continue
+        try:
+            position = int(entry.get('id')) - 1
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= position < len(files) or position in answered:
+            continue
+        files[position]['description'] = entry['description'].strip()
+        files[position]['developer_consideration'] = (entry.get('developer_consideration') or '').strip()
+        answered.add(position)
+    return [file for position, file in enumerate(files) if position not in answered]
+
+async def get_llm_batch_descriptions(files: List[Dict[str, Any]], model: str, max_retries: int = 3,
+                                     session: Optional[aiohttp.ClientSession] = None,
+                                     rate_limiter: Optional[RateLimiter] = None,
+                                     provider: Optional[LLMProvider] = None,
+                                     cassette: Optional[Cassette] = None,
+                                     response_cache: Optional[ResponseCache] = None,
+                                     budget: Optional[LLMBudget] = None,
+                                     breaker: Optional[CircuitBreaker] = None,
+                                     hedger: Optional[RequestHedger] = None,
+                                     balancer: Optional[LoadBalancer] = None) -> List[Dict[str, Any]]:
+    """
+    Describe several files with one LLM request. Returns the files that did not
+    get a valid description so the caller can retry just those. The files
+    should share a language: the prompt is worded for the first one's.
+    """
+    pack = file_prompt_pack(files[0])
+    guidance = f"{pack.guidance}\n" if pack.guidance else ""
+    details = "\n".join(f"[{position}] {build_file_details(file)}" for position, file in enumerate(files, start=1))
+    prompt = f"""Analyze each of these {len(files)} {pack.noun}s and provide for each:
+1. A concise description of its purpose and functionality based on its name, location, and available code elements
+2. A key developer consideration for maintaining or modifying this file
+{guidance}
+Respond with only a JSON object containing one entry per file, using the file's number as "id":
+{{"files": [{{"id": 1, "description": "...", "developer_consideration": "..."}}]}}
+
+Files:
+{details}"""
 
-async def enhance_repo_with_llm(structure: List[Dict[str, Any]], cache_conn: sqlite3.Connection, model_name: str) -> None:
+    label = f"batch of {len(files)} files ({files[0]['name']}, ...)"
+    content = await request_completion([{"role": "user", "content": prompt}], model, label,
+                                       expected_tokens=EXPECTED_RESPONSE_TOKENS * len(files),
+                                       max_tokens=MAX_RESPONSE_TOKENS * len(files),
+                                       max_retries=max_retries, session=session, rate_limiter=rate_limiter,
+                                       provider=provider, cassette=cassette, response_cache=response_cache,
+                                       budget=budget, breaker=breaker, hedger=hedger, balancer=balancer,
+                                       response_format=json_schema_format("file_descriptions", BATCH_SCHEMA))
+    if content is None:
+        return list(files)
+    failed = parse_batch_response(content, files)
+    if failed:
+        logger.warning(f"Batch response omitted {len(failed)} of {len(files)} files; retrying them individually")
+    return failed
+
+async def enhance_repo_with_llm(structure: List[Dict[str, Any]], cache: Any, model_name: str,
+                                concurrency: int = 8, session: Optional[aiohttp.ClientSession] = None,
+                                rate_limiter: Optional[RateLimiter] = None, batch_size: int = 1,
+                                batch_token_budget: int = 2000, provider: Optional[LLMProvider] = None,
+                                cassette: Optional[Cassette] = None,
+                                response_cache: Optional[ResponseCache] = None,
+                                symbol_descriptions: bool = False,
+                                file_queue: Optional[asyncio.Queue] = None,
+                                budget: Optional[LLMBudget] = None,
+                                ranker: Optional[ImportanceRanker] = None,
+                                breaker: Optional[CircuitBreaker] = None,
+                                hedger: Optional[RequestHedger] = None,
+                                balancer: Optional[LoadBalancer] = None,
+                                excerpt_tokens: int = 0,
+                                languages: Optional[List[str]] = None) -> None:
     """
     Enhance repository structure with LLM-generated descriptions.
-    Uses caching to avoid redundant API calls.
-    """
-    api_key = os.getenv('OPENROUTER_API_KEY')
-    if not api_key:
-        logger.warning("No OpenRouter API key found in environment. Skipping LLM enhancement.")
-        return
-    
-    # Debug log for API key
-    logger.warning(f"Using API key starting with: {api_key[:10]}...")
-
-    cursor = cache_conn.cursor()
-    
-    for index, item in enumerate(structure):
-        if item['type'] == 'file' and item.get('language') == 'Python':  # Process all Python files
-            cursor.execute("SELECT hash, description, developer_consideration FROM cache WHERE path = ?", (item['path'],))
-            row = cursor.fetchone()
-            
-            if row and row[0] == item.get('hash', ''):
-                # Use cached data
-                item['description'] = row[1]
-                item['developer_consideration'] = row[2]
+    Uses caching to avoid redundant API calls. `cache` is a CacheBackend (or a
+    connection from load_cache()); descriptions are looked up by the prompt
+    input fingerprint (see prompt_fingerprint()), model and prompt version, so
+    edits that do not change the prompt reuse the cached description.
+
+    Cache misses are described concurrently, at most `concurrency` requests at
+    a time; the limit adapts to throttling and latency through `rate_limiter`
+    (an unlimited one is created if omitted). Each result is written into its
+    own entry of `structure`, so the output order does not depend on
+    completion order, and is cached as soon as it arrives. All requests share
+    `session` (one is created if omitted).
+
+    Misses are described most important first, as ranked by `ranker` (see
+    ImportanceRanker; import fan-in and size only if omitted). Every request
+    is charged to `budget`; once it is exhausted the remaining misses are
+    left without descriptions and the run ends normally.
+
+    Failures trip `breaker` (a fresh CircuitBreaker if omitted): during a
+    provider outage the remaining files fail fast and the map is produced
+    without their descriptions. A `hedger` duplicates slow requests (see
+    request_completion()). With a `balancer`, requests are spread over its
+    endpoints, each with its own rate limiter and breaker; `rate_limiter`
+    then only bounds the total number of requests in flight.
+
+    Cache lookups run in a worker thread and writes go through a
+    WriteBehindCacheBackend (`cache` is wrapped in one unless it already is,
+    and flushed on return), so the event loop never waits for the disk.
+
+    With `batch_size` above 1, up to that many files whose details fit in
+    `batch_token_budget` tokens share one request; files missing from a batch
+    answer are retried on their own. Batches are filled across the chunks
+    delivered by `file_queue`, so they can span directories.
+
+    Requests go to `provider`, OpenRouter unless another LLMProvider is given,
+    or are answered by a replaying `cassette`. Files with identical prompts
+    share one request through `response_cache` (a fresh one if omitted).
+
+    With `symbol_descriptions`, each top-level class and function is described
+    and cached on its own, keyed by the hash of its source segment, and the
+    file description is composed from them; editing one function only
+    re-describes that function. Files without such symbols are described as
+    a whole.
+
+    With `file_queue`, files are taken from the queue as lists of
+    (index in `structure`, file) pairs until None arrives, instead of from
+    `structure`, so a scan still in progress can feed the LLM workers (see
+    summarize_repo()).
+
+    Every file prompt lists the file's elements within FILE_PROMPT_TOKENS
+    (see build_file_details()). With `excerpt_tokens`, it also quotes the
+    most informative docstrings and signatures of the file up to that many
+    tokens (see get_python_excerpts()).
+
+    Files of every language with a prompt pack are described, or only those
+    of `languages`; each prompt is worded for its file's language and lists
+    the elements extracted for it (see prompt_packs). Symbol descriptions
+    and source excerpts apply to Python files only.
+    """
+    provider = provider or get_provider()
+    # Without a key, cached descriptions (e.g. from an imported snapshot)
+    # are still served; only the uncached remainder is skipped
+    offline = balancer is None and not provider.is_configured() and not (cassette is not None and cassette.replaying)
+    if offline:
+        logger.warning(f"No {provider.api_key_env} found in environment. "
+                       "Serving cached descriptions only.")
+
+    cache = as_cache_backend(cache)
+    # Keep disk and network cache I/O off the event loop
+    owns_writer = not isinstance(cache, WriteBehindCacheBackend)
+    if owns_writer:
+        cache = WriteBehindCacheBackend(cache)
+    loop = asyncio.get_event_loop()
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(concurrency=max(1, concurrency))
+    if response_cache is None:
+        response_cache = ResponseCache()
+    if ranker is None:
+        ranker = ImportanceRanker()
+    if breaker is None:
+        breaker = CircuitBreaker()
+    owns_session = session is None and not offline
+    if owns_session:
+        session = create_llm_session(limit=max(1, concurrency))
+
+    def store(entries: List[Tuple[str, Dict[str, Any]]], described: bool = True) -> None:
+        # Update cache as soon as these files are done; only valid answers
+        # become descriptions, so failed files are retried on the next run
+        if described:
+            cache.put_many(DESCRIPTIONS, {
+                key: {
+                    'description': item.get('description', ''),
+                    'developer_consideration': item.get('developer_consideration', '')
+                } for key, item in entries
+            })
+        cache.put_many(FILES, {item['path']: file_cache_record(item) for _, item in entries})
+
+    async def describe(index: int, item: Dict[str, Any], key: str) -> None:
+        async with rate_limiter.concurrency:
+            # Get new descriptions from LLM
+            described = await get_llm_descriptions(structure, index, item, model=model_name, session=session,
+                                                   rate_limiter=rate_limiter, provider=provider,
+                                                   cassette=cassette, response_cache=response_cache,
+                                                   budget=budget, breaker=breaker, hedger=hedger,
+                                                   balancer=balancer)
+        store([(key, item)], described=bool(described))
+
+    async def describe_batch(batch: List[Tuple[int, Dict[str, Any], str]]) -> None:
+        if len(batch) == 1:
+            await describe(*batch[0])
+            return
+        items = [item for _, item, _ in batch]
+        async with rate_limiter.concurrency:
+            failed = await get_llm_batch_descriptions(items, model=model_name, session=session,
+                                                      rate_limiter=rate_limiter, provider=provider,
+                                                      cassette=cassette, response_cache=response_cache,
+                                                      budget=budget, breaker=breaker, hedger=hedger,
+                                                      balancer=balancer)
+        failed_ids = {id(item) for item in failed}
+        store([(key, item) for _, item, key in batch if id(item) not in failed_ids])
+        await asyncio.gather(*(describe(*entry) for entry in batch if id(entry[1]) in failed_ids))
+
+    async def describe_symbol(item: Dict[str, Any], symbol: Dict[str, Any], key: str) -> None:
+        async with rate_limiter.concurrency:
+            described = await get_llm_symbol_description(item, symbol, model=model_name, session=session,
+                                                         rate_limiter=rate_limiter, provider=provider,
+                                                         cassette=cassette, response_cache=response_cache,
+                                                         budget=budget, breaker=breaker, hedger=hedger,
+                                                         balancer=balancer)
+        if described:
+            cache.put(DESCRIPTIONS, key, {
+                'description': symbol['description'],
+                'developer_consideration': symbol.get('developer_consideration', '')
+            })
+
+    async def describe_symbols(item: Dict[str, Any], symbols: List[Dict[str, Any]],
+                               pending: List[Tuple[Dict[str, Any], str]]) -> None:
+        await asyncio.gather(*(describe_symbol(item, symbol, key) for symbol, key in pending))
+        compose_file_description(item, symbols)
+        cache.put(FILES, item['path'], file_cache_record(item))
+
+    def lookup(entries: List[Tuple[int, Dict[str, Any]]]) -> Tuple[list, list]:
+        """
+        Serve cached descriptions for `entries` and return the description
+        misses and the (file, symbols, pending symbols) of partly cached files.
+        Runs in a worker thread: it reads source files and the cache.
+        """
+        ranker.observe([item for _, item in entries if item['type'] == 'file' and item.get('language')])
+        eligible = [(index, item) for index, item in entries if is_eligible(item, languages)]
+        for _, item in eligible:
+            if excerpt_tokens and item['language'] == 'Python':
+                item['excerpts'] = select_excerpts(get_python_excerpts(item['path']), excerpt_tokens)
+            item['fingerprint'] = prompt_fingerprint(item)
+        eligible_entries = list(eligible)
+        symbol_files = {}
+        if symbol_descriptions:
+            for index, item in eligible:
+                if item['language'] != 'Python':
+                    continue
+                symbols = get_python_symbols(item['path'])
+                if symbols:
+                    symbol_files[index] = symbols
+            eligible = [(index, item) for index, item in eligible if index not in symbol_files]
+        keys = {
+            index: description_key(item['fingerprint'], model_name, PROMPT_VERSION)
+            for index, item in eligible
+        }
+        cached_descriptions = cache.get_many(DESCRIPTIONS, keys.values())
+        # Descriptions written before fingerprints were introduced are keyed by the
+        # file hash; adopt them under the fingerprint instead of paying again.
+        legacy_keys = {
+            index: description_key(item.get('hash', ''), model_name, PROMPT_VERSION)
+            for index, item in eligible if keys[index] not in cached_descriptions
+        }
+        legacy_descriptions = cache.get_many(DESCRIPTIONS, legacy_keys.values()) if legacy_keys else {}
+        cached_files = cache.get_many(FILES, [item['path'] for _, item in eligible])
+
+        misses = []
+        refreshed_files = {}
+        adopted = {}
+        for index, item in eligible:
+            cached = cached_descriptions.get(keys[index])
+            if cached is None and index in legacy_keys:
+                cached = legacy_descriptions.get(legacy_keys[index])
+                if cached is not None and cached.get('description'):
+                    adopted[keys[index]] = cached
+            if cached is None or not cached.get('description'):
+                # Empty entries are failed parses cached by older versions
+                misses.append((index, item, keys[index]))
+                continue
+            # Use cached data produced by this model and prompt version
+            item['description'] = cached.get('description') or ''
+            item['developer_consideration'] = cached.get('developer_consideration') or ''
+            record = cached_files.get(item['path'])
+            if not (record and record.get('hash') == item.get('hash', '')
+                    and record.get('fingerprint') == item['fingerprint']
+                    and record.get('description') == item['description']):
+                refreshed_files[item['path']] = file_cache_record(item)
+
+        symbol_keys = {
+            symbol['hash']: description_key(symbol['hash'], model_name, SYMBOL_PROMPT_VERSION)
+            for symbols in symbol_files.values() for symbol in symbols
+        }
+        cached_symbols = cache.get_many(DESCRIPTIONS, set(symbol_keys.values())) if symbol_keys else {}
+        symbol_misses = []
+        items_by_index = dict(eligible_entries)
+        for index, symbols in symbol_files.items():
+            item = items_by_index[index]
+            pending = []
+            for symbol in symbols:
+                cached = cached_symbols.get(symbol_keys[symbol['hash']])
+                if cached and cached.get('description'):
+                    symbol['description'] = cached['description']
+                    symbol['developer_consideration'] = cached.get('developer_consideration') or ''
+                else:
+                    pending.append((symbol, symbol_keys[symbol['hash']]))
+            if pending:
+                symbol_misses.append((item, symbols, pending))
             else:
-                # Get new descriptions from LLM
-                await get_llm_descriptions(structure, index, item, model=model_name)
-                
-                # Update cache
-                cursor.execute("""
-                    INSERT OR REPLACE INTO cache (
-                        path, hash, description, developer_consideration, imports, functions
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    item['path'],
-                    item.get('hash', ''),
-                    item.get('description', ''),
-                    item.get('developer_consideration', ''),
-                    json.dumps(item.get('imports', [])),
-                    json.dumps(item.get('functions', []))
-                ))
-                cache_conn.commit()
+                compose_file_description(item, symbols)
+                refreshed_files[item['path']] = file_cache_record(item)
+
+        cache.put_many(DESCRIPTIONS, adopted)
+        cache.put_many(FILES, refreshed_files)
+        return misses, symbol_misses
+
+    # Batchable misses by language (a batch prompt is worded for one), held
+    # across scan chunks so batches can span directories
+    batch_pool: Dict[str, List[Tuple[int, Dict[str, Any], str]]] = {}
+
+    def submit_batches(final: bool = False) -> None:
+        """
+        Plan batches over the pooled misses and submit the closed ones. The
+        last batch of each language stays in the pool while it has room,
+        unless `final`.
+        """
+        for language, pooled in batch_pool.items():
+            by_id = {id(item): (index, item, key) for index, item, key in pooled}
+            batches = plan_batches([item for _, item, _ in pooled], batch_size, batch_token_budget)
+            held = batches.pop() if batches and not final and len(batches[-1]) < batch_size else []
+            for batch in batches:
+                work_queue.submit(functools.partial(describe_batch, [by_id[id(item)] for item in batch]), batch)
+            batch_pool[language] = [by_id[id(item)] for item in held]
+
+    async def schedule(entries: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """
+        Queue the work for the entries without a cached description.
+        """
+        misses, symbol_misses = await loop.run_in_executor(None, lookup, entries)
+        if offline:
+            return
+        if batch_size > 1:
+            for entry in misses:
+                batch_pool.setdefault(entry[1]['language'], []).append(entry)
+            submit_batches()
+        else:
+            for index, item, key in misses:
+                work_queue.submit(functools.partial(describe, index, item, key), [item])
+        for item, symbols, pending in symbol_misses:
+            work_queue.submit(functools.partial(describe_symbols, item, symbols, pending), [item])
+
+    work_queue = PriorityWorkQueue(ranker.score, lambda: int(rate_limiter.concurrency.limit), budget)
+    runner = asyncio.ensure_future(work_queue.run())
+    try:
+        if file_queue is None:
+            await schedule(list(enumerate(structure)))
+        else:
+            # Start describing each chunk as soon as the scan delivers it
+            while True:
+                entries = await file_queue.get()
+                if entries is None:
+                    break
+                await schedule(entries)
+        submit_batches(final=True)
+        work_queue.close()
+        await runner
+        if work_queue.skipped:
+            logger.warning(f"LLM budget exhausted: {work_queue.skipped} files were not described")
+        rejected = breaker.rejected + (balancer.rejected if balancer is not None else 0)
+        if rejected:
+            logger.warning(f"{rejected} LLM requests were skipped while the provider was failing")
+    finally:
+        if not runner.done():
+            runner.cancel()
+        if owns_session:
+            await session.close()
+        if owns_writer:
+            await loop.run_in_executor(None, cache.stop)
+
+async def summarize_directories(structure: List[Dict[str, Any]], cache: Any, model_name: str, root_dir: str,
+                                concurrency: int = 8, session: Optional[aiohttp.ClientSession] = None,
+                                rate_limiter: Optional[RateLimiter] = None, provider: Optional[LLMProvider] = None,
+                                cassette: Optional[Cassette] = None,
+                                response_cache: Optional[ResponseCache] = None,
+                                budget: Optional[LLMBudget] = None,
+                                breaker: Optional[CircuitBreaker] = None,
+                                hedger: Optional[RequestHedger] = None,
+                                balancer: Optional[LoadBalancer] = None) -> Dict[str, Any]:
+    """
+    Summarize every directory of `structure` bottom-up from its children's
+    descriptions, after enhance_repo_with_llm() has described the files.
+    Returns an entry for `root_dir` itself, which has none in `structure`;
+    its description is the repository overview.
+
+    Each summary is cached under the directory's Merkle hash (see
+    directory_fingerprint()), so a run only asks for summaries of the
+    directories on the path from a changed description up to the root;
+    everything else is served from the cache. Directories none of whose
+    children are described are left without a summary. The remaining
+    arguments are as for enhance_repo_with_llm().
+    """
+    root = {
+        'name': os.path.basename(os.path.normpath(root_dir)),
+        'path': root_dir,
+        'level': -1,
+        'type': 'directory',
+        'language': None
+    }
+    provider = provider or get_provider()
+    if balancer is None and not provider.is_configured() and not (cassette is not None and cassette.replaying):
+        logger.warning(f"No {provider.api_key_env} found in environment. Skipping directory summaries.")
+        return root
+
+    cache = as_cache_backend(cache)
+    owns_writer = not isinstance(cache, WriteBehindCacheBackend)
+    if owns_writer:
+        cache = WriteBehindCacheBackend(cache)
+    loop = asyncio.get_event_loop()
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(concurrency=max(1, concurrency))
+    if response_cache is None:
+        response_cache = ResponseCache()
+    owns_session = session is None
+    if owns_session:
+        session = create_llm_session(limit=max(1, concurrency))
+
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for item in structure:
+        children.setdefault(os.path.dirname(os.path.normpath(item['path'])), []).append(item)
+
+    async def summarize(directory: Dict[str, Any]) -> None:
+        path = os.path.normpath(directory['path'])
+        members = children.get(path, [])
+        # Children first: a directory's hash covers its subdirectories' hashes
+        await asyncio.gather(*(summarize(child) for child in members if child['type'] == 'directory'))
+        directory['fingerprint'] = directory_fingerprint(members)
+        if not any(child.get('description') for child in members):
+            return
+        key = description_key(directory['fingerprint'], model_name, DIRECTORY_PROMPT_VERSION)
+        cached = await loop.run_in_executor(None, cache.get, DESCRIPTIONS, key)
+        if cached and cached.get('description'):
+            directory['description'] = cached['description']
+            directory['developer_consideration'] = cached.get('developer_consideration') or ''
+        else:
+            name = os.path.relpath(path, os.path.normpath(root_dir))
+            async with rate_limiter.concurrency:
+                described = await get_llm_directory_summary(
+                    directory, root['name'] if name == '.' else name, members, model=model_name,
+                    session=session, rate_limiter=rate_limiter, provider=provider, cassette=cassette,
+                    response_cache=response_cache, budget=budget, breaker=breaker, hedger=hedger,
+                    balancer=balancer)
+            if not described:
+                return
+            cache.put(DESCRIPTIONS, key, {
+                'description': directory['description'],
+                'developer_consideration': directory.get('developer_consideration', '')
+            })
+        # The FILES record keeps the summary reachable for cache garbage collection
+        cache.put(FILES, directory['path'], file_cache_record(directory))
+
+    try:
+        await summarize(root)
+    finally:
+        if owns_session:
+            await session.close()
+        if owns_writer:
+            await loop.run_in_executor(None, cache.stop)
+    return root
@@ -0,0 +1,163 @@
+import os
+import copy
+import logging
+from typing import Dict, Any, Optional
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class LLMProvider:
+    """
+    An OpenAI-compatible chat completions endpoint.
+
+    `base_url` is the API root (the part before /chat/completions). The API key
+    is read from `api_key_env` at request time; providers that do not need a key
+    (local servers) leave it as None, and an optional key is sent when the
+    variable happens to be set. `concurrency` and `timeout` are defaults for
+    runs that do not override them: hosted APIs handle many parallel requests
+    quickly, a local server handles a few slowly. `extra_params` are added to
+    every request body for sampling options only some servers accept. With
+    `stream`, completions are requested as server-sent events so a response
+    can be cut off as soon as the answer is complete.
+    """
+
+    def __init__(self, name: str, base_url: str, api_key_env: Optional[str] = None, requires_api_key: bool = False,
+                 headers: Optional[Dict[str, str]] = None, concurrency: int = 8, timeout: float = 30.0,
+                 default_model: Optional[str] = None, extra_params: Optional[Dict[str, Any]] = None,
+                 stream: bool = True):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.api_key_env = api_key_env
+        self.requires_api_key = requires_api_key
+        self.headers = dict(headers or {})
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.default_model = default_model
+        self.extra_params = dict(extra_params or {})
+        self.stream = stream
+
+    @property
+    def chat_url(self) -> str:
+        return f"{self.base_url}/chat/completions"
+
+    def api_key(self) -> Optional[str]:
+        return os.getenv(self.api_key_env) if self.api_key_env else None
+
+    def is_configured(self) -> bool:
+        """
+        True unless the provider needs an API key that is not set.
+        """
+        return bool(self.api_key()) or not self.requires_api_key
+
+    def request_headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        headers.update(self.headers)
+        api_key = self.api_key()
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        return headers
+
+PROVIDERS: Dict[str, LLMProvider] = {
+    'openrouter': LLMProvider(
+        'openrouter', 'https://openrouter.ai/api/v1',
+        api_key_env='OPENROUTER_API_KEY', requires_api_key=True,
+        headers={"HTTP-Referer": "https://github.com/repo-map", "X-Title": "repo-map"},
+        concurrency=8, timeout=30.0, default_model='anthropic/claude-3.5-sonnet',
+        extra_params={"repetition_penalty": 1, "top_k": 0}
+    ),
+    'openai': LLMProvider(
+        'openai', 'https://api.openai.com/v1',
+        api_key_env='OPENAI_API_KEY', requires_api_key=True,
+        concurrency=8, timeout=30.0, default_model='gpt-4o-mini'
+    ),
+    # Any other OpenAI-compatible server; set the URL with --llm-base-url.
+    'openai-compatible': LLMProvider(
+        'openai-compatible', 'http://localhost:8000/v1',
+        api_key_env='OPENAI_API_KEY', concurrency=4, timeout=120.0
+    ),
+    'ollama': LLMProvider(
+        'ollama', 'http://localhost:11434/v1',
+        concurrency=2, timeout=300.0
+    ),
+    'llama.cpp': LLMProvider(
+        'llama.cpp', 'http://localhost:8080/v1',
+        api_key_env='LLAMA_API_KEY', concurrency=2, timeout=300.0
+    ),
+    'vllm': LLMProvider(
+        'vllm', 'http://localhost:8000/v1',
+        api_key_env='VLLM_API_KEY', concurrency=16, timeout=120.0
+    ),
+}
+
+DEFAULT_PROVIDER = 'openrouter'
+
+def get_provider(name: str = DEFAULT_PROVIDER, base_url: Optional[str] = None, api_key_env: Optional[str] = None,
+                 headers: Optional[Dict[str, str]] = None, concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None, stream: Optional[bool] = None) -> LLMProvider:
+    """
+    Return a copy of a registered provider with any given settings overridden.
+    Raises ValueError for unknown provider names.
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}' (choose from {', '.join(sorted(PROVIDERS))})")
+    provider = copy.deepcopy(PROVIDERS[name])
+    if base_url:
+        provider.base_url = base_url.rstrip('/')
+    if api_key_env:
+        provider.api_key_env = api_key_env
+    if headers:
+        provider.headers.update(headers)
+    if concurrency:
+        provider.concurrency = concurrency
+    if timeout:
+        provider.timeout = timeout
+    if stream is not None:
+        provider.stream = stream
+    return provider
+
+def parse_header_option(value: str) -> Dict[str, str]:
+    """
+    Parse a 'Name: value' command line header.
+    """
+    name, separator, header_value = value.partition(':')
+    if not separator or not name.strip():
+        raise ValueError(f"Expected 'Name: value', got '{value}'")
+    return {name.strip(): header_value.strip()}
+
+ENDPOINT_FORMAT = '[URL][,key_env=NAME][,model=NAME][,concurrency=N][,timeout=S]'
+
+def parse_endpoint_option(value: str, model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse an ENDPOINT_FORMAT command line endpoint into get_provider()
+    overrides plus an optional 'model'. Leaving out the URL adds another API
+    key for the provider's own URL.
+
+    With `model` (the run's model), an endpoint naming another model is
+    rejected: descriptions are cached under the run's model name, so every
+    endpoint must serve that model.
+    """
+    fields = {'key_env': 'api_key_env', 'model': 'model', 'concurrency': 'concurrency', 'timeout': 'timeout'}
+    spec: Dict[str, Any] = {}
+    for position, part in enumerate(part.strip() for part in value.split(',')):
+        name, separator, field_value = part.partition('=')
+        if not separator:
+            if position != 0 or not part:
+                raise ValueError(f"Expected '{ENDPOINT_FORMAT}', got '{value}'")
+            spec['base_url'] = part
+        elif name.strip() not in fields or not field_value.strip():
+            raise ValueError(f"Unknown or empty endpoint setting '{part}' (use {', '.join(fields)})")
+        else:
+            spec[fields[name.strip()]] = field_value.strip()
+    try:
+        if 'concurrency' in spec:
+            spec['concurrency'] = int(spec['concurrency'])
+        if 'timeout' in spec:
+            spec['timeout'] = float(spec['timeout'])
+    except ValueError:
+        raise ValueError(f"Expected a number in endpoint '{value}'")
+    if not spec:
+        raise ValueError("Empty endpoint")
+    if model is not None and spec.get('model', model) != model:
+        raise ValueError(f"Endpoint '{value}' serves model {spec['model']!r}, but this run uses {model!r}; "
+                         "descriptions are cached per model, so every endpoint must serve the same one")
+    return spec
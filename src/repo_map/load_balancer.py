@@ -0,0 +1,161 @@
+"""
+Load balancing of LLM requests across several API keys and endpoints.
+
+Each Endpoint pairs an LLMProvider (base URL and API key) with its own
+RateLimiter and CircuitBreaker, so one key's quota or one node's outage only
+affects the requests sent to it. LoadBalancer hands every request attempt to
+the healthy endpoint with the most free capacity per second of observed
+latency; an endpoint that starts failing or throttling loses its traffic to
+the others until it recovers.
+"""
+
+import time
+import asyncio
+import logging
+from typing import List, Optional, Mapping, Iterable
+
+from src.repo_map.llm_providers import LLMProvider
+from src.repo_map.rate_limiting import RateLimiter
+from src.repo_map.resilience import CircuitBreaker
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Latency assumed for endpoints that have not answered yet, when no endpoint has.
+DEFAULT_LATENCY = 1.0
+
+class Endpoint:
+    """
+    One API key at one base URL. `model` overrides the run's model name for
+    requests sent here; it must name the same model (descriptions are cached
+    under the run's model name, see parse_endpoint_option()). Requests and tokens per minute, adaptive concurrency and
+    throttling pauses are tracked by `rate_limiter`, failures by `breaker`.
+    """
+
+    def __init__(self, provider: LLMProvider, model: Optional[str] = None,
+                 rate_limiter: Optional[RateLimiter] = None, breaker: Optional[CircuitBreaker] = None):
+        self.provider = provider
+        self.model = model
+        self.rate_limiter = rate_limiter or RateLimiter(concurrency=max(1, provider.concurrency))
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        # Names the key's variable, never the key
+        if self.provider.api_key_env and self.provider.api_key():
+            return f"{self.provider.base_url} ({self.provider.api_key_env})"
+        return self.provider.base_url
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self.rate_limiter.concurrency.limit))
+
+    def score(self, default_latency: float, now: Optional[float] = None) -> float:
+        """
+        Free request slots per second of smoothed latency, lowered by
+        consecutive failures and by a throttling pause.
+        """
+        latency = self.latency if self.latency is not None else default_latency
+        score = (self.limit - self.in_flight) / max(latency, 0.001)
+        score /= 1 + self.breaker.failures
+        return score / (1 + self.rate_limiter.paused_for(now))
+
+    def record_success(self, latency: float, headers: Optional[Mapping[str, str]] = None) -> None:
+        self.rate_limiter.record_success(latency, headers)
+        self.breaker.record_success()
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+    def record_failure(self, status: Optional[int] = None, headers: Optional[Mapping[str, str]] = None,
+                       attempt: int = 0) -> None:
+        """
+        Register a failed attempt: a 429 pauses this endpoint (see
+        RateLimiter.record_throttle()) and fails a breaker probe, anything
+        else counts towards its breaker.
+        """
+        self.failures += 1
+        if status == 429:
+            self.rate_limiter.record_throttle(headers, attempt)
+            self.breaker.record_throttle()
+        else:
+            self.breaker.record_failure()
+
+class LoadBalancer:
+    """
+    Spreads request attempts across `endpoints`.
+
+    acquire() reserves a slot on the best endpoint (see Endpoint.score()),
+    waiting while every healthy endpoint is at its concurrency limit, and
+    returns None once every endpoint's breaker is open so callers fail fast.
+    Each reserved slot must be given back with release().
+    """
+
+    def __init__(self, endpoints: Iterable[Endpoint]):
+        self.endpoints: List[Endpoint] = list(endpoints)
+        if not self.endpoints:
+            raise ValueError("A LoadBalancer needs at least one endpoint")
+        self.rejected = 0
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def concurrency(self) -> int:
+        """
+        Most requests the endpoints accept at once.
+        """
+        return sum(max(1, endpoint.provider.concurrency) for endpoint in self.endpoints)
+
+    def _default_latency(self) -> float:
+        known = [endpoint.latency for endpoint in self.endpoints if endpoint.latency is not None]
+        return sum(known) / len(known) if known else DEFAULT_LATENCY
+
+    def _healthy(self, now: float) -> List[Endpoint]:
+        return [endpoint for endpoint in self.endpoints if endpoint.breaker.available(now)]
+
+    def try_acquire(self, exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """
+        Reserve a slot on the best healthy endpoint with one free, other than
+        those in `exclude`, or return None without waiting.
+        """
+        now = time.monotonic()
+        excluded = {id(endpoint) for endpoint in exclude}
+        default_latency = self._default_latency()
+        free = [
+            endpoint for endpoint in self._healthy(now)
+            if id(endpoint) not in excluded and endpoint.in_flight < endpoint.limit
+        ]
+        if not free:
+            return None
+        endpoint = max(free, key=lambda endpoint: endpoint.score(default_latency, now))
+        # Starts the probe of an endpoint whose breaker is ready to half-open
+        endpoint.breaker.allow(now)
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        return endpoint
+
+    async def acquire(self) -> Optional[Endpoint]:
+        if self._wakeup is None:
+            # Created lazily so it binds to the running event loop
+            self._wakeup = asyncio.Event()
+        while True:
+            if not self._healthy(time.monotonic()):
+                self.rejected += 1
+                return None
+            endpoint = self.try_acquire()
+            if endpoint is not None:
+                return endpoint
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def release(self, endpoint: Endpoint) -> None:
+        endpoint.in_flight -= 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def has_alternative(self, endpoint: Endpoint) -> bool:
+        """
+        Whether a healthy endpoint other than `endpoint` can take a retry.
+        """
+        return any(other is not endpoint for other in self._healthy(time.monotonic()))
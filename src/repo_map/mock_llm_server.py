@@ -0,0 +1,271 @@
+"""
+Mock OpenAI-compatible chat completions server for offline tests and
+benchmarks of the LLM pipeline.
+
+Answers are derived from the prompt, so no model or network is needed.
+Latency, server errors and 429 throttling can be injected with a seeded
+random generator, which makes concurrency, rate-limiter and batching changes
+comparable between runs:
+
+    python -m src.repo_map.mock_llm_server --port 8799 --latency 0.3 --throttle-rate 0.05
+    python -m src.repo_map.repo_map <repository_path> -y --provider openai-compatible \
+        --llm-base-url http://127.0.0.1:8799/v1 --model mock
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import logging
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_FILE_LINE = re.compile(r'^(?:\[(\d+)\] )?File: (.+)$', re.MULTILINE)
+_DIRECTORY_LINE = re.compile(r'^Directory: (.+)$', re.MULTILINE)
+
+class MockLLMBehavior:
+    """
+    Failure and latency model of the mock server.
+
+    Each request sleeps `latency` seconds plus up to `latency_jitter` more,
+    and a fraction `tail_rate` of requests another `tail_latency` seconds.
+    `trailing_text` is appended to every answer, like a chatty model adding
+    prose after the JSON. Streamed answers are sent in chunks of
+    `stream_chunk_size` characters, `stream_chunk_delay` seconds apart.
+    With `bare_batch_arrays`, batched prompts are answered with a bare JSON
+    array instead of a {"files": [...]} object.
+    A fraction `throttle_rate` of requests is answered with 429 and a
+    Retry-After of `retry_after` seconds, and a fraction `error_rate` with 500.
+    `stats` counts responses by status code, and `last_request` holds the
+    most recent request body.
+    """
+
+    def __init__(self, latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0, seed: Optional[int] = None,
+                 tail_rate: float = 0.0, tail_latency: float = 0.0, trailing_text: str = '',
+                 stream_chunk_size: int = 16, stream_chunk_delay: float = 0.0,
+                 bare_batch_arrays: bool = False):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.trailing_text = trailing_text
+        self.stream_chunk_size = max(1, stream_chunk_size)
+        self.stream_chunk_delay = stream_chunk_delay
+        self.bare_batch_arrays = bare_batch_arrays
+        self.stats: Counter = Counter()
+        self.last_request: Optional[dict] = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, float]:
+        """
+        Return (delay, outcome roll) for the next request.
+        """
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            if self.tail_rate and self._random.random() < self.tail_rate:
+                delay += self.tail_latency
+            return delay, self._random.random()
+
+def mock_completion(messages: List[Dict[str, Any]], bare_batch_arrays: bool = False) -> str:
+    """
+    Build a valid answer to a repo-map prompt: a {"files": [...]} object (or
+    with `bare_batch_arrays`, just the array) for batched prompts and a single
+    description object otherwise.
+    """
+    prompt = messages[0].get('content', '') if messages else ''
+    directory = _DIRECTORY_LINE.search(prompt)
+    if directory:
+        return json.dumps({
+            'description': f"Mock summary of {directory.group(1).strip()}/",
+            'developer_consideration': "Generated by the mock LLM server"
+        })
+    files = _FILE_LINE.findall(prompt)
+    if any(position for position, _ in files):
+        entries = [
+            {
+                'id': int(position),
+                'description': f"Mock description of {name.strip()}",
+                'developer_consideration': "Generated by the mock LLM server"
+            } for position, name in files if position
+        ]
+        return json.dumps(entries if bare_batch_arrays else {'files': entries})
+    name = files[0][1].strip() if files else 'the file'
+    return json.dumps({
+        'description': f"Mock description of {name}",
+        'developer_consideration': "Generated by the mock LLM server"
+    })
+
+def make_handler(behavior: MockLLMBehavior):
+    class MockLLMRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status: int, payload: dict, headers: Optional[Dict[str, str]] = None) -> None:
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+            with behavior._lock:
+                behavior.stats[status] += 1
+
+        def do_HEAD(self):
+            # Connection warm-up
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._reply(400, {'error': {'message': 'invalid JSON body'}})
+                return
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._reply(404, {'error': {'message': f"unknown endpoint {self.path}"}})
+                return
+
+            behavior.last_request = request
+            delay, roll = behavior.draw()
+            if delay:
+                time.sleep(delay)
+            if roll < behavior.throttle_rate:
+                self._reply(429, {'error': {'message': 'rate limited'}},
+                            {'Retry-After': f"{behavior.retry_after:g}"})
+                return
+            if roll < behavior.throttle_rate + behavior.error_rate:
+                self._reply(500, {'error': {'message': 'injected failure'}})
+                return
+
+            messages = request.get('messages') or []
+            content = mock_completion(messages, behavior.bare_batch_arrays) + behavior.trailing_text
+            if request.get('stream'):
+                self._stream(request, content)
+                return
+            prompt_tokens = sum(len(message.get('content', '')) for message in messages) // 4
+            self._reply(200, {
+                'id': 'mock-completion',
+                'object': 'chat.completion',
+                'model': request.get('model', 'mock'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': len(content) // 4,
+                    'total_tokens': prompt_tokens + len(content) // 4
+                }
+            })
+
+        def _stream(self, request: dict, content: str) -> None:
+            # Server-sent events without a length; the connection ends the stream
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            with behavior._lock:
+                behavior.stats[200] += 1
+            size = behavior.stream_chunk_size
+            events = [
+                {'choices': [{'index': 0, 'delta': {'content': content[start:start + size]}, 'finish_reason': None}]}
+                for start in range(0, len(content), size)
+            ]
+            events.append({'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+            try:
+                for event in events:
+                    event.update({'id': 'mock-completion', 'object': 'chat.completion.chunk',
+                                  'model': request.get('model', 'mock')})
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    if behavior.stream_chunk_delay:
+                        time.sleep(behavior.stream_chunk_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading once it had a complete answer
+                with behavior._lock:
+                    behavior.stats['closed_early'] += 1
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return MockLLMRequestHandler
+
+def serve_mock_llm(host: str = '127.0.0.1', port: int = 0,
+                   behavior: Optional[MockLLMBehavior] = None) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """
+    Start a mock LLM server in a background thread and return it with its thread.
+    Pass port=0 to bind a free port; the API root is
+    f"http://{host}:{server.server_address[1]}/v1".
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(behavior or MockLLMBehavior()))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server for repo-map.")
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to bind (default: 127.0.0.1).')
+    parser.add_argument('--port', type=int, default=8799, help='Port to bind (default: 8799).')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='Extra random latency of up to this many seconds.')
+    parser.add_argument('--tail-rate', type=float, default=0.0, help='Fraction of requests that are slow.')
+    parser.add_argument('--tail-latency', type=float, default=0.0, help='Extra seconds added to slow requests.')
+    parser.add_argument('--trailing-text', type=str, default='', help='Text appended to every answer.')
+    parser.add_argument('--stream-chunk-size', type=int, default=16,
+                        help='Characters per streamed chunk of an answer (default: 16).')
+    parser.add_argument('--stream-chunk-delay', type=float, default=0.0,
+                        help='Seconds between streamed chunks of an answer.')
+    parser.add_argument('--bare-batch-arrays', action='store_true',
+                        help='Answer batched prompts with a bare JSON array instead of a {"files": [...]} object.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500.')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429.')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429 responses.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible latency and failures.')
+    args = parser.parse_args()
+
+    behavior = MockLLMBehavior(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency,
+        trailing_text=args.trailing_text,
+        stream_chunk_size=args.stream_chunk_size,
+        stream_chunk_delay=args.stream_chunk_delay,
+        bare_batch_arrays=args.bare_batch_arrays
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(behavior))
+    server.daemon_threads = True
+    logger.warning(f"Mock LLM server listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.warning(f"Responses by status: {dict(behavior.stats)}")
+
+if __name__ == "__main__":
+    main()
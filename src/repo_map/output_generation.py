@@ -1,6 +1,6 @@
 import os
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
 logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -38,22 +38,33 @@ def print_tree(structure: List[Dict[str, Any]]):
         print_item(item, prefix, is_last)
     logger.warning("└────────────── ")
 
-def save_tree_map(structure: List[Dict[str, Any]], repo_root: str, output_path: str):
+def save_tree_map(structure: List[Dict[str, Any]], repo_root: str, output_path: str,
+                  overview: Optional[Dict[str, Any]] = None):
+    def write_summary(item: Dict[str, Any], prefix: str, file_handle):
+        if item.get('description'):
+            file_handle.write(f"{prefix}├── Summary: {item['description']}\n")
+        if item.get('developer_consideration'):
+            file_handle.write(f"{prefix}├── Developer Consideration: \"{item['developer_consideration']}\"\n")
+
     def write_item(item: Dict[str, Any], prefix: str, is_last: bool, file_handle):
         connector = '└── ' if is_last else '├── '
         if item['type'] == 'directory':
             file_handle.write(f"{prefix}{connector}{item['name']}/\n")
+            write_summary(item, prefix + ('    ' if is_last else '│   '), file_handle)
             return  
         else:
             language = item.get('language', 'None')
             file_handle.write(f"{prefix}{connector}{item['name']} ({language})\n")
 
             new_prefix = prefix + ('    ' if is_last else '│   ')
+            # A file described symbol by symbol lists each symbol instead of
+            # the description composed from them
+            symbols = [symbol for symbol in item.get('symbols') or [] if symbol.get('description')]
 
-            if 'description' in item and item['description']:
+            if 'description' in item and item['description'] and not symbols:
                 file_handle.write(f"{new_prefix}├── Description: {item['description']}\n")
 
-            if 'developer_consideration' in item and item['developer_consideration']:
+            if 'developer_consideration' in item and item['developer_consideration'] and not symbols:
                 file_handle.write(f"{new_prefix}├── Developer Consideration: \"{item['developer_consideration']}\"\n")
 
             if 'imports' in item and item['imports']:
@@ -62,12 +73,19 @@ def save_tree_map(structure: List[Dict[str, Any]], repo_root: str, output_path:
             if 'functions' in item and item['functions']:
                 file_handle.write(f"{new_prefix}├── Functions: {item['functions']}\n")
 
+            for symbol in symbols:
+                file_handle.write(f"{new_prefix}├── {symbol['kind'].capitalize()} {symbol['name']}: {symbol['description']}\n")
+                if symbol.get('developer_consideration'):
+                    file_handle.write(f"{new_prefix}│   └── Developer Consideration: \"{symbol['developer_consideration']}\"\n")
+
     repo_name = os.path.basename(os.path.normpath(repo_root))
     try:
         with open(output_path, 'w', encoding='utf-8') as file_handle:
             file_handle.write("# Repository Map\n\n")
             file_handle.write("```markdown\n")
             file_handle.write(f"/ ({repo_name})\n")
+            if overview is not None:
+                write_summary(overview, '', file_handle)
             for i, item in enumerate(structure):
                 prefix = '│   ' * item['level']
                 is_last = i == len(structure) - 1
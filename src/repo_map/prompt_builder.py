@@ -0,0 +1,83 @@
+"""
+Token-aware prompt assembly.
+
+Token counts come from count_tokens() in rate_limiting, the estimate also used
+for rate limits and budgets. fit_sections() renders the titled lists of a
+file prompt (imports, functions, ...) within a token budget: duplicates are
+dropped and, when the lists still do not fit, each keeps a fair share of the
+budget and notes how many items were left out. select_excerpts() picks source
+excerpts in priority order up to their own budget. Together they keep the
+cost of every file prompt bounded, however large the file.
+"""
+
+from typing import Iterable, List, Tuple
+
+from src.repo_map.rate_limiting import count_tokens
+
+# Token budget for the lists of a file prompt (see fit_sections()).
+FILE_PROMPT_TOKENS = 1500
+
+def dedupe(items: Iterable[str]) -> List[str]:
+    """
+    Drop repeated items, keeping the first occurrence of each.
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            unique.append(item)
+    return unique
+
+def _render(title: str, items: List[str], omitted: int = 0) -> str:
+    lines = [f"{title}:"] + [f"- {item}" for item in items]
+    if omitted:
+        lines.append(f"- ... and {omitted} more")
+    return "\n".join(lines) + "\n"
+
+def fit_sections(sections: List[Tuple[str, List[str]]], budget: int = FILE_PROMPT_TOKENS) -> str:
+    """
+    Render non-empty `sections` of (title, items) as bullet lists of at most
+    about `budget` tokens. Lists that fit are rendered whole; otherwise the
+    budget is shared out, short lists first, so one huge list cannot crowd
+    out the others, and each cut list ends with '- ... and N more'.
+    """
+    sections = [(title, dedupe(items)) for title, items in sections if items]
+    rendered = ''.join(_render(title, items) for title, items in sections)
+    if count_tokens(rendered) <= budget:
+        return rendered
+
+    costs = [[count_tokens(f"- {item}") for item in items] for _, items in sections]
+    overhead = sum(count_tokens(_render(title, [], len(items))) for title, items in sections)
+    remaining = max(0, budget - overhead)
+    kept = [0] * len(sections)
+    # Smallest lists first: what they do not need goes to the larger ones
+    order = sorted(range(len(sections)), key=lambda index: sum(costs[index]))
+    for position, index in enumerate(order):
+        share = remaining // (len(order) - position)
+        used = 0
+        for cost in costs[index]:
+            if used + cost > share:
+                break
+            used += cost
+            kept[index] += 1
+        remaining -= used
+    return ''.join(
+        _render(title, items[:kept[index]], len(items) - kept[index])
+        for index, (title, items) in enumerate(sections)
+    )
+
+def select_excerpts(excerpts: Iterable[str], budget: int) -> List[str]:
+    """
+    Take `excerpts` in the given (priority) order while they fit in `budget`
+    tokens; one that does not fit is skipped, so shorter ones after it can
+    still be added.
+    """
+    selected = []
+    remaining = budget
+    for excerpt in excerpts:
+        cost = count_tokens(f"- {excerpt}")
+        if cost <= remaining:
+            selected.append(excerpt)
+            remaining -= cost
+    return selected
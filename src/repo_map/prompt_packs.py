@@ -0,0 +1,131 @@
+"""
+Per-language prompt packs for LLM file descriptions.
+
+A PromptPack says how files of one language are presented to the LLM: what
+to call them, how to title the extracted elements (Go has types rather than
+classes, Java methods rather than functions), whether class members are
+listed, optional language guidance for the model, and which files are not
+worth describing (generated code, bundles, declaration files). Only
+languages with a pack are described; is_eligible() is the single rule used
+by the LLM pipeline and by the run journal.
+"""
+
+import fnmatch
+from typing import Dict, Any, Optional, Iterable, List, Tuple
+
+# Members listed per class when a pack lists them.
+MEMBER_LIMIT = 20
+
+DEFAULT_LABELS = {'imports': 'Imports', 'functions': 'Functions', 'classes': 'Classes', 'constants': 'Constants'}
+
+class PromptPack:
+    """
+    How to prompt for files of `language`.
+
+    `noun` names one file in the prompt ("Python file"). `labels` title the
+    imports, functions, classes and constants sections. With
+    `list_members`, each class is followed by its members (methods), which
+    is where most of the code lives in class-based languages. `guidance` is
+    added to the prompt when set. Files whose name matches one of `skip`
+    (fnmatch patterns) are not described.
+    """
+
+    def __init__(self, language: str, noun: str, labels: Optional[Dict[str, str]] = None,
+                 list_members: bool = False, guidance: str = '', skip: Iterable[str] = ()):
+        self.language = language
+        self.noun = noun
+        self.labels = dict(DEFAULT_LABELS, **(labels or {}))
+        self.list_members = list_members
+        self.guidance = guidance
+        self.skip = list(skip)
+
+    def eligible(self, name: str) -> bool:
+        return not any(fnmatch.fnmatch(name, pattern) for pattern in self.skip)
+
+    def sections(self, file: Dict[str, Any]) -> List[Tuple[str, List[str]]]:
+        """
+        The (title, items) sections of `file` for fit_sections().
+        """
+        classes = file.get('classes') or {}
+        if self.list_members and isinstance(classes, dict):
+            class_items = []
+            for name, members in classes.items():
+                members = list(dict.fromkeys(members or []))
+                if not members:
+                    class_items.append(name)
+                    continue
+                listed = ', '.join(members[:MEMBER_LIMIT])
+                if len(members) > MEMBER_LIMIT:
+                    listed += f", ... ({len(members) - MEMBER_LIMIT} more)"
+                class_items.append(f"{name}: {listed}")
+        else:
+            class_items = list(classes)
+        return [
+            (self.labels['imports'], file.get('imports') or []),
+            (self.labels['functions'], file.get('functions') or []),
+            (self.labels['classes'], class_items),
+            (self.labels['constants'], file.get('constants') or []),
+        ]
+
+PROMPT_PACKS: Dict[str, PromptPack] = {
+    'Python': PromptPack('Python', 'Python file'),
+    'Java': PromptPack(
+        'Java', 'Java source file',
+        labels={'functions': 'Methods'}, list_members=True
+    ),
+    'JavaScript': PromptPack(
+        'JavaScript', 'JavaScript module',
+        list_members=True,
+        skip=['*.min.js', '*.bundle.js', '*.chunk.js']
+    ),
+    'TypeScript': PromptPack(
+        'TypeScript', 'TypeScript module',
+        list_members=True,
+        # Declaration files only restate types defined elsewhere
+        skip=['*.d.ts']
+    ),
+    'C#': PromptPack(
+        'C#', 'C# source file',
+        labels={'imports': 'Using directives', 'functions': 'Methods'}, list_members=True,
+        skip=['*.Designer.cs', '*.g.cs', '*.g.i.cs', 'AssemblyInfo.cs']
+    ),
+    'Go': PromptPack(
+        'Go', 'Go source file',
+        labels={'classes': 'Types'}, list_members=True,
+        guidance='Types are listed with the methods declared on them; identifiers starting with '
+                 'an upper-case letter are exported from the package.',
+        skip=['*.pb.go', '*_gen.go', '*_generated.go', 'zz_generated*.go']
+    ),
+}
+
+def get_prompt_pack(language: Optional[str]) -> Optional[PromptPack]:
+    return PROMPT_PACKS.get(language or '')
+
+def is_eligible(file: Dict[str, Any], languages: Optional[Iterable[str]] = None) -> bool:
+    """
+    Whether `file` gets an LLM description: it must be a file in a language
+    with a prompt pack, among `languages` if given, and not match the
+    pack's skip patterns.
+    """
+    if file.get('type') != 'file':
+        return False
+    pack = get_prompt_pack(file.get('language'))
+    if pack is None or (languages is not None and pack.language not in languages):
+        return False
+    return pack.eligible(file['name'])
+
+def parse_languages_option(value: str) -> List[str]:
+    """
+    Parse a comma-separated --llm-languages value, matching pack names
+    without regard to case.
+    """
+    by_name = {language.lower(): language for language in PROMPT_PACKS}
+    languages = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name.lower() not in by_name:
+            raise ValueError(f"No prompt pack for {name!r}; choose from {', '.join(sorted(PROMPT_PACKS))}")
+        languages.append(by_name[name.lower()])
+    return languages
@@ -0,0 +1,327 @@
+import asyncio
+import random
+import re
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Mapping
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Letter runs, digit runs and single punctuation characters; whitespace is
+# mostly merged into the neighbouring token by real tokenizers.
+_TOKEN_PIECE = re.compile(r'[A-Za-z]+|\d+|[^\sA-Za-z\d]')
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in `text`: about one per four letters of a
+    word, one per three digits and one per punctuation character. This local
+    heuristic is closer to BPE counts for code than characters / 4, and is
+    the one estimate used for rate limits, budgets, batches and prompts.
+    """
+    count = 0
+    for piece in _TOKEN_PIECE.findall(text):
+        if piece[0].isalpha():
+            count += (len(piece) + 3) // 4
+        elif piece[0].isdigit():
+            count += (len(piece) + 2) // 3
+        else:
+            count += 1
+    return count
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, retry_at - (now if now is not None else time.time()))
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+
+def parse_reset(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a rate-limit reset header into seconds from now.
+
+    Providers use a duration ('20s', '1m30s', '250ms'), a number of seconds, or
+    an absolute epoch timestamp in seconds or milliseconds.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    now = now if now is not None else time.time()
+    try:
+        number = float(value)
+    except ValueError:
+        parts = _DURATION_PART.findall(value)
+        if not parts:
+            return None
+        scale = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+        return sum(float(amount) * scale[unit] for amount, unit in parts)
+    if number > 1e12:
+        return max(0.0, number / 1000.0 - now)
+    if number > 1e9:
+        return max(0.0, number - now)
+    return max(0.0, number)
+
+def parse_rate_limit_headers(headers: Mapping[str, str], now: Optional[float] = None) -> Dict[str, float]:
+    """
+    Extract remaining quota and reset delays from OpenAI/OpenRouter-style
+    x-ratelimit-* headers. Missing or unparsable values are left out.
+    """
+    lowered = {key.lower(): value for key, value in headers.items()}
+    info = {}
+    for kind in ('requests', 'tokens'):
+        remaining = lowered.get(f'x-ratelimit-remaining-{kind}')
+        reset = lowered.get(f'x-ratelimit-reset-{kind}')
+        if kind == 'requests':
+            # OpenRouter reports its request limit without a suffix.
+            remaining = remaining if remaining is not None else lowered.get('x-ratelimit-remaining')
+            reset = reset if reset is not None else lowered.get('x-ratelimit-reset')
+        if remaining is not None:
+            try:
+                info[f'remaining_{kind}'] = float(remaining)
+            except ValueError:
+                pass
+        reset_seconds = parse_reset(reset, now)
+        if reset_seconds is not None:
+            info[f'reset_{kind}'] = reset_seconds
+    return info
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Exponential backoff with jitter, so failed callers do not retry in lockstep.
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+
+    reserve() always succeeds and returns how long the caller must wait before
+    its reservation is covered, which keeps callers in FIFO order and lets a
+    single request larger than the bucket through once it has been paid for.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_minute / 6.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: Optional[float] = None) -> float:
+        now = now if now is not None else time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= amount
+        return max(0.0, -self.tokens / self.rate)
+
+class AdaptiveConcurrency:
+    """
+    Async concurrency limit adjusted by AIMD.
+
+    Each success below the latency tolerance grows the limit by roughly one per
+    window of `limit` requests, up to `maximum`. A throttled request halves the
+    limit and rising latency trims it by 10%, at most once per cooldown so a
+    burst of simultaneous 429s counts as one congestion signal.
+    """
+
+    def __init__(self, limit: int, minimum: int = 1, maximum: Optional[int] = None,
+                 latency_tolerance: float = 2.0, cooldown: float = 1.0):
+        self.maximum = max(1, maximum if maximum is not None else limit)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(min(max(limit, self.minimum), self.maximum))
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self._in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._smoothed_latency: Optional[float] = None
+        self._baseline_latency: Optional[float] = None
+        self._last_decrease = float('-inf')
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop.
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def __aenter__(self) -> 'AdaptiveConcurrency':
+        condition = self._get_condition()
+        async with condition:
+            while self._in_flight >= int(self.limit):
+                await condition.wait()
+            self._in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            condition.notify_all()
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * factor)
+        logger.debug(f"LLM concurrency reduced to {int(self.limit)}")
+
+    def on_success(self, latency: float) -> None:
+        if self._smoothed_latency is None:
+            self._smoothed_latency = latency
+        else:
+            self._smoothed_latency = 0.8 * self._smoothed_latency + 0.2 * latency
+        if self._baseline_latency is None or self._smoothed_latency < self._baseline_latency:
+            self._baseline_latency = self._smoothed_latency
+        if self._smoothed_latency > self._baseline_latency * self.latency_tolerance:
+            self._decrease(0.9)
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+
+    def on_throttle(self) -> None:
+        self._decrease(0.5)
+
+class RateLimiter:
+    """
+    Shared limiter for every LLM request in a run.
+
+    Requests and tokens per minute are enforced with token buckets (either may
+    be None for no limit). Throttling responses and exhausted-quota headers
+    pause all callers until the provider's reset time, and feed the adaptive
+    concurrency limit used to schedule requests.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 concurrency: int = 8, jitter: float = 0.1):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(concurrency)
+        self.jitter = jitter
+        self._paused_until = 0.0
+
+    async def acquire(self, tokens: int = 0) -> None:
+        now = time.monotonic()
+        wait = max(0.0, self._paused_until - now)
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1, now))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(tokens, now))
+        if wait > 0:
+            await asyncio.sleep(wait + random.uniform(0, self.jitter * wait))
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def paused_for(self, now: Optional[float] = None) -> float:
+        """
+        Seconds until callers are let through again after throttling (0 if not paused).
+        """
+        return max(0.0, self._paused_until - (now if now is not None else time.monotonic()))
+
+    def record_success(self, latency: float, headers: Optional[Mapping[str, str]] = None) -> None:
+        self.concurrency.on_success(latency)
+        if headers:
+            info = parse_rate_limit_headers(headers)
+            for kind in ('requests', 'tokens'):
+                if info.get(f'remaining_{kind}') == 0 and info.get(f'reset_{kind}'):
+                    self.pause(info[f'reset_{kind}'])
+
+    def record_throttle(self, headers: Optional[Mapping[str, str]] = None, attempt: int = 0) -> float:
+        """
+        Register a 429 response and return how long callers will be paused.
+        """
+        self.concurrency.on_throttle()
+        delay = None
+        if headers:
+            delay = parse_retry_after(headers.get('Retry-After'))
+            if delay is None:
+                resets = [value for key, value in parse_rate_limit_headers(headers).items() if key.startswith('reset_')]
+                delay = max(resets) if resets else None
+        if delay is None:
+            delay = backoff_delay(attempt)
+        self.pause(delay)
+        return delay
+
+class LLMBudget:
+    """
+    Run-wide caps on LLM spending: requests sent (retries included), tokens
+    (estimated when a request is sent, corrected with the usage the provider
+    reports) and a wall-clock `deadline` in seconds from creation. Any cap may
+    be None for no limit.
+
+    A request that would exceed a cap is refused, and once a cap is reached
+    every later request is too; requests already in flight finish.
+    """
+
+    def __init__(self, max_calls: Optional[int] = None, max_tokens: Optional[int] = None,
+                 deadline: Optional[float] = None):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.deadline = deadline
+        self.calls = 0
+        self.tokens = 0
+        self._expires = time.monotonic() + deadline if deadline is not None else None
+        self._reported = False
+
+    def remaining_time(self) -> Optional[float]:
+        if self._expires is None:
+            return None
+        return max(0.0, self._expires - time.monotonic())
+
+    @property
+    def exhausted_reason(self) -> Optional[str]:
+        if self.max_calls is not None and self.calls >= self.max_calls:
+            return f"call budget of {self.max_calls} requests used up"
+        if self.max_tokens is not None and self.tokens >= self.max_tokens:
+            return f"token budget of {self.max_tokens} tokens used up"
+        if self._expires is not None and time.monotonic() >= self._expires:
+            return f"deadline of {self.deadline:g}s reached"
+        return None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.exhausted_reason is not None
+
+    def try_spend(self, tokens: int) -> bool:
+        """
+        Charge one request of about `tokens` tokens, or return False if it
+        does not fit in the budget.
+        """
+        reason = self.exhausted_reason
+        if reason is not None:
+            if not self._reported:
+                self._reported = True
+                logger.warning(f"LLM budget exhausted ({reason}); remaining files are left without descriptions")
+            return False
+        if self.max_tokens is not None and self.tokens + tokens > self.max_tokens:
+            # Smaller requests may still fit
+            logger.debug(f"Request of ~{tokens} tokens does not fit in the remaining LLM token budget")
+            return False
+        self.calls += 1
+        self.tokens += tokens
+        return True
+
+    def refund(self, tokens: int) -> None:
+        """
+        Return the charge of a request that ended up not being sent.
+        """
+        self.calls -= 1
+        self.tokens -= tokens
+
+    def record_usage(self, estimated: int, actual: int) -> None:
+        """
+        Replace the estimate charged by try_spend() with the reported usage.
+        """
+        self.tokens += actual - estimated
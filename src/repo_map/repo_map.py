@@ -1,7 +1,9 @@
 import os
 import sys
+import signal
 import argparse
 import asyncio
+import threading
 from src.repo_map.file_processing import (
     parse_gitignore,
     should_ignore,
@@ -11,35 +13,100 @@ from src.repo_map.file_processing import (
     get_imports,
     SUPPORTED_LANGUAGES
 )
-from src.repo_map.llm_interaction import enhance_repo_with_llm
-from src.repo_map.cache_management import load_cache
+from src.repo_map.llm_interaction import (
+    enhance_repo_with_llm,
+    summarize_directories,
+    create_llm_session,
+    warm_up_session
+)
+from src.repo_map.cache_management import (
+    load_cache,
+    touch_cache_entries,
+    gc_cache,
+    compact_cache,
+    list_existing_paths,
+    load_global_cache,
+    prune_global_cache,
+    as_cache_backend,
+    apply_file_record,
+    file_cache_record,
+    CacheBackend,
+    SqliteCacheBackend,
+    HttpCacheBackend,
+    TieredCacheBackend,
+    WriteBehindCacheBackend,
+    FILES,
+    ANALYSES
+)
+from src.repo_map.rate_limiting import RateLimiter, LLMBudget
+from src.repo_map.work_scheduler import ImportanceRanker, git_recency
+from src.repo_map.resilience import CircuitBreaker, RequestHedger
+from src.repo_map.llm_cassette import Cassette
+from src.repo_map.llm_providers import (
+    PROVIDERS,
+    DEFAULT_PROVIDER,
+    ENDPOINT_FORMAT,
+    get_provider,
+    parse_header_option,
+    parse_endpoint_option
+)
+from src.repo_map.load_balancer import Endpoint, LoadBalancer
+from src.repo_map.cache_snapshot import export_snapshot, import_snapshot
+from src.repo_map.run_journal import RunJournal, JOURNAL_FILE
+from src.repo_map.prompt_packs import PROMPT_PACKS, is_eligible, parse_languages_option
 from src.repo_map.output_generation import (
     print_tree,
     save_tree_map,
     save_pre_enhanced_map
 )
 import logging
-import json
 import sqlite3
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import pathspec
 
 logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def summarize_repo(root_dir: str, cache_conn: sqlite3.Connection) -> List[Dict[Any, Any]]:
-    summary = []
+def summarize_repo(root_dir: str, cache: Any,
+                   on_files: Optional[Callable[[List[Tuple[int, Dict[str, Any]]]], None]] = None,
+                   summary: Optional[List[Dict[Any, Any]]] = None,
+                   journal: Optional[RunJournal] = None,
+                   stop: Optional[threading.Event] = None) -> List[Dict[Any, Any]]:
+    """
+    Walk the repository and return its structure, appending to `summary` if
+    one is given. After each directory's source files are analyzed they are
+    passed to `on_files` as (index in summary, file info) pairs, so consumers
+    can start on them while the scan continues.
+
+    Each analyzed directory is recorded in `journal`; directories it already
+    holds from an interrupted run are restored from it without reading their
+    files. The walk ends early, after the current directory, once `stop` is set.
+    """
+    cache = as_cache_backend(cache)
+    summary = summary if summary is not None else []
     ignore_patterns = parse_gitignore(root_dir)
-    manual_ignore_patterns = ['.repo_map_structure.json', '.repo-map-cache.db']
+    manual_ignore_patterns = ['.repo_map_structure.json', '.repo-map-cache.db', JOURNAL_FILE]
     additional_patterns = ['*.pkl'] + manual_ignore_patterns
     combined_patterns = ignore_patterns + additional_patterns
     ignore_spec = pathspec.PathSpec.from_lines('gitwildmatch', combined_patterns)
-    cursor = cache_conn.cursor()
     for root, dirs, files in os.walk(root_dir):
+        if stop is not None and stop.is_set():
+            break
         relative_root = os.path.relpath(root, root_dir)
         if relative_root == '.':
             relative_root = ''
         dirs[:] = [d for d in dirs if not should_ignore(os.path.join(relative_root, d), ignore_spec)]
+        if journal is not None and relative_root in journal.finished:
+            start = len(summary)
+            summary.extend(journal.finished[relative_root])
+            source_files = [
+                (index, item) for index, item in enumerate(summary[start:], start)
+                if item['type'] == 'file' and item.get('language')
+            ]
+            if on_files is not None and source_files:
+                on_files(source_files)
+            continue
+        start = len(summary)
         if relative_root != '':
             dir_info = {
                 'name': os.path.basename(root),
@@ -49,6 +116,7 @@ def summarize_repo(root_dir: str, cache_conn: sqlite3.Connection) -> List[Dict[A
                 'language': None
             }
             summary.append(dir_info)
+        source_files = []
         for file in sorted(files):
             full_path = os.path.join(root, file)
             relative_file_path = os.path.relpath(full_path, root_dir)
@@ -64,33 +132,161 @@ def summarize_repo(root_dir: str, cache_conn: sqlite3.Connection) -> List[Dict[A
                 'language': language
             }
             if language:
-                file_hash = compute_file_hash(full_path)
-                cursor.execute("SELECT hash, description, developer_consideration, imports, functions FROM cache WHERE path = ?", (full_path,))
-                row = cursor.fetchone()
-                if row and row[0] == file_hash:
-                    file_info.update({
-                        'description': row[1],
-                        'developer_consideration': row[2],
-                        'imports': json.loads(row[3]) if row[3] else [],
-                        'functions': json.loads(row[4]) if row[4] else [],
-                        'hash': file_hash
-                    })
-                else:
-                    classes, functions_extracted, constants = get_structure(full_path, language)
-                    module_doc = get_module_docstring(full_path, language)
-                    imports = get_imports(full_path, language)
-                    file_info.update({
-                        'classes': classes,
-                        'functions': functions_extracted,
-                        'constants': constants,
-                        'imports': imports,
-                        'description': module_doc,
-                        'hash': file_hash
-                    })
+                file_info['hash'] = compute_file_hash(full_path)
+                source_files.append((len(summary), file_info))
             summary.append(file_info)
+        analyze_files([file_info for _, file_info in source_files], cache)
+        if journal is not None:
+            journal.record_directory(relative_root, summary[start:])
+        if on_files is not None and source_files:
+            on_files(source_files)
     return summary
 
+def analyze_files(file_infos: List[Dict[str, Any]], cache: CacheBackend) -> None:
+    """
+    Fill in structure for a batch of hashed files, preferring the path cache,
+    then analyses of identical contents, and only then parsing the file.
+    """
+    if not file_infos:
+        return
+    cached_files = cache.get_many(FILES, [info['path'] for info in file_infos])
+    stale = []
+    for file_info in file_infos:
+        record = cached_files.get(file_info['path'])
+        if record and record.get('hash') == file_info['hash']:
+            apply_file_record(file_info, record)
+        else:
+            stale.append(file_info)
+    if not stale:
+        return
+
+    analyses = cache.get_many(ANALYSES, {info['hash'] for info in stale})
+    new_analyses = {}
+    for file_info in stale:
+        analysis = analyses.get(file_info['hash']) or new_analyses.get(file_info['hash'])
+        if analysis is None:
+            classes, functions_extracted, constants = get_structure(file_info['path'], file_info['language'])
+            analysis = {
+                'classes': classes,
+                'functions': functions_extracted,
+                'constants': constants,
+                'imports': get_imports(file_info['path'], file_info['language']),
+                'docstring': get_module_docstring(file_info['path'], file_info['language'])
+            }
+            new_analyses[file_info['hash']] = analysis
+        file_info.update({
+            'classes': analysis.get('classes') or {},
+            'functions': analysis.get('functions') or [],
+            'constants': analysis.get('constants') or [],
+            'imports': analysis.get('imports') or [],
+            'description': analysis.get('docstring') or ''
+        })
+    cache.put_many(ANALYSES, new_analyses)
+    cache.put_many(FILES, {info['path']: file_cache_record(info) for info in stale})
+
+def collect_cache_garbage(cache_conn: sqlite3.Connection, summary: List[Dict[Any, Any]], max_entries: Optional[int] = None) -> int:
+    """
+    Refresh last_seen for every file and directory in this run, evict rows for
+    paths that were not seen, enforce the optional size cap and compact the database.
+    """
+    seen_paths = [
+        item['path'] for item in summary
+        if (item['type'] == 'file' and item.get('language')) or item['type'] == 'directory'
+    ]
+    touch_cache_entries(cache_conn, seen_paths)
+    removed = gc_cache(cache_conn, live_paths=seen_paths, max_entries=max_entries)
+    compact_cache(cache_conn)
+    return removed
+
+def cache_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='repo-map cache',
+        description="Manage the repo-map cache (.repo-map-cache.db) of a repository."
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    gc_parser = subparsers.add_parser(
+        'gc',
+        help='Evict entries for files that no longer exist and compact the cache.'
+    )
+    gc_parser.add_argument(
+        'repository_path',
+        type=str,
+        help='Path to the repository whose cache should be collected.'
+    )
+    gc_parser.add_argument(
+        '--max-entries',
+        type=int,
+        default=None,
+        help='Keep at most this many entries, evicting the least recently seen first.'
+    )
+
+    export_parser = subparsers.add_parser(
+        'export',
+        help='Write cached analyses and descriptions to a compressed snapshot.'
+    )
+    export_parser.add_argument(
+        'repository_path',
+        type=str,
+        help='Path to the repository whose cache should be exported.'
+    )
+    export_parser.add_argument(
+        '-o', '--output',
+        type=str,
+        default='repo-map-cache.jsonl.gz',
+        help='Snapshot file to write (default: repo-map-cache.jsonl.gz).'
+    )
+
+    import_parser = subparsers.add_parser(
+        'import',
+        help='Merge a snapshot into the cache, keeping the fresher entry on conflicts.'
+    )
+    import_parser.add_argument(
+        'repository_path',
+        type=str,
+        help='Path to the repository whose cache should be seeded.'
+    )
+    import_parser.add_argument(
+        'snapshot',
+        type=str,
+        help='Snapshot file written by "repo-map cache export".'
+    )
+    args = parser.parse_args(argv)
+
+    repo_path = args.repository_path
+    if not os.path.isdir(repo_path):
+        logger.error(f"Error: {repo_path} is not a valid directory")
+        sys.exit(1)
+    # Cached file rows are keyed by absolute path (see list_existing_paths())
+    repo_path = os.path.abspath(repo_path)
+
+    cache_conn = load_cache(repo_path)
+    try:
+        if args.command == 'gc':
+            live_paths = list_existing_paths(cache_conn)
+            removed = gc_cache(cache_conn, live_paths=live_paths, max_entries=args.max_entries)
+            compact_cache(cache_conn)
+            logger.warning(f"Removed {removed} stale cache entries.")
+        elif args.command == 'export':
+            count = export_snapshot(SqliteCacheBackend(cache_conn), args.output)
+            logger.warning(f"Exported {count} cache entries to '{args.output}'.")
+        elif args.command == 'import':
+            try:
+                imported, skipped = import_snapshot(SqliteCacheBackend(cache_conn), args.snapshot)
+            except (IOError, ValueError) as e:
+                logger.error(f"Error importing cache snapshot: {e}")
+                sys.exit(1)
+            logger.warning(f"Imported {imported} cache entries ({skipped} skipped).")
+    finally:
+        cache_conn.close()
+
 async def main():
+    argv = sys.argv[1:]
+    if argv and argv[0] == 'cache':
+        cache_command(argv[1:])
+        return
+
     parser = argparse.ArgumentParser(
         description=(
             "repo-map: A tool to generate a structured summary of a software repository.\n"
@@ -109,18 +305,274 @@ async def main():
         action='store_true',
         help='Automatically accept the disclaimer and proceed without prompting.'
     )
+    parser.add_argument(
+        '--provider',
+        choices=sorted(PROVIDERS),
+        default=os.getenv('REPO_MAP_PROVIDER', DEFAULT_PROVIDER),
+        help='LLM provider: OpenRouter, OpenAI, or a local OpenAI-compatible server\n'
+             f'(default: $REPO_MAP_PROVIDER or {DEFAULT_PROVIDER}).'
+    )
+    parser.add_argument(
+        '--llm-base-url',
+        type=str,
+        default=os.getenv('REPO_MAP_LLM_BASE_URL'),
+        help="Override the provider's API root, e.g. http://gpu-box:8000/v1 (default: $REPO_MAP_LLM_BASE_URL)."
+    )
+    parser.add_argument(
+        '--llm-api-key-env',
+        type=str,
+        default=None,
+        help="Environment variable holding the API key (default: the provider's own, e.g. OPENROUTER_API_KEY)."
+    )
+    parser.add_argument(
+        '--llm-header',
+        action='append',
+        default=[],
+        metavar='"NAME: VALUE"',
+        help='Extra HTTP header sent with every LLM request; may be repeated.'
+    )
+    parser.add_argument(
+        '--llm-endpoint',
+        action='append',
+        default=[],
+        metavar=f'"{ENDPOINT_FORMAT}"',
+        help='Spread LLM requests over another API key and/or endpoint of the same API, next to\n'
+             'the provider\'s own; may be repeated. key_env names the variable holding its API key\n'
+             '(omit the URL to add a key for the provider URL); model, if given, must match --model\n'
+             '(the name under which descriptions are cached).\n'
+             'Each endpoint has its own --rpm/--tpm limits and failure breaker; requests go to\n'
+             'the one with the most free capacity and lowest latency, away from failing ones.'
+    )
+    parser.add_argument(
+        '--llm-timeout',
+        type=float,
+        default=None,
+        help="Seconds before an LLM request times out (default: provider specific)."
+    )
+    parser.add_argument(
+        '--no-llm-stream',
+        action='store_true',
+        help='Wait for whole LLM responses instead of streaming them; streamed responses are\n'
+             'closed as soon as the answer is complete.'
+    )
     parser.add_argument(
         '--model',
         type=str,
-        default='anthropic/claude-3.5-sonnet',
-        help='LLM model name to use for generating descriptions (default: anthropic/claude-3.5-sonnet).'
+        default=None,
+        help="LLM model name to use for generating descriptions (default: the provider's default,\n"
+             "anthropic/claude-3.5-sonnet for OpenRouter; required for local servers)."
+    )
+    parser.add_argument(
+        '--llm-concurrency',
+        type=int,
+        default=None,
+        help='Maximum number of LLM requests in flight at once (default: provider specific,\n'
+             '8 for hosted APIs and fewer for local servers).'
+    )
+    parser.add_argument(
+        '--llm-cassette',
+        type=str,
+        default=None,
+        help='Record LLM responses to, or replay them from, this JSON Lines file.'
+    )
+    parser.add_argument(
+        '--llm-cassette-mode',
+        choices=['record', 'replay'],
+        default='replay',
+        help='With --llm-cassette: record real responses, or replay them offline\n'
+             'without an API key (default: replay).'
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        '--symbol-descriptions',
+        action='store_true',
+        help='Describe and cache each top-level Python class and function separately and build\n'
+             'file descriptions from them, so editing one function only re-describes that function.'
+    )
+    parser.add_argument(
+        '--llm-languages',
+        type=str,
+        default=None,
+        metavar='LANGUAGE,...',
+        help='Describe only files in these languages (default: every language with a prompt pack:\n'
+             f'{", ".join(PROMPT_PACKS)}).'
+    )
+    parser.add_argument(
+        '--prompt-excerpts',
+        type=int,
+        default=0,
+        metavar='TOKENS',
+        help='Add up to TOKENS tokens of source excerpts (module docstring, then class and function\n'
+             'signatures with their docstring summaries) to each file prompt (default: 0, none).'
+    )
+    parser.add_argument(
+        '--directory-summaries',
+        action='store_true',
+        help='Summarize each directory and the whole repository from the file descriptions.\n'
+             'Summaries are cached by a hash of their children, so only directories whose\n'
+             'contents changed are summarized again.'
+    )
+    parser.add_argument(
+        '--llm-batch-size',
+        type=int,
+        default=1,
+        help='Describe up to this many small files per LLM request (default: 1, no batching).'
+    )
+    parser.add_argument(
+        '--llm-batch-tokens',
+        type=int,
+        default=2000,
+        help='Token budget for the file details packed into one batched request (default: 2000).'
+    )
+    parser.add_argument(
+        '--rpm',
+        type=float,
+        default=None,
+        help='Maximum LLM requests per minute (default: no limit).'
+    )
+    parser.add_argument(
+        '--tpm',
+        type=float,
+        default=None,
+        help='Maximum LLM tokens per minute, prompt plus expected response (default: no limit).'
+    )
+    parser.add_argument(
+        '--llm-failure-threshold',
+        type=int,
+        default=5,
+        help='Stop sending LLM requests for a minute after this many consecutive failures\n'
+             '(default: 5); during a provider outage the map is written without descriptions.'
+    )
+    parser.add_argument(
+        '--llm-hedge',
+        action='store_true',
+        help='Send a duplicate of any LLM request slower than the p95 latency so far and\n'
+             'use whichever answers first.'
+    )
+    parser.add_argument(
+        '--max-llm-calls',
+        type=int,
+        default=None,
+        help='Stop sending LLM requests after this many, retries included (default: no limit).\n'
+             'The most important files (import fan-in, git recency, size) are described first.'
+    )
+    parser.add_argument(
+        '--max-tokens',
+        type=int,
+        default=None,
+        help='Stop sending LLM requests once this many tokens are used (default: no limit).'
+    )
+    parser.add_argument(
+        '--llm-deadline',
+        type=float,
+        default=None,
+        help='Stop sending LLM requests this many seconds after the run starts (default: no limit).'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue an interrupted run from its journal (.repo-map-journal.jsonl): directories\n'
+             'it finished scanning are not read again, and received descriptions come from the cache.'
+    )
+    parser.add_argument(
+        '--cache-max-entries',
+        type=int,
+        default=None,
+        help='Cap the cache at this many entries, evicting the least recently seen first.'
+    )
+    parser.add_argument(
+        '--global-cache',
+        action='store_true',
+        help='Share analyses and descriptions of identical file contents across all\n'
+             'repositories and worktrees on this machine.'
+    )
+    parser.add_argument(
+        '--global-cache-dir',
+        type=str,
+        default=None,
+        help='Directory of the shared cache (default: $REPO_MAP_CACHE_DIR or ~/.cache/repo-map).'
+    )
+    parser.add_argument(
+        '--global-cache-max-entries',
+        type=int,
+        default=100000,
+        help='Maximum number of entries per table in the shared cache (default: 100000).'
+    )
+    parser.add_argument(
+        '--remote-cache',
+        type=str,
+        default=os.getenv('REPO_MAP_REMOTE_CACHE'),
+        help='Base URL of an HTTP key-value cache shared by several machines\n'
+             '(default: $REPO_MAP_REMOTE_CACHE). $REPO_MAP_REMOTE_CACHE_TOKEN is sent as a bearer token.'
+    )
+    args = parser.parse_args(argv)
+
+    headers = {}
+    try:
+        for header in args.llm_header:
+            headers.update(parse_header_option(header))
+    except ValueError as e:
+        parser.error(str(e))
+    provider = get_provider(
+        args.provider,
+        base_url=args.llm_base_url,
+        api_key_env=args.llm_api_key_env,
+        headers=headers,
+        concurrency=args.llm_concurrency,
+        timeout=args.llm_timeout,
+        stream=False if args.no_llm_stream else None
+    )
+    languages = None
+    if args.llm_languages is not None:
+        try:
+            languages = parse_languages_option(args.llm_languages)
+        except ValueError as e:
+            parser.error(str(e))
+    model = args.model or provider.default_model
+    if not model:
+        parser.error(f"--model is required for the {provider.name} provider")
+    balancer = None
+    if args.llm_endpoint:
+        try:
+            specs = [parse_endpoint_option(value, model) for value in args.llm_endpoint]
+        except ValueError as e:
+            parser.error(str(e))
+        endpoints = [provider] + [get_provider(
+            args.provider,
+            base_url=spec.get('base_url') or args.llm_base_url,
+            api_key_env=spec.get('api_key_env') or args.llm_api_key_env,
+            headers=headers,
+            concurrency=spec.get('concurrency') or args.llm_concurrency,
+            timeout=spec.get('timeout') or args.llm_timeout,
+            stream=False if args.no_llm_stream else None
+        ) for spec in specs]
+        models = [None] + [spec.get('model') for spec in specs]
+        configured = []
+        for endpoint, endpoint_model in zip(endpoints, models):
+            if not endpoint.is_configured():
+                logger.warning(f"No {endpoint.api_key_env} found in environment; skipping endpoint {endpoint.base_url}")
+                continue
+            configured.append(Endpoint(
+                endpoint, model=endpoint_model,
+                rate_limiter=RateLimiter(requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                                         concurrency=max(1, endpoint.concurrency)),
+                breaker=CircuitBreaker(failure_threshold=args.llm_failure_threshold)
+            ))
+        if configured:
+            balancer = LoadBalancer(configured)
+    concurrency = balancer.concurrency if balancer is not None else provider.concurrency
+    cassette = None
+    if args.llm_cassette:
+        try:
+            cassette = Cassette(args.llm_cassette, args.llm_cassette_mode)
+        except ValueError as e:
+            parser.error(str(e))
 
     repo_path = args.repository_path
     if not os.path.isdir(repo_path):
         logger.error(f"Error: {repo_path} is not a valid directory")
         sys.exit(1)
+    # Cached file rows are keyed by absolute path (see list_existing_paths())
+    repo_path = os.path.abspath(repo_path)
 
     if not args.yes:
         if not confirm_disclaimer():
@@ -128,18 +580,153 @@ async def main():
             sys.exit(0)
 
     cache_conn = load_cache(repo_path)
+    global_conn = load_global_cache(args.global_cache_dir) if args.global_cache else None
+    shared_tiers = []
+    if global_conn is not None:
+        shared_tiers.append(SqliteCacheBackend(global_conn, track_usage=True))
+    if args.remote_cache:
+        shared_tiers.append(HttpCacheBackend(args.remote_cache, token=os.getenv('REPO_MAP_REMOTE_CACHE_TOKEN')))
+    # Writes are group-committed by a background thread and reads come from a
+    # snapshot, so neither the scan nor the LLM workers wait on fsync.
+    cache = WriteBehindCacheBackend(TieredCacheBackend(SqliteCacheBackend(cache_conn), shared_tiers))
+
+    # Open the LLM connection pool while the scan runs in a worker thread, so
+    # DNS, TCP and TLS setup are done by the time descriptions are requested.
+    session = create_llm_session(limit=max(1, concurrency))
+    warm_up = None
+    if provider.is_configured() and not (cassette is not None and cassette.replaying):
+        warm_up = asyncio.ensure_future(warm_up_session(session, provider.chat_url))
+
+    journal = RunJournal(repo_path, resume=args.resume)
+    if journal.finished:
+        logger.warning(f"Resuming: {len(journal.finished)} directories restored from the run journal, "
+                       f"{len(journal.pending)} files were waiting for descriptions")
+    # The first SIGINT/SIGTERM stops the scan and LLM work, then writes a
+    # partial map and keeps the journal; a second one aborts.
+    stop = threading.Event()
+    llm_tasks: List[asyncio.Future] = []
+    loop = asyncio.get_event_loop()
+
+    def shut_down() -> None:
+        stop.set()
+        remove_shutdown_handlers(loop)
+        logger.warning("Interrupted: writing a partial repo-map (interrupt again to abort)")
+        for task in llm_tasks:
+            task.cancel()
+
+    async def unless_interrupted(task: asyncio.Future) -> Any:
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if not (stop.is_set() and task.cancelled()):
+                raise
+            return None
+
+    install_shutdown_handlers(loop, shut_down)
+
     logger.info("Generating repository summary...")
-    summary = summarize_repo(repo_path, cache_conn)
-    save_pre_enhanced_map(summary, os.path.join(repo_path, '.repo_map_structure.json'))
-    
-    await enhance_repo_with_llm(summary, cache_conn, model_name=args.model)
-    
-    cache_conn.close()
+    overview = None
+    try:
+        if balancer is None:
+            rate_limiter = RateLimiter(
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                concurrency=max(1, provider.concurrency)
+            )
+        else:
+            # Each endpoint enforces its own quotas; this only caps requests in flight
+            rate_limiter = RateLimiter(concurrency=max(1, concurrency))
+        budget = LLMBudget(max_calls=args.max_llm_calls, max_tokens=args.max_tokens, deadline=args.llm_deadline)
+        summary = []
+        file_queue: asyncio.Queue = asyncio.Queue()
+        ranker = ImportanceRanker(repo_path)
+        recency = loop.run_in_executor(None, git_recency, repo_path)
+        recency.add_done_callback(lambda future: ranker.set_recency(future.result()))
+
+        def on_files(entries: List[Tuple[int, Dict[str, Any]]]) -> None:
+            loop.call_soon_threadsafe(file_queue.put_nowait, entries)
+
+        # The scan runs in a worker thread and hands each analyzed directory to
+        # the LLM workers right away, so network and CPU work overlap.
+        breaker = CircuitBreaker(failure_threshold=args.llm_failure_threshold)
+        hedger = RequestHedger() if args.llm_hedge else None
+        enhancement = asyncio.ensure_future(enhance_repo_with_llm(
+            summary, cache, model_name=model, concurrency=concurrency, session=session,
+            rate_limiter=rate_limiter, batch_size=args.llm_batch_size, batch_token_budget=args.llm_batch_tokens,
+            provider=provider, cassette=cassette, symbol_descriptions=args.symbol_descriptions,
+            file_queue=file_queue, budget=budget, ranker=ranker, breaker=breaker, hedger=hedger,
+            balancer=balancer, excerpt_tokens=args.prompt_excerpts, languages=languages
+        ))
+        llm_tasks.append(enhancement)
+        try:
+            await loop.run_in_executor(None, cache.prefetch, FILES)
+            await loop.run_in_executor(None, summarize_repo, repo_path, cache, on_files, summary, journal, stop)
+            # Pending work is re-ranked when the queue closes; include git history
+            await recency
+        finally:
+            file_queue.put_nowait(None)
+        # Files already described by the time the scan ends carry their
+        # descriptions into this snapshot.
+        save_pre_enhanced_map(summary, os.path.join(repo_path, '.repo_map_structure.json'))
+        if warm_up is not None:
+            await warm_up
+        await unless_interrupted(enhancement)
+        if args.directory_summaries and not stop.is_set():
+            directories = asyncio.ensure_future(summarize_directories(
+                summary, cache, model_name=model, root_dir=repo_path, session=session,
+                rate_limiter=rate_limiter, provider=provider, cassette=cassette,
+                budget=budget, breaker=breaker, hedger=hedger, balancer=balancer
+            ))
+            llm_tasks.append(directories)
+            overview = await unless_interrupted(directories)
+    finally:
+        remove_shutdown_handlers(loop)
+        await session.close()
+
+    cache.flush()
+    if stop.is_set():
+        # A partial scan must not evict the cache rows of files it never reached
+        pending = [
+            item['path'] for item in summary
+            if is_eligible(item, languages) and not item.get('description')
+        ]
+        journal.record_pending(pending)
+        journal.close()
+    else:
+        collect_cache_garbage(cache_conn, summary + ([overview] if overview else []),
+                              max_entries=args.cache_max_entries)
+        if global_conn is not None:
+            prune_global_cache(global_conn, args.global_cache_max_entries)
+        journal.complete()
+    cache.close()
     directory_name = os.path.basename(os.path.normpath(repo_path))
     output_file_name = f"{directory_name}_repo_map.md"
     output_path = os.path.join(repo_path, output_file_name)
-    save_tree_map(summary, repo_path, output_path)
-    logger.info(f"Your repo-map has been saved to '{output_file_name}'.")
+    save_tree_map(summary, repo_path, output_path, overview=overview)
+    if stop.is_set():
+        logger.warning(f"The run was interrupted: '{output_file_name}' is partial and {len(pending)} files "
+                       "were not described. Run again with --resume to continue.")
+    else:
+        logger.info(f"Your repo-map has been saved to '{output_file_name}'.")
+
+def install_shutdown_handlers(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]) -> None:
+    """
+    Call `callback` on SIGINT or SIGTERM instead of terminating. Not
+    supported on every platform (e.g. Windows), where signals keep their
+    default behavior.
+    """
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, callback)
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
+
+def remove_shutdown_handlers(loop: asyncio.AbstractEventLoop) -> None:
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.remove_signal_handler(signum)
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
 
 def confirm_disclaimer() -> bool:
     disclaimer_message = (
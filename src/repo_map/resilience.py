@@ -0,0 +1,130 @@
+"""
+Run-wide protection against a failing or slow LLM provider.
+
+CircuitBreaker stops sending requests after sustained failures, so an outage
+costs a few seconds instead of every file's full retry schedule.
+RequestHedger tracks response latency and tells callers when a request has
+taken longer than usual, so a duplicate can be sent to cut the slow tail.
+"""
+
+import bisect
+import time
+import logging
+from collections import deque
+from typing import Deque, List, Optional
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Shared breaker for every LLM request in a run.
+
+    After `failure_threshold` consecutive failed attempts (server errors,
+    timeouts, connection errors; 429s are left to the RateLimiter) the
+    breaker opens and allow() refuses every request for `reset_timeout`
+    seconds. Then a single probe request is let through: success closes the
+    breaker, failure or throttling (record_throttle()) opens it again. A
+    probe that never reports back, e.g. because it was cancelled, is given
+    up after `reset_timeout` seconds and another one is let through.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+
+    def _probe_due(self, now: float) -> bool:
+        if self.state == self.OPEN:
+            return now - self._opened_at >= self.reset_timeout
+        # A half-open breaker whose probe went silent
+        return self.state == self.HALF_OPEN and now - self._probe_started >= self.reset_timeout
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = now if now is not None else time.monotonic()
+        if self._probe_due(now):
+            # Let one probe through; everything else waits for its outcome
+            self.state = self.HALF_OPEN
+            self._probe_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    def available(self, now: Optional[float] = None) -> bool:
+        """
+        Whether allow() would let a request through, without counting a
+        rejection or starting a probe.
+        """
+        if self.state == self.CLOSED:
+            return True
+        now = now if now is not None else time.monotonic()
+        return self._probe_due(now)
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.warning("LLM provider recovered; resuming requests")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self, now: Optional[float] = None) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            self.state = self.OPEN
+            self.trips += 1
+            self._opened_at = now if now is not None else time.monotonic()
+            logger.warning(f"LLM provider failing ({self.failures} consecutive errors); "
+                           f"skipping LLM requests for {self.reset_timeout:g}s")
+
+    def record_throttle(self, now: Optional[float] = None) -> None:
+        """
+        Register a 429. Throttling does not count as a failure, but a
+        throttled probe proves nothing either: the breaker opens again and
+        probes after another `reset_timeout`.
+        """
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self._opened_at = now if now is not None else time.monotonic()
+
+class RequestHedger:
+    """
+    Latency tracker deciding when to hedge a request.
+
+    Keeps the latencies of the last `window` successful requests. Once at
+    least `min_samples` are known, delay() returns their `quantile` (p95 by
+    default): a request still unanswered after that long is in the slow tail,
+    and a duplicate is sent; whichever answers first wins.
+    """
+
+    def __init__(self, quantile: float = 0.95, min_samples: int = 20, window: int = 200,
+                 min_delay: float = 0.05):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float) -> None:
+        if len(self._recent) == self._recent.maxlen:
+            oldest = self._recent[0]
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        self._recent.append(latency)
+        bisect.insort(self._sorted, latency)
+
+    def delay(self) -> Optional[float]:
+        if len(self._sorted) < self.min_samples:
+            return None
+        position = min(len(self._sorted) - 1, int(self.quantile * len(self._sorted)))
+        return max(self.min_delay, self._sorted[position])
@@ -0,0 +1,67 @@
+import re
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from src.repo_map.llm_cassette import request_key
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_TRAILING_SPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+def normalize_prompt(text: str) -> str:
+    """
+    Canonical form of a prompt for deduplication: trailing whitespace and
+    runs of blank lines do not change the answer, so they do not change the key.
+    """
+    return _BLANK_LINES.sub('\n\n', _TRAILING_SPACE.sub('', text)).strip()
+
+def prompt_key(model: str, messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]] = None) -> str:
+    normalized = [dict(message, content=normalize_prompt(message.get('content', ''))) for message in messages]
+    return request_key(model, normalized, response_format)
+
+class ResponseCache:
+    """
+    Completion texts keyed by normalized prompt hash and model, shared by every
+    request in a run.
+
+    Many files produce byte-identical prompts (empty __init__.py files,
+    generated stubs, copies under different paths). The first request for a
+    prompt is sent; identical requests made while it is in flight wait for its
+    result instead of sending their own (singleflight), and later ones are
+    answered from the cache. Failed requests are not cached.
+    """
+
+    def __init__(self):
+        self._responses: Dict[str, str] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        if key in self._responses:
+            self.hits += 1
+            return self._responses[key]
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            # Shielded so a cancelled follower does not cancel the shared request
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        result = None
+        try:
+            result = await fetch()
+            if result is not None:
+                self._responses[key] = result
+            return result
+        finally:
+            # Followers see a failed or cancelled leader as a failed request
+            future.set_result(result)
+            del self._in_flight[key]
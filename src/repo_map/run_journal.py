@@ -0,0 +1,110 @@
+"""
+Run journal for checkpointed, resumable runs.
+
+While a run scans the repository, every analyzed directory is appended to a
+JSON Lines journal next to the cache, together with the file entries the scan
+produced for it. An interrupted run also records the files still waiting for
+an LLM description. A later run started with --resume restores the finished
+directories from the journal instead of reading and analyzing their files
+again; descriptions already received are served by the cache as usual. The
+journal is removed once a run completes.
+"""
+
+import os
+import json
+import threading
+import logging
+from typing import Dict, Any, List, Optional
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = '.repo-map-journal.jsonl'
+
+# Bump when the entry format changes; older journals are not resumed.
+JOURNAL_VERSION = 1
+
+class RunJournal:
+    """
+    Append-only record of a run's progress.
+
+    `finished` maps the relative path of each directory recorded by an
+    earlier run ('' for the root) to its entries, with paths rebuilt under
+    `root_dir`; `pending` lists the files the interrupted run left without a
+    description. record_directory() may be called from the scan thread.
+    """
+
+    def __init__(self, root_dir: str, resume: bool = False, path: Optional[str] = None):
+        self.root_dir = root_dir
+        self.path = path or os.path.join(root_dir, JOURNAL_FILE)
+        self.finished: Dict[str, List[Dict[str, Any]]] = {}
+        self.pending: List[str] = []
+        self._lock = threading.Lock()
+        if resume:
+            if os.path.exists(self.path):
+                self._load()
+            else:
+                logger.warning(f"No run journal at {self.path}; starting a full run")
+        if not self.finished:
+            # Nothing to resume from: start a new journal
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'type': 'run', 'version': JOURNAL_VERSION}) + '\n')
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # The last line is torn if the run was killed mid-write
+                continue
+        if not records or records[0].get('type') != 'run' or records[0].get('version') != JOURNAL_VERSION:
+            logger.warning(f"Ignoring run journal {self.path} written by another version")
+            return
+        for record in records[1:]:
+            if record.get('type') == 'directory':
+                self.finished[record['path']] = [self._absolute(entry) for entry in record['entries']]
+            elif record.get('type') == 'pending':
+                self.pending = [os.path.join(self.root_dir, path) for path in record['paths']]
+
+    def _relative(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(entry, path=os.path.relpath(entry['path'], self.root_dir))
+
+    def _absolute(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(entry, path=os.path.join(self.root_dir, entry['path']))
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(json.dumps(record) + '\n')
+            # Flushed per record so a killed process keeps everything before it
+            self._file.flush()
+
+    def record_directory(self, relative_root: str, entries: List[Dict[str, Any]]) -> None:
+        """
+        Record a directory whose files have been analyzed. Call it before the
+        entries are handed to other threads, as they are serialized here.
+        """
+        self._append({'type': 'directory', 'path': relative_root,
+                      'entries': [self._relative(entry) for entry in entries]})
+
+    def record_pending(self, paths: List[str]) -> None:
+        self._append({'type': 'pending', 'paths': [os.path.relpath(path, self.root_dir) for path in paths]})
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def complete(self) -> None:
+        """
+        Close and remove the journal after a run that finished.
+        """
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"Could not remove run journal {self.path}: {e}")
@@ -0,0 +1,226 @@
+"""
+Importance-ranked scheduling of LLM work.
+
+Cache misses are not described in filesystem-walk order: each job is ranked
+by the importance of its files (how many files in the repository import it,
+how recently git touched it, and its size), and the most important jobs
+start first. Together with an LLMBudget this means a run cut short by a call,
+token or time budget has spent it on the files that matter most.
+"""
+
+import os
+import math
+import heapq
+import asyncio
+import itertools
+import subprocess
+import threading
+import time
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Iterable
+
+from src.repo_map.rate_limiting import LLMBudget
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Commits read by git_recency(); older history does not change the ranking much.
+GIT_HISTORY_LIMIT = 1000
+
+# Age in days at which a file's recency signal has halved.
+RECENCY_HALF_LIFE_DAYS = 30.0
+
+def git_recency(root_dir: str, max_commits: int = GIT_HISTORY_LIMIT) -> Dict[str, float]:
+    """
+    Map absolute file paths to the commit time (epoch seconds) of their most
+    recent change among the last `max_commits` commits. Returns an empty dict
+    outside a git repository or when git is not installed.
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'log', f'-n{max_commits}', '--format=%x00%ct', '--name-only', '--no-renames'],
+            cwd=root_dir, capture_output=True, text=True, timeout=60
+        )
+        top_level = subprocess.run(
+            ['git', 'rev-parse', '--show-toplevel'],
+            cwd=root_dir, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"Git history unavailable for {root_dir}: {e}")
+        return {}
+    if result.returncode != 0 or top_level.returncode != 0:
+        return {}
+
+    git_root = top_level.stdout.strip()
+    recency: Dict[str, float] = {}
+    committed_at = 0.0
+    for line in result.stdout.splitlines():
+        if line.startswith('\x00'):
+            committed_at = float(line[1:] or 0)
+        elif line:
+            # Newest commits come first
+            recency.setdefault(os.path.normpath(os.path.join(git_root, line)), committed_at)
+    return recency
+
+def module_names(path: str, root_dir: Optional[str] = None) -> List[str]:
+    """
+    Dotted names a file can be imported by: every suffix of its path without
+    the extension ('src.repo_map.cache_management', 'repo_map.cache_management',
+    'cache_management'). A package's __init__ is named after its directory.
+    """
+    if root_dir is not None:
+        path = os.path.relpath(path, root_dir)
+    parts = os.path.splitext(os.path.normpath(path))[0].split(os.sep)
+    if parts and parts[-1] in ('__init__', 'index'):
+        parts = parts[:-1]
+    parts = [part for part in parts if part not in ('', '.', '..')]
+    return ['.'.join(parts[start:]) for start in range(len(parts))]
+
+def import_prefixes(name: str) -> List[str]:
+    """
+    Dotted prefixes of an import ('a.b.c' -> 'a', 'a.b', 'a.b.c'). Path-style
+    imports ('./utils/helpers', 'App\\Models\\User') are converted first.
+    """
+    name = name.replace('/', '.').replace('\\', '.').strip('.')
+    parts = [part for part in name.split('.') if part]
+    return ['.'.join(parts[:end]) for end in range(1, len(parts) + 1)]
+
+class ImportanceRanker:
+    """
+    Scores files by importance signals the scan already produces.
+
+    observe() records the imports and sizes of scanned files; it may be
+    called from the scan thread while scores are read on the event loop.
+    Import fan-in counts how many files import a module matching one of the
+    file's module_names(), so it grows as the scan discovers importers;
+    PriorityWorkQueue re-ranks pending work once the scan is complete.
+    """
+
+    def __init__(self, root_dir: Optional[str] = None, recency: Optional[Dict[str, float]] = None,
+                 fan_in_weight: float = 2.0, recency_weight: float = 1.5, size_weight: float = 0.5):
+        self.root_dir = root_dir
+        self.recency = recency or {}
+        self.fan_in_weight = fan_in_weight
+        self.recency_weight = recency_weight
+        self.size_weight = size_weight
+        self._imported = Counter()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def set_recency(self, recency: Dict[str, float]) -> None:
+        self.recency = recency
+
+    def observe(self, files: Iterable[Dict[str, Any]]) -> None:
+        """
+        Record the imports and size of each scanned file. Reads file sizes,
+        so call it off the event loop.
+        """
+        counts = Counter()
+        sizes = {}
+        for file in files:
+            # Each importing file counts once per module
+            counts.update({prefix for name in file.get('imports') or [] for prefix in import_prefixes(name)})
+            try:
+                sizes[file['path']] = os.path.getsize(file['path'])
+            except OSError:
+                sizes[file['path']] = 0
+        with self._lock:
+            self._imported.update(counts)
+            self._sizes.update(sizes)
+
+    def fan_in(self, file: Dict[str, Any]) -> int:
+        with self._lock:
+            return max((self._imported[name] for name in module_names(file['path'], self.root_dir)), default=0)
+
+    def score(self, file: Dict[str, Any], now: Optional[float] = None) -> float:
+        now = now if now is not None else time.time()
+        score = self.fan_in_weight * math.log1p(self.fan_in(file))
+        changed_at = self.recency.get(os.path.normpath(file['path']))
+        if changed_at is not None:
+            age_days = max(0.0, now - changed_at) / 86400.0
+            score += self.recency_weight * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+        with self._lock:
+            size = self._sizes.get(file['path'], 0)
+        return score + self.size_weight * math.log1p(size / 1024.0)
+
+class PriorityWorkQueue:
+    """
+    Runs submitted jobs highest priority first.
+
+    A job is an async callable with the files it describes; its priority is
+    the best score among them. At most `limit()` jobs run at once, so jobs
+    submitted later can still overtake pending ones. Once `budget` is
+    exhausted no further jobs start; pending ones are dropped and counted in
+    `skipped`.
+    """
+
+    def __init__(self, score: Callable[[Dict[str, Any]], float], limit: Callable[[], int],
+                 budget: Optional[LLMBudget] = None):
+        self._score = score
+        self._limit = limit
+        self.budget = budget
+        self._heap: List[Any] = []
+        self._order = itertools.count()
+        self._closed = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self.skipped = 0
+
+    def _priority(self, files: List[Dict[str, Any]]) -> float:
+        return max((self._score(file) for file in files), default=0.0)
+
+    def _notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def submit(self, job: Callable[[], Awaitable[None]], files: List[Dict[str, Any]]) -> None:
+        heapq.heappush(self._heap, (-self._priority(files), next(self._order), files, job))
+        self._notify()
+
+    def close(self, rerank: bool = True) -> None:
+        """
+        Signal that no more jobs will be submitted, re-ranking pending jobs
+        with the now complete importance signals.
+        """
+        if rerank:
+            self._heap = [(-self._priority(files), order, files, job) for _, order, files, job in self._heap]
+            heapq.heapify(self._heap)
+        self._closed = True
+        self._notify()
+
+    async def run(self) -> None:
+        """
+        Run jobs until the queue is closed and drained. A failing job cancels
+        the running ones and its exception is raised.
+        """
+        self._wakeup = asyncio.Event()
+        running = set()
+        done: List[asyncio.Task] = []
+
+        def finished(task: asyncio.Task) -> None:
+            running.discard(task)
+            done.append(task)
+            self._wakeup.set()
+
+        try:
+            while True:
+                self._wakeup.clear()
+                if self.budget is not None and self.budget.exhausted and self._heap:
+                    self.skipped += sum(len(files) for _, _, files, _ in self._heap)
+                    self._heap = []
+                while self._heap and len(running) < max(1, self._limit()):
+                    _, _, _, job = heapq.heappop(self._heap)
+                    task = asyncio.ensure_future(job())
+                    running.add(task)
+                    task.add_done_callback(finished)
+                while done:
+                    done.pop().result()
+                if self._closed and not self._heap and not running:
+                    break
+                await self._wakeup.wait()
+        finally:
+            for task in running:
+                task.cancel()
@@ -3,12 +3,30 @@ import sys
 import unittest
 import sqlite3
 import json
+import shutil
+import threading
 from pathlib import Path
 
 # Add src directory to Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.repo_map.cache_management import load_cache
+from src.repo_map.cache_management import (
+    load_cache,
+    touch_cache_entries,
+    gc_cache,
+    compact_cache,
+    list_existing_paths,
+    load_global_cache,
+    prune_global_cache,
+    description_key,
+    SqliteCacheBackend,
+    MemoryCacheBackend,
+    TieredCacheBackend,
+    WriteBehindCacheBackend,
+    FILES,
+    ANALYSES,
+    DESCRIPTIONS
+)
 
 class TestCacheManagement(unittest.TestCase):
     def setUp(self):
@@ -47,7 +65,12 @@ class TestCacheManagement(unittest.TestCase):
             'description',
             'developer_consideration',
             'imports',
-            'functions'
+            'functions',
+            'classes',
+            'constants',
+            'last_seen',
+            'fingerprint',
+            'symbol_hashes'
         }
         self.assertEqual(expected_columns, columns)
 
@@ -148,5 +171,287 @@ class TestCacheManagement(unittest.TestCase):
         self.assertEqual(row[0], test_data['path'])
         self.assertEqual(row[1], test_data['hash'])
 
+    def test_descriptions_for_multiple_models_coexist(self):
+        self.cache_conn = load_cache(self.test_dir)
+        cache = SqliteCacheBackend(self.cache_conn)
+        cache.put_many(DESCRIPTIONS, {
+            description_key('fp1', 'model-a', '1'): {'description': 'From A', 'developer_consideration': 'A'},
+            description_key('fp1', 'vendor/model-b:free', '1'): {'description': 'From B', 'developer_consideration': 'B'}
+        })
+
+        self.assertEqual(cache.get(DESCRIPTIONS, description_key('fp1', 'model-a', '1'))['description'], 'From A')
+        self.assertEqual(cache.get(DESCRIPTIONS, description_key('fp1', 'vendor/model-b:free', '1'))['description'], 'From B')
+        self.assertIsNone(cache.get(DESCRIPTIONS, description_key('fp1', 'model-a', '2')))
+        self.assertIsNone(cache.get(DESCRIPTIONS, description_key('fp2', 'model-a', '1')))
+
+        # Regenerating replaces the entry for that configuration only
+        cache.put(DESCRIPTIONS, description_key('fp1', 'model-a', '1'), {'description': 'Newer A', 'developer_consideration': 'A'})
+        self.assertEqual(cache.get(DESCRIPTIONS, description_key('fp1', 'model-a', '1'))['description'], 'Newer A')
+        self.assertEqual(cache.get(DESCRIPTIONS, description_key('fp1', 'vendor/model-b:free', '1'))['description'], 'From B')
+
+    def test_sqlite_backend_round_trips_namespaces(self):
+        self.cache_conn = load_cache(self.test_dir)
+        cache = SqliteCacheBackend(self.cache_conn)
+        cache.put(FILES, '/test/backend/a.py', {
+            'hash': 'h1',
+            'description': 'File A',
+            'imports': ['os'],
+            'functions': ['run'],
+            'classes': {'Runner': ['start']},
+            'constants': []
+        })
+        cache.put(ANALYSES, 'h1', {'functions': ['run'], 'docstring': 'Doc'})
+
+        found = cache.get_many(FILES, ['/test/backend/a.py', '/test/backend/missing.py'])
+        self.assertEqual(list(found), ['/test/backend/a.py'])
+        self.assertEqual(found['/test/backend/a.py']['classes'], {'Runner': ['start']})
+        self.assertEqual(found['/test/backend/a.py']['imports'], ['os'])
+        self.assertEqual(cache.get(ANALYSES, 'h1')['docstring'], 'Doc')
+
+        cache.delete(FILES, ['/test/backend/a.py'])
+        self.assertIsNone(cache.get(FILES, '/test/backend/a.py'))
+
+    def test_tiered_backend_falls_through_and_backfills(self):
+        primary = MemoryCacheBackend()
+        shared = MemoryCacheBackend()
+        cache = TieredCacheBackend(primary, [shared])
+        key = description_key('fp', 'model', '1')
+        shared.put(DESCRIPTIONS, key, {'description': 'Shared'})
+
+        self.assertEqual(cache.get(DESCRIPTIONS, key)['description'], 'Shared')
+        self.assertEqual(primary.get(DESCRIPTIONS, key)['description'], 'Shared')
+
+        # Path-keyed entries never leave the primary backend
+        cache.put(FILES, '/test/tiered.py', {'hash': 'h'})
+        self.assertIsNotNone(primary.get(FILES, '/test/tiered.py'))
+        self.assertIsNone(shared.get(FILES, '/test/tiered.py'))
+
+        # Content-addressed writes reach every tier, deletes stay local
+        cache.put(ANALYSES, 'h', {'functions': []})
+        self.assertIsNotNone(shared.get(ANALYSES, 'h'))
+        cache.delete(ANALYSES, ['h'])
+        self.assertIsNone(primary.get(ANALYSES, 'h'))
+        self.assertIsNotNone(shared.get(ANALYSES, 'h'))
+
+    def test_write_behind_group_commits_queued_writes(self):
+        class RecordingBackend(MemoryCacheBackend):
+            def __init__(self):
+                super().__init__()
+                self.writes = []
+                self.reads = 0
+                self.release = threading.Event()
+
+            def write_many(self, puts=None, deletes=None):
+                self.release.wait()
+                self.writes.append((puts, deletes))
+                super().write_many(puts, deletes)
+
+            def get_many(self, namespace, keys):
+                self.reads += 1
+                return super().get_many(namespace, keys)
+
+        backend = RecordingBackend()
+        backend.release.set()
+        backend.put(FILES, '/test/behind/old.py', {'hash': 'old'})
+        backend.writes.clear()
+        backend.release.clear()
+
+        cache = WriteBehindCacheBackend(backend)
+        cache.prefetch(FILES)
+        # The writer is held up by its first write; the rest queue behind it
+        cache.put(FILES, '/test/behind/first.py', {'hash': 'h0'})
+        for i in range(1, 20):
+            cache.put(FILES, f'/test/behind/{i}.py', {'hash': f'h{i}'})
+        cache.put(ANALYSES, 'h1', {'functions': []})
+        cache.delete(FILES, ['/test/behind/1.py'])
+
+        # Reads see queued writes and prefetched entries without touching the backend
+        self.assertEqual(cache.get(FILES, '/test/behind/19.py')['hash'], 'h19')
+        self.assertEqual(cache.get(FILES, '/test/behind/old.py')['hash'], 'old')
+        self.assertIsNone(cache.get(FILES, '/test/behind/1.py'))
+        self.assertEqual(backend.reads, 0)
+
+        backend.release.set()
+        cache.flush()
+        self.assertLessEqual(len(backend.writes), 2)
+        self.assertEqual(backend.get(FILES, '/test/behind/19.py')['hash'], 'h19')
+        self.assertIsNone(backend.get(FILES, '/test/behind/1.py'))
+        self.assertIsNotNone(backend.get(ANALYSES, 'h1'))
+        cache.close()
+
+    def test_sqlite_write_many_commits_once(self):
+        self.cache_conn = load_cache(self.test_dir)
+        cache = SqliteCacheBackend(self.cache_conn)
+        cache.put(FILES, '/test/group/stale.py', {'hash': 'old'})
+        cache.write_many(
+            puts={
+                FILES: {'/test/group/a.py': {'hash': 'h1', 'imports': ['os']}},
+                ANALYSES: {'h1': {'functions': ['run']}},
+            },
+            deletes={FILES: ['/test/group/stale.py']}
+        )
+        self.assertEqual(cache.get(FILES, '/test/group/a.py')['imports'], ['os'])
+        self.assertEqual(cache.get(ANALYSES, 'h1')['functions'], ['run'])
+        self.assertIsNone(cache.get(FILES, '/test/group/stale.py'))
+
+    def _insert_rows(self, paths):
+        cursor = self.cache_conn.cursor()
+        for path in paths:
+            cursor.execute(
+                "INSERT OR REPLACE INTO cache (path, hash, description) VALUES (?, ?, ?)",
+                (path, 'hash-' + path, 'Description of ' + path)
+            )
+        self.cache_conn.commit()
+
+    def _cached_paths(self):
+        cursor = self.cache_conn.cursor()
+        cursor.execute("SELECT path FROM cache ORDER BY path")
+        return [row[0] for row in cursor.fetchall()]
+
+    def test_gc_evicts_unseen_paths(self):
+        self.cache_conn = load_cache(self.test_dir)
+        self._insert_rows(['/test/gc/kept.py', '/test/gc/deleted.py', '/test/gc/renamed.py'])
+
+        removed = gc_cache(self.cache_conn, live_paths=['/test/gc/kept.py', '/test/gc/new_name.py'])
+
+        self.assertEqual(removed, 2)
+        self.assertEqual(self._cached_paths(), ['/test/gc/kept.py'])
+
+    def test_gc_keeps_descriptions_by_fingerprint(self):
+        self.cache_conn = load_cache(self.test_dir)
+        cache = SqliteCacheBackend(self.cache_conn)
+        cache.put(FILES, '/test/gc/module.py', {'hash': 'content-2', 'fingerprint': 'fp-1'})
+        cache.put_many(DESCRIPTIONS, {
+            description_key('fp-1', 'model-a', '1'): {'description': 'Still valid'},
+            description_key('fp-old', 'model-a', '1'): {'description': 'Orphaned'}
+        })
+
+        gc_cache(self.cache_conn, live_paths=['/test/gc/module.py'])
+
+        # A reformatted file keeps its description while the fingerprint is unchanged
+        self.assertEqual(cache.get(DESCRIPTIONS, description_key('fp-1', 'model-a', '1'))['description'], 'Still valid')
+        self.assertIsNone(cache.get(DESCRIPTIONS, description_key('fp-old', 'model-a', '1')))
+
+    def test_existing_paths_are_absolute(self):
+        self.cache_conn = load_cache(self.test_dir)
+        repo = os.path.join(self.test_dir, 'gc_repo')
+        os.makedirs(os.path.join(repo, 'pkg'), exist_ok=True)
+        with open(os.path.join(repo, 'pkg', 'mod.py'), 'w') as f:
+            f.write("VALUE = 1\n")
+        existing = os.path.abspath(os.path.join(repo, 'pkg', 'mod.py'))
+        # A relative path from an older version exists from test_output, but
+        # is not resolved against any guessed base
+        self._insert_rows([existing, os.path.join(repo, 'pkg', 'gone.py'), os.path.join('gc_repo', 'pkg', 'mod.py')])
+        previous = os.getcwd()
+        try:
+            os.chdir(self.test_dir)
+            live = list_existing_paths(self.cache_conn)
+        finally:
+            os.chdir(previous)
+            shutil.rmtree(repo, ignore_errors=True)
+        self.assertEqual(live, [existing])
+
+    def test_gc_keeps_content_when_no_file_is_cached(self):
+        self.cache_conn = load_cache(self.test_dir)
+        cache = SqliteCacheBackend(self.cache_conn)
+        # A seeded cache: content without any file rows
+        cache.put(ANALYSES, 'hash-1', {'functions': ['run']})
+        cache.put(DESCRIPTIONS, description_key('fp-1', 'model-a', '1'), {'description': 'Seeded'})
+
+        gc_cache(self.cache_conn, live_paths=[])
+
+        self.assertEqual(cache.get(ANALYSES, 'hash-1')['functions'], ['run'])
+        self.assertEqual(cache.get(DESCRIPTIONS, description_key('fp-1', 'model-a', '1'))['description'], 'Seeded')
+
+    def test_gc_enforces_lru_cap(self):
+        self.cache_conn = load_cache(self.test_dir)
+        self._insert_rows(['/test/lru/a.py', '/test/lru/b.py', '/test/lru/c.py'])
+        touch_cache_entries(self.cache_conn, ['/test/lru/a.py'], timestamp=100.0)
+        touch_cache_entries(self.cache_conn, ['/test/lru/b.py'], timestamp=300.0)
+        touch_cache_entries(self.cache_conn, ['/test/lru/c.py'], timestamp=200.0)
+
+        removed = gc_cache(self.cache_conn, max_entries=2)
+
+        self.assertEqual(removed, 1)
+        self.assertEqual(self._cached_paths(), ['/test/lru/b.py', '/test/lru/c.py'])
+
+    def test_compact_cache_enables_incremental_vacuum(self):
+        # Simulate a cache created before auto_vacuum was enabled
+        legacy_conn = sqlite3.connect(self.cache_file)
+        legacy_conn.execute("""
+            CREATE TABLE cache (
+                path TEXT PRIMARY KEY,
+                hash TEXT,
+                description TEXT,
+                imports TEXT,
+                functions TEXT
+            )
+        """)
+        legacy_conn.commit()
+        legacy_conn.close()
+
+        self.cache_conn = load_cache(self.test_dir)
+        self._insert_rows(['/test/compact/%d.py' % i for i in range(200)])
+        gc_cache(self.cache_conn, live_paths=[])
+        compact_cache(self.cache_conn)
+
+        cursor = self.cache_conn.cursor()
+        cursor.execute("PRAGMA auto_vacuum")
+        self.assertEqual(cursor.fetchone()[0], 2)
+        cursor.execute("PRAGMA freelist_count")
+        self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(self._cached_paths(), [])
+
+    def test_global_cache_shared_between_connections(self):
+        global_dir = os.path.join(self.test_dir, 'global_cache')
+        shutil.rmtree(global_dir, ignore_errors=True)
+
+        # Two checkouts of the same repository open the shared store at once
+        first = SqliteCacheBackend(load_global_cache(global_dir), track_usage=True)
+        second = SqliteCacheBackend(load_global_cache(global_dir), track_usage=True)
+        try:
+            first.put(ANALYSES, 'content-hash', {
+                'classes': {'Widget': ['render']},
+                'functions': ['build'],
+                'constants': ['LIMIT'],
+                'imports': ['os'],
+                'docstring': 'Module docstring'
+            })
+            first.put(DESCRIPTIONS, description_key('content-hash', 'model-a', '1'), {
+                'description': 'Shared description',
+                'developer_consideration': 'Shared consideration'
+            })
+
+            analysis = second.get(ANALYSES, 'content-hash')
+            self.assertEqual(analysis['classes'], {'Widget': ['render']})
+            self.assertEqual(analysis['functions'], ['build'])
+            self.assertEqual(analysis['docstring'], 'Module docstring')
+            cached = second.get(DESCRIPTIONS, description_key('content-hash', 'model-a', '1'))
+            self.assertEqual(cached['description'], 'Shared description')
+            self.assertIsNone(second.get(ANALYSES, 'other-hash'))
+        finally:
+            first.close()
+            second.close()
+
+    def test_prune_global_cache_keeps_recently_used(self):
+        global_dir = os.path.join(self.test_dir, 'global_cache')
+        shutil.rmtree(global_dir, ignore_errors=True)
+        conn = load_global_cache(global_dir)
+        cache = SqliteCacheBackend(conn)
+        try:
+            for name in ('old', 'recent', 'newest'):
+                cache.put(ANALYSES, name, {'functions': [name]})
+            conn.execute("UPDATE analyses SET last_used = 100 WHERE hash = 'old'")
+            conn.execute("UPDATE analyses SET last_used = 200 WHERE hash = 'recent'")
+            conn.execute("UPDATE analyses SET last_used = 300 WHERE hash = 'newest'")
+            conn.commit()
+
+            self.assertEqual(prune_global_cache(conn, max_entries=2), 1)
+            self.assertIsNone(cache.get(ANALYSES, 'old'))
+            self.assertIsNotNone(cache.get(ANALYSES, 'recent'))
+            self.assertIsNotNone(cache.get(ANALYSES, 'newest'))
+        finally:
+            conn.close()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.cache_management import (
+    HttpCacheBackend,
+    MemoryCacheBackend,
+    TieredCacheBackend,
+    description_key,
+    ANALYSES,
+    DESCRIPTIONS,
+    FILES
+)
+from src.repo_map.cache_server import serve_cache
+
+class TestCacheServer(unittest.TestCase):
+    def setUp(self):
+        self.server, self.thread = serve_cache(port=0, token='secret')
+        host, port = self.server.server_address[:2]
+        self.base_url = f"http://{host}:{port}"
+        self.backend = HttpCacheBackend(self.base_url, token='secret', timeout=5)
+
+    def tearDown(self):
+        self.backend.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_get_put_delete_round_trip(self):
+        key = description_key('fingerprint', 'vendor/model:free', '1')
+        self.assertEqual(self.backend.get_many(DESCRIPTIONS, [key]), {})
+
+        self.backend.put_many(DESCRIPTIONS, {key: {'description': 'Remote', 'developer_consideration': 'None'}})
+        self.assertEqual(self.backend.get(DESCRIPTIONS, key)['description'], 'Remote')
+
+        self.backend.delete(DESCRIPTIONS, [key])
+        self.assertIsNone(self.backend.get(DESCRIPTIONS, key))
+
+    def test_batches_large_requests(self):
+        self.backend.batch_size = 7
+        items = {f"hash-{i}": {'functions': [f"f{i}"]} for i in range(30)}
+        self.backend.put_many(ANALYSES, items)
+
+        found = self.backend.get_many(ANALYSES, list(items) + ['missing'])
+        self.assertEqual(found, items)
+
+    def test_rejects_bad_token_and_path_namespaces(self):
+        anonymous = HttpCacheBackend(self.base_url, timeout=5)
+        try:
+            anonymous.put(ANALYSES, 'hash', {'functions': []})
+            self.assertIsNone(self.backend.get(ANALYSES, 'hash'))
+        finally:
+            anonymous.close()
+
+        # Path-keyed entries are repository specific and never shared
+        self.backend.put(FILES, '/repo/a.py', {'hash': 'h'})
+        self.assertIsNone(self.backend.get(FILES, '/repo/a.py'))
+
+    def test_remote_tier_warms_local_cache(self):
+        key = description_key('fingerprint', 'model', '1')
+        self.backend.put(DESCRIPTIONS, key, {'description': 'From CI'})
+
+        local = MemoryCacheBackend()
+        cache = TieredCacheBackend(local, [self.backend])
+        self.assertEqual(cache.get(DESCRIPTIONS, key)['description'], 'From CI')
+        self.assertEqual(local.get(DESCRIPTIONS, key)['description'], 'From CI')
+
+    def test_unreachable_server_is_a_cache_miss(self):
+        backend = HttpCacheBackend('http://127.0.0.1:9', timeout=0.5)
+        try:
+            self.assertEqual(backend.get_many(ANALYSES, ['hash']), {})
+            backend.put(ANALYSES, 'hash', {'functions': []})
+        finally:
+            backend.close()
+
+if __name__ == '__main__':
+    unittest.main()
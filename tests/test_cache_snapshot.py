@@ -0,0 +1,147 @@
+import os
+import sys
+import gzip
+import json
+import shutil
+import asyncio
+import unittest
+from unittest.mock import patch
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.cache_management import (
+    load_cache,
+    description_key,
+    SqliteCacheBackend,
+    MemoryCacheBackend,
+    FILES,
+    ANALYSES,
+    DESCRIPTIONS
+)
+from src.repo_map.cache_snapshot import export_snapshot, import_snapshot
+from src.repo_map.llm_interaction import enhance_repo_with_llm
+from src.repo_map.output_generation import save_tree_map
+from src.repo_map.repo_map import summarize_repo, collect_cache_garbage
+
+class TestCacheSnapshot(unittest.TestCase):
+    def setUp(self):
+        # Use existing test_output directory
+        self.test_dir = os.path.join(os.path.dirname(__file__), 'test_output')
+        self.snapshot_path = os.path.join(self.test_dir, 'cache_snapshot.jsonl.gz')
+        self.cache_file = os.path.join(self.test_dir, '.repo-map-cache.db')
+        if os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
+
+    def test_export_import_round_trip(self):
+        cache_conn = load_cache(self.test_dir)
+        source = SqliteCacheBackend(cache_conn)
+        try:
+            source.put(FILES, '/checkout/a.py', {'hash': 'h1'})
+            source.put(ANALYSES, 'h1', {'functions': ['run'], 'docstring': 'Doc'})
+            source.put(DESCRIPTIONS, description_key('h1', 'vendor/model:free', '1'), {
+                'description': 'Runs things',
+                'developer_consideration': 'Keep it fast',
+                'created_at': 100.0
+            })
+
+            self.assertEqual(export_snapshot(source, self.snapshot_path), 2)
+        finally:
+            source.close()
+
+        # The snapshot is line-oriented JSON behind a header
+        with gzip.open(self.snapshot_path, 'rt', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(lines[0]['format'], 'repo-map-cache-snapshot')
+        self.assertEqual({line['namespace'] for line in lines[1:]}, {ANALYSES, DESCRIPTIONS})
+
+        target = MemoryCacheBackend()
+        self.assertEqual(import_snapshot(target, self.snapshot_path), (2, 0))
+        self.assertEqual(target.get(ANALYSES, 'h1')['functions'], ['run'])
+        cached = target.get(DESCRIPTIONS, description_key('h1', 'vendor/model:free', '1'))
+        self.assertEqual(cached['description'], 'Runs things')
+        # Path-keyed entries belong to the exporting checkout only
+        self.assertIsNone(target.get(FILES, '/checkout/a.py'))
+
+    def test_import_keeps_fresher_descriptions(self):
+        key_old = description_key('h1', 'model', '1')
+        key_new = description_key('h2', 'model', '1')
+        source = MemoryCacheBackend()
+        source.put(DESCRIPTIONS, key_old, {'description': 'Snapshot old', 'created_at': 100.0})
+        source.put(DESCRIPTIONS, key_new, {'description': 'Snapshot new', 'created_at': 300.0})
+        source.put(ANALYSES, 'h1', {'functions': ['from_snapshot']})
+        export_snapshot(source, self.snapshot_path)
+
+        target = MemoryCacheBackend()
+        target.put(DESCRIPTIONS, key_old, {'description': 'Local', 'created_at': 200.0})
+        target.put(DESCRIPTIONS, key_new, {'description': 'Local', 'created_at': 200.0})
+        target.put(ANALYSES, 'h1', {'functions': ['local']})
+
+        self.assertEqual(import_snapshot(target, self.snapshot_path, batch_size=1), (1, 2))
+        self.assertEqual(target.get(DESCRIPTIONS, key_old)['description'], 'Local')
+        self.assertEqual(target.get(DESCRIPTIONS, key_new)['description'], 'Snapshot new')
+        self.assertEqual(target.get(ANALYSES, 'h1')['functions'], ['local'])
+
+    def test_import_rejects_foreign_files(self):
+        with gzip.open(self.snapshot_path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'format': 'something-else'}) + '\n')
+        with self.assertRaises(ValueError):
+            import_snapshot(MemoryCacheBackend(), self.snapshot_path)
+
+    def test_imported_descriptions_are_served_without_a_key(self):
+        root = os.path.join(self.test_dir, 'snapshot_run')
+        repo = os.path.join(root, 'repo')
+        shutil.rmtree(root, ignore_errors=True)
+        os.makedirs(repo)
+        os.makedirs(os.path.join(root, 'source'))
+        os.makedirs(os.path.join(root, 'target'))
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        with open(os.path.join(repo, 'module.py'), 'w') as f:
+            f.write("def run():\n    return 1\n")
+
+        async def describe(structure, index, file, model, **kwargs):
+            file['description'] = 'Runs the module'
+            file['developer_consideration'] = 'Keep it small'
+            return True
+
+        async def fail(*args, **kwargs):
+            raise AssertionError('no LLM request is expected without a key')
+
+        # Describe the repository once and export the cache
+        source_conn = load_cache(os.path.join(root, 'source'))
+        summary = summarize_repo(repo, SqliteCacheBackend(source_conn))
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.get_llm_descriptions', describe):
+            asyncio.run(enhance_repo_with_llm(summary, SqliteCacheBackend(source_conn), model_name='model'))
+        collect_cache_garbage(source_conn, summary)
+        # A description for a file this checkout does not have (another branch)
+        other_key = description_key('other-branch', 'model', '1')
+        SqliteCacheBackend(source_conn).put(DESCRIPTIONS, other_key, {'description': 'Elsewhere'})
+        export_snapshot(SqliteCacheBackend(source_conn), self.snapshot_path)
+        source_conn.close()
+
+        # Seed a fresh cache and run without an API key
+        target_conn = load_cache(os.path.join(root, 'target'))
+        target = SqliteCacheBackend(target_conn)
+        import_snapshot(target, self.snapshot_path)
+        summary = summarize_repo(repo, target)
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': ''}), \
+                patch('src.repo_map.llm_interaction.get_llm_descriptions', fail):
+            asyncio.run(enhance_repo_with_llm(summary, target, model_name='model'))
+        collect_cache_garbage(target_conn, summary)
+
+        output_path = os.path.join(root, 'repo_map.md')
+        save_tree_map(summary, repo, output_path)
+        with open(output_path) as f:
+            content = f.read()
+        self.assertIn('Description: Runs the module', content)
+        self.assertIn('Developer Consideration: "Keep it small"', content)
+        # Garbage collection keeps the imported descriptions, including
+        # the one no file refers to yet
+        cursor = target_conn.cursor()
+        cursor.execute("SELECT description FROM descriptions ORDER BY description")
+        self.assertEqual([row[0] for row in cursor.fetchall()], ['Elsewhere', 'Runs the module'])
+        target_conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
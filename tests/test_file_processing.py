@@ -11,8 +11,11 @@ from src.repo_map.file_processing import (
     should_ignore,
     compute_file_hash,
     get_python_structure,
+    get_python_symbols,
+    get_python_excerpts,
     get_java_structure,
     get_javascript_structure,
+    get_go_structure,
     get_module_docstring,
     get_imports,
     SUPPORTED_LANGUAGES
@@ -115,6 +118,126 @@ def function2():
         # Verify constants
         self.assertIn('CONSTANT', constants)
 
+    def test_python_symbols(self):
+        python_content = """import functools
+
+LIMIT = 3
+
+@functools.lru_cache()
+def cached(value):
+    return value * 2
+
+class Worker:
+    def run(self):
+        return cached(LIMIT)
+
+async def fetch():
+    return LIMIT
+"""
+        python_file = os.path.join(self.test_dir, 'symbols.py')
+        with open(python_file, 'w') as f:
+            f.write(python_content)
+
+        symbols = get_python_symbols(python_file)
+        self.assertEqual([(symbol['name'], symbol['kind']) for symbol in symbols],
+                         [('cached', 'function'), ('Worker', 'class'), ('fetch', 'function')])
+        # Decorators belong to the symbol's source segment
+        self.assertTrue(symbols[0]['source'].startswith('@functools.lru_cache()'))
+        self.assertIn('return cached(LIMIT)', symbols[1]['source'])
+
+        # Editing one function changes only that symbol's hash
+        with open(python_file, 'w') as f:
+            f.write(python_content.replace('value * 2', 'value * 3'))
+        edited = get_python_symbols(python_file)
+        self.assertNotEqual(edited[0]['hash'], symbols[0]['hash'])
+        self.assertEqual(edited[1]['hash'], symbols[1]['hash'])
+
+    def test_python_excerpts(self):
+        python_content = """\"\"\"Storage helpers.
+
+Details that are not part of the summary.
+\"\"\"
+
+def _helper(): pass
+
+class Store(Base):  # the main class
+    \"\"\"Keeps records.\"\"\"
+    def __init__(self, path,
+                 limit=10):
+        self.path = path
+
+    def _flush(self):
+        \"\"\"Write pending records.\"\"\"
+
+async def load(path: str) -> Store:
+    \"\"\"Load a store.
+    More detail.\"\"\"
+"""
+        python_file = os.path.join(self.test_dir, 'excerpts.py')
+        with open(python_file, 'w') as f:
+            f.write(python_content)
+
+        self.assertEqual(get_python_excerpts(python_file), [
+            'Storage helpers.',
+            'class Store(Base): Keeps records.',
+            'async def load(path: str) -> Store: Load a store.',
+            'def Store.__init__(self, path, limit=10)',
+            'def _helper()',
+            'def Store._flush(self): Write pending records.'
+        ])
+
+    def test_go_structure_and_imports(self):
+        go_content = """// Package server serves the API.
+package server
+
+import (
+\t"fmt"
+\tlog "github.com/sirupsen/logrus"
+)
+
+const Version = "1"
+
+const (
+\tDefaultPort = 8080
+\tmaxConns    = 10
+)
+
+type Server struct {
+\tport int
+}
+
+type (
+\tInner struct {
+\t\tvalue string
+\t}
+\tOther interface {
+\t\tServe() error
+\t}
+\tID = string
+)
+
+func New(port int) *Server { return &Server{port: port} }
+
+func (s *Server) Start() error {
+\tfmt.Println("start")
+\treturn nil
+}
+"""
+        go_file = os.path.join(self.test_dir, 'server.go')
+        with open(go_file, 'w') as f:
+            f.write(go_content)
+
+        classes, functions, constants = get_go_structure(go_file)
+        self.assertEqual(classes, {'Server': ['Start'], 'Inner': [], 'Other': [], 'ID': []})
+        self.assertEqual(functions, ['New'])
+        self.assertEqual(constants, ['Version', 'DefaultPort', 'maxConns'])
+        self.assertEqual(get_imports(go_file, 'Go'), ['fmt', 'github.com/sirupsen/logrus'])
+
+        ts_file = os.path.join(self.test_dir, 'widget.ts')
+        with open(ts_file, 'w') as f:
+            f.write("import { Component } from '@angular/core'\nimport helpers from \"./util-helpers\";\n")
+        self.assertEqual(get_imports(ts_file, 'TypeScript'), ['@angular/core', './util-helpers'])
+
     def test_module_docstring(self):
         # Create a test Python file with docstring
         python_content = """\"\"\"
@@ -1,4 +1,5 @@
 import os
+import json
 import sys
 import unittest
 import asyncio
@@ -10,8 +11,19 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.repo_map.llm_interaction import (
     parse_llm_response,
-    get_llm_descriptions
+    get_llm_descriptions,
+    enhance_repo_with_llm,
+    plan_batches,
+    parse_batch_response,
+    parse_structured_response,
+    response_end,
+    directory_fingerprint,
+    build_directory_details,
+    build_file_details,
+    PROMPT_VERSION
 )
+from src.repo_map.llm_providers import get_provider
+from src.repo_map.cache_management import load_cache, gc_cache, description_key, MemoryCacheBackend, FILES, DESCRIPTIONS
 
 def async_test(coro):
     def wrapper(*args, **kwargs):
@@ -101,5 +113,522 @@ class TestLLMInteraction(unittest.TestCase):
         self.assertNotIn('description', test_file)
         self.assertNotIn('developer_consideration', test_file)
 
+    @async_test
+    async def test_enhance_repo_with_llm_keys_cache_by_model(self):
+        cache_file = os.path.join(self.test_dir, '.repo-map-cache.db')
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+        cache_conn = load_cache(self.test_dir)
+        calls = []
+
+        async def fake_get_llm_descriptions(structure, index, file, model, max_retries=3, session=None, **kwargs):
+            calls.append(model)
+            file['description'] = f"Described by {model}"
+            file['developer_consideration'] = "None"
+            return True
+
+        def make_structure():
+            return [{
+                'name': 'module.py',
+                'path': '/test/enhance/module.py',
+                'type': 'file',
+                'language': 'Python',
+                'hash': 'content-hash',
+                'level': 0
+            }]
+
+        try:
+            with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                    patch('src.repo_map.llm_interaction.get_llm_descriptions', fake_get_llm_descriptions):
+                structure = make_structure()
+                await enhance_repo_with_llm(structure, cache_conn, model_name='model-a')
+                self.assertEqual(structure[0]['description'], 'Described by model-a')
+
+                # Switching models must not serve model-a's text
+                structure = make_structure()
+                await enhance_repo_with_llm(structure, cache_conn, model_name='model-b')
+                self.assertEqual(structure[0]['description'], 'Described by model-b')
+
+                # Both results stay cached side by side
+                for model in ('model-a', 'model-b'):
+                    structure = make_structure()
+                    await enhance_repo_with_llm(structure, cache_conn, model_name=model)
+                    self.assertEqual(structure[0]['description'], f'Described by {model}')
+        finally:
+            cache_conn.close()
+
+        self.assertEqual(calls, ['model-a', 'model-b'])
+
+    @async_test
+    async def test_enhance_repo_with_llm_bounds_concurrency(self):
+        cache = MemoryCacheBackend()
+        in_flight = 0
+        peak = 0
+
+        async def fake_get_llm_descriptions(structure, index, file, model, max_retries=3, session=None, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # Later files finish first, so completion order differs from file order
+            await asyncio.sleep(0.001 * (20 - index))
+            in_flight -= 1
+            file['description'] = f"Description {index}"
+            return True
+
+        structure = [{
+            'name': f'module_{i}.py',
+            'path': f'/test/concurrency/module_{i}.py',
+            'type': 'file',
+            'language': 'Python',
+            'hash': f'hash-{i}',
+            'level': 0
+        } for i in range(20)]
+
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.get_llm_descriptions', fake_get_llm_descriptions):
+            await enhance_repo_with_llm(structure, cache, model_name='model-a', concurrency=4)
+
+        self.assertEqual(peak, 4)
+        self.assertEqual([item['description'] for item in structure], [f"Description {i}" for i in range(20)])
+        for i in range(20):
+            self.assertEqual(cache.get(FILES, f'/test/concurrency/module_{i}.py')['description'], f"Description {i}")
+
+    @async_test
+    async def test_enhance_repo_with_llm_shares_one_session(self):
+        sessions = []
+
+        async def fake_get_llm_descriptions(structure, index, file, model, max_retries=3, session=None, **kwargs):
+            sessions.append(session)
+            file['description'] = 'Described'
+            return True
+
+        structure = [{
+            'name': f'module_{i}.py',
+            'path': f'/test/session/module_{i}.py',
+            'type': 'file',
+            'language': 'Python',
+            'hash': f'hash-{i}',
+            'level': 0
+        } for i in range(5)]
+
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.get_llm_descriptions', fake_get_llm_descriptions):
+            await enhance_repo_with_llm(structure, MemoryCacheBackend(), model_name='model-a')
+
+        self.assertEqual(len(sessions), 5)
+        self.assertIsNotNone(sessions[0])
+        self.assertTrue(all(session is sessions[0] for session in sessions))
+        self.assertTrue(sessions[0].closed)
+
+    def test_parse_structured_response(self):
+        fields, error = parse_structured_response(
+            '```json\n{"description": "Parses files", "developer_consideration": "Keep it pure"}\n```')
+        self.assertIsNone(error)
+        self.assertEqual(fields, {'description': 'Parses files', 'developer_consideration': 'Keep it pure'})
+
+        for content in ('not json', '{"description": ""}', '{"description": 3}', '[1, 2]'):
+            fields, error = parse_structured_response(content)
+            self.assertIsNone(fields)
+            self.assertTrue(error)
+
+        file_info: Dict[str, Any] = {}
+        self.assertTrue(parse_llm_response('{"description": "JSON", "developer_consideration": "Yes"}', file_info))
+        self.assertEqual(file_info['description'], 'JSON')
+        self.assertFalse(parse_llm_response('Description:', {}))
+
+    @async_test
+    async def test_get_llm_descriptions_re_requests_malformed_output(self):
+        responses = ['Sure! Here is the analysis.', '{"description": "Fixed", "developer_consideration": "None"}']
+        conversations = []
+
+        async def fake_request_completion(messages, model, label, **kwargs):
+            conversations.append(list(messages))
+            return responses[len(conversations) - 1]
+
+        file_info = {'name': 'module.py'}
+        with patch('src.repo_map.llm_interaction.request_completion', fake_request_completion):
+            described = await get_llm_descriptions([file_info], 0, file_info, 'model-a')
+
+        self.assertTrue(described)
+        self.assertEqual(file_info['description'], 'Fixed')
+        # The retry shows the model its invalid answer and what was wrong
+        self.assertEqual(len(conversations[1]), 3)
+        self.assertEqual(conversations[1][1]['content'], 'Sure! Here is the analysis.')
+        self.assertIn('no JSON object found', conversations[1][2]['content'])
+
+    @async_test
+    async def test_enhance_repo_with_llm_does_not_cache_failed_parses(self):
+        cache = MemoryCacheBackend()
+        key = description_key('hash-1', 'model-a', PROMPT_VERSION)
+        # An empty entry left behind by an older version is not a cache hit
+        cache.put(DESCRIPTIONS, key, {'description': '', 'developer_consideration': ''})
+        calls = []
+
+        async def fake_get_llm_descriptions(structure, index, file, model, max_retries=3, session=None, **kwargs):
+            calls.append(file['name'])
+            return False
+
+        structure = [{
+            'name': 'module.py',
+            'path': '/test/invalid/module.py',
+            'type': 'file',
+            'language': 'Python',
+            'hash': 'hash-1',
+            'level': 0
+        }]
+
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.get_llm_descriptions', fake_get_llm_descriptions):
+            await enhance_repo_with_llm(structure, cache, model_name='model-a')
+            await enhance_repo_with_llm(structure, cache, model_name='model-a')
+
+        self.assertEqual(calls, ['module.py', 'module.py'])
+        self.assertEqual(cache.get(DESCRIPTIONS, key)['description'], '')
+
+    @async_test
+    async def test_enhance_repo_with_llm_uses_given_provider(self):
+        providers = []
+
+        async def fake_get_llm_descriptions(structure, index, file, model, max_retries=3, session=None, **kwargs):
+            providers.append(kwargs.get('provider'))
+            file['description'] = 'Described locally'
+            return True
+
+        structure = [{
+            'name': 'module.py',
+            'path': '/test/provider/module.py',
+            'type': 'file',
+            'language': 'Python',
+            'hash': 'hash-local',
+            'level': 0
+        }]
+        provider = get_provider('ollama')
+
+        # A local server needs no API key
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': ''}), \
+                patch('src.repo_map.llm_interaction.get_llm_descriptions', fake_get_llm_descriptions):
+            await enhance_repo_with_llm(structure, MemoryCacheBackend(), model_name='llama3', provider=provider)
+
+        self.assertEqual(providers, [provider])
+        self.assertEqual(structure[0]['description'], 'Described locally')
+
+    @async_test
+    async def test_enhance_repo_with_llm_keys_descriptions_by_prompt_inputs(self):
+        cache_file = os.path.join(self.test_dir, '.repo-map-cache.db')
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+        cache_conn = load_cache(self.test_dir)
+        calls = []
+
+        async def fake_get_llm_descriptions(structure, index, file, model, max_retries=3, session=None, **kwargs):
+            calls.append(file['hash'])
+            file['description'] = f"Described {file['hash']}"
+            return True
+
+        def make_structure(content_hash, functions):
+            return [{
+                'name': 'module.py',
+                'path': '/test/fingerprint/module.py',
+                'type': 'file',
+                'language': 'Python',
+                'hash': content_hash,
+                'functions': functions,
+                'level': 0
+            }]
+
+        try:
+            with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                    patch('src.repo_map.llm_interaction.get_llm_descriptions', fake_get_llm_descriptions):
+                await enhance_repo_with_llm(make_structure('original', ['run']), cache_conn, model_name='model-a')
+
+                # Reformatting changes the bytes but not the prompt
+                structure = make_structure('reformatted', ['run'])
+                await enhance_repo_with_llm(structure, cache_conn, model_name='model-a')
+                self.assertEqual(structure[0]['description'], 'Described original')
+
+                # gc keeps the description reachable through the recorded fingerprint
+                gc_cache(cache_conn, live_paths=['/test/fingerprint/module.py'])
+                structure = make_structure('reformatted', ['run'])
+                await enhance_repo_with_llm(structure, cache_conn, model_name='model-a')
+                self.assertEqual(structure[0]['description'], 'Described original')
+
+                # A new function changes the prompt
+                structure = make_structure('extended', ['run', 'stop'])
+                await enhance_repo_with_llm(structure, cache_conn, model_name='model-a')
+                self.assertEqual(structure[0]['description'], 'Described extended')
+        finally:
+            cache_conn.close()
+
+        self.assertEqual(calls, ['original', 'extended'])
+
+    @async_test
+    async def test_enhance_repo_with_llm_adopts_hash_keyed_descriptions(self):
+        cache = MemoryCacheBackend()
+        cache.put(DESCRIPTIONS, description_key('legacy-hash', 'model-a', PROMPT_VERSION),
+                  {'description': 'From an older version', 'developer_consideration': 'None'})
+        structure = [{
+            'name': 'module.py',
+            'path': '/test/legacy/module.py',
+            'type': 'file',
+            'language': 'Python',
+            'hash': 'legacy-hash',
+            'level': 0
+        }]
+
+        async def fail_if_called(*args, **kwargs):
+            raise AssertionError('cached description should be reused')
+
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.get_llm_descriptions', fail_if_called):
+            await enhance_repo_with_llm(structure, cache, model_name='model-a')
+
+        self.assertEqual(structure[0]['description'], 'From an older version')
+        key = description_key(structure[0]['fingerprint'], 'model-a', PROMPT_VERSION)
+        self.assertEqual(cache.get(DESCRIPTIONS, key)['description'], 'From an older version')
+        self.assertEqual(cache.get(FILES, '/test/legacy/module.py')['fingerprint'], structure[0]['fingerprint'])
+
+    @async_test
+    async def test_symbol_descriptions_redescribe_only_edited_symbols(self):
+        cache_file = os.path.join(self.test_dir, '.repo-map-cache.db')
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+        cache_conn = load_cache(self.test_dir)
+        module_path = os.path.join(self.test_dir, 'symbol_module.py')
+        source = "def load():\n    return 1\n\n\nclass Store:\n    def save(self):\n        return 2\n"
+        calls = []
+
+        async def fake_symbol_description(file, symbol, model, **kwargs):
+            calls.append(symbol['name'])
+            symbol['description'] = f"{symbol['name']} v{len(calls)}"
+            symbol['developer_consideration'] = 'Keep it small'
+            return True
+
+        def make_structure():
+            return [{
+                'name': 'symbol_module.py',
+                'path': module_path,
+                'type': 'file',
+                'language': 'Python',
+                'hash': 'unused',
+                'functions': ['load'],
+                'classes': {'Store': ['save']},
+                'level': 0
+            }]
+
+        try:
+            with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                    patch('src.repo_map.llm_interaction.get_llm_symbol_description', fake_symbol_description):
+                with open(module_path, 'w') as f:
+                    f.write(source)
+                structure = make_structure()
+                await enhance_repo_with_llm(structure, cache_conn, model_name='model-a', symbol_descriptions=True)
+                self.assertEqual(structure[0]['description'], 'load: load v1; Store: Store v2')
+                self.assertEqual([symbol['name'] for symbol in structure[0]['symbols']], ['load', 'Store'])
+
+                # Edit only the method body of Store
+                with open(module_path, 'w') as f:
+                    f.write(source.replace('return 2', 'return 3'))
+                gc_cache(cache_conn, live_paths=[module_path])
+                structure = make_structure()
+                await enhance_repo_with_llm(structure, cache_conn, model_name='model-a', symbol_descriptions=True)
+                self.assertEqual(structure[0]['description'], 'load: load v1; Store: Store v3')
+        finally:
+            cache_conn.close()
+
+        self.assertEqual(calls, ['load', 'Store', 'Store'])
+
+    def test_response_end_detects_complete_answers(self):
+        answer = '{"description": "Parses {braces} and \\"quotes\\"", "developer_consideration": "Keep it small"}'
+        self.assertIsNone(response_end(answer[:-1]))
+        self.assertEqual(response_end(answer + "\n\nHope this helps!"), len(answer))
+        self.assertEqual(response_end('Sure: ' + answer), len('Sure: ' + answer))
+        self.assertEqual(response_end('{"files": [{"id": 1}]} trailing'), len('{"files": [{"id": 1}]}'))
+        # A bare batch array ends with its last element, not its first
+        batch = '[{"id": 1, "description": "A"}, {"id": 2, "description": "B"}]'
+        self.assertIsNone(response_end(batch[:-1]))
+        self.assertEqual(response_end('Here you go: ' + batch + ' trailing'), len('Here you go: ' + batch))
+        self.assertEqual(response_end('Notes [1]: ' + answer), len('Notes [1]: ' + answer))
+
+        text = 'Description: Does things\nDeveloper Consideration: "Be careful"'
+        self.assertIsNone(response_end(text[:-1]))
+        self.assertEqual(response_end(text + '\nMore prose'), len(text))
+
+    def test_directory_fingerprint_is_a_merkle_hash(self):
+        def tree(description):
+            inner = [{'name': 'core.py', 'type': 'file', 'description': description},
+                     {'name': 'README.md', 'type': 'file'}]
+            package = {'name': 'pkg', 'type': 'directory', 'fingerprint': directory_fingerprint(inner)}
+            sibling = {'name': 'docs', 'type': 'directory', 'fingerprint': directory_fingerprint([])}
+            return package, sibling, directory_fingerprint([package, sibling])
+
+        package, sibling, root = tree('Core logic')
+        # Child order does not matter
+        self.assertEqual(root, directory_fingerprint([sibling, package]))
+        changed_package, changed_sibling, changed_root = tree('Core logic, now cached')
+        self.assertNotEqual(changed_package['fingerprint'], package['fingerprint'])
+        self.assertNotEqual(changed_root, root)
+        self.assertEqual(changed_sibling['fingerprint'], sibling['fingerprint'])
+
+        details = build_directory_details('src', [
+            {'name': 'util.py', 'type': 'file', 'description': 'x' * 400},
+            {'name': 'pkg', 'type': 'directory', 'description': 'Package'},
+            {'name': 'data.csv', 'type': 'file'}
+        ])
+        self.assertEqual(details, "Directory: src\nSubdirectories:\n- pkg/: Package\n"
+                                  "Files:\n- data.csv\n- util.py: " + 'x' * 300 + "...\n")
+
+    def test_build_file_details_bounds_long_lists(self):
+        small = {'name': 'small.py', 'imports': ['os', 'os'], 'functions': ['run']}
+        self.assertEqual(build_file_details(small), "File: small.py\nImports:\n- os\nFunctions:\n- run\n")
+
+        huge = {'name': 'huge.py', 'imports': ['os'], 'functions': [f'handler_{i}' for i in range(800)]}
+        details = build_file_details(huge, token_budget=300)
+        self.assertIn("Imports:\n- os\n", details)
+        self.assertRegex(details, r"- \.\.\. and \d+ more\n$")
+        self.assertLess(len(details), len("\n".join(huge['functions'])) // 4)
+
+    @async_test
+    async def test_enhance_repo_with_llm_adds_source_excerpts(self):
+        module_path = os.path.join(self.test_dir, 'excerpt_module.py')
+        with open(module_path, 'w') as f:
+            f.write('"""Parses invoices."""\n\ndef parse(text: str) -> dict:\n    """Parse one invoice."""\n')
+        prompts = []
+
+        async def fake_request_completion(messages, model, label, **kwargs):
+            prompts.append(messages[-1]['content'])
+            return '{"description": "Invoice parser", "developer_consideration": "None"}'
+
+        def make_structure():
+            return [{'name': 'excerpt_module.py', 'path': module_path, 'type': 'file', 'language': 'Python',
+                     'hash': 'unused', 'functions': ['parse'], 'level': 0}]
+
+        cache = MemoryCacheBackend()
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.request_completion', fake_request_completion):
+            structure = make_structure()
+            await enhance_repo_with_llm(structure, cache, model_name='model-a', excerpt_tokens=100)
+            self.assertIn("Excerpts:\n- Parses invoices.\n- def parse(text: str) -> dict: Parse one invoice.\n",
+                          prompts[0])
+            self.assertEqual(structure[0]['description'], 'Invoice parser')
+
+            # The excerpts are part of the fingerprint: a prompt without them is another cache entry
+            await enhance_repo_with_llm(make_structure(), cache, model_name='model-a')
+            self.assertEqual(len(prompts), 2)
+            self.assertNotIn("Excerpts:", prompts[1])
+            await enhance_repo_with_llm(make_structure(), cache, model_name='model-a', excerpt_tokens=100)
+            self.assertEqual(len(prompts), 2)
+
+    @async_test
+    async def test_enhance_repo_with_llm_uses_each_languages_prompt_pack(self):
+        prompts = []
+
+        async def fake_request_completion(messages, model, label, **kwargs):
+            prompt = messages[-1]['content']
+            prompts.append(prompt)
+            count = prompt.count('File: ')
+            if count == 1:
+                return '{"description": "Described", "developer_consideration": ""}'
+            return json.dumps({'files': [{'id': i, 'description': f'Described {i}', 'developer_consideration': ''}
+                                         for i in range(1, count + 1)]})
+
+        def entry(name, language, **elements):
+            return dict({'name': name, 'path': f'/test/polyglot/{name}', 'type': 'file', 'language': language,
+                         'hash': f'hash-{name}', 'level': 0}, **elements)
+
+        structure = [
+            entry('server.go', 'Go', imports=['fmt'], classes={'Server': ['Start']}),
+            entry('client.go', 'Go', functions=['Dial']),
+            entry('Main.java', 'Java', classes={'Main': ['main']}),
+            entry('app.py', 'Python', functions=['run']),
+            entry('api.pb.go', 'Go', functions=['Marshal']),
+            entry('README.md', 'Markdown')
+        ]
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.request_completion', fake_request_completion):
+            await enhance_repo_with_llm(structure, MemoryCacheBackend(), model_name='model-a', batch_size=10)
+
+        # One batch per language, worded for it; generated code and Markdown are skipped
+        self.assertEqual(len(prompts), 3)
+        go_prompt = next(prompt for prompt in prompts if 'server.go' in prompt)
+        self.assertIn('Analyze each of these 2 Go source files', go_prompt)
+        self.assertIn('Types:\n- Server: Start\n', go_prompt)
+        self.assertTrue(any(prompt.startswith('Analyze this Java source file') for prompt in prompts))
+        self.assertTrue(any(prompt.startswith('Analyze this Python file') for prompt in prompts))
+        self.assertEqual([bool(item.get('description')) for item in structure],
+                         [True, True, True, True, False, False])
+
+        structure = [entry('server.go', 'Go', functions=['New']), entry('app.py', 'Python', functions=['run'])]
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.request_completion', fake_request_completion):
+            await enhance_repo_with_llm(structure, MemoryCacheBackend(), model_name='model-a', languages=['Go'])
+        self.assertIn('server.go', prompts[-1])
+        self.assertFalse(structure[1].get('description'))
+
+    def test_plan_batches_respects_size_and_budget(self):
+        files = [{'name': f'm{i}.py', 'functions': ['run']} for i in range(5)]
+        self.assertEqual([len(batch) for batch in plan_batches(files, 2, 10000)], [2, 2, 1])
+
+        big = {'name': 'big.py', 'functions': [f'function_{i}' for i in range(200)]}
+        batches = plan_batches(files[:2] + [big] + files[2:3], 10, 100)
+        self.assertEqual([len(batch) for batch in batches], [2, 1, 1])
+        self.assertIs(batches[1][0], big)
+
+    def test_parse_batch_response_splits_per_file(self):
+        files = [{'name': 'a.py'}, {'name': 'b.py'}, {'name': 'c.py'}]
+        content = """Here you go:
+```json
+{"files": [{"id": 1, "description": "First", "developer_consideration": "Careful"},
+           {"id": 2, "description": ""},
+           {"id": 3, "description": "Third"},
+           {"id": 9, "description": "Unknown"}]}
+```"""
+        failed = parse_batch_response(content, files)
+        self.assertEqual(files[0]['description'], 'First')
+        self.assertEqual(files[0]['developer_consideration'], 'Careful')
+        self.assertEqual(files[2]['description'], 'Third')
+        self.assertEqual(failed, [files[1]])
+
+        # Unparsable output fails every file
+        self.assertEqual(parse_batch_response("Description: not json", files[:2]), files[:2])
+
+    @async_test
+    async def test_enhance_repo_with_llm_batches_and_retries_failures(self):
+        cache = MemoryCacheBackend()
+        batches = []
+        singles = []
+
+        async def fake_batch(files, model, max_retries=3, session=None, **kwargs):
+            batches.append([file['name'] for file in files])
+            for file in files[1:]:
+                file['description'] = f"Batched {file['name']}"
+            # The first file of each batch is missing from the answer
+            return files[:1]
+
+        async def fake_single(structure, index, file, model, max_retries=3, session=None, **kwargs):
+            singles.append(file['name'])
+            file['description'] = f"Single {file['name']}"
+            return True
+
+        structure = [{
+            'name': f'module_{i}.py',
+            'path': f'/test/batch/module_{i}.py',
+            'type': 'file',
+            'language': 'Python',
+            'hash': f'hash-{i}',
+            'level': 0
+        } for i in range(7)]
+
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}), \
+                patch('src.repo_map.llm_interaction.get_llm_batch_descriptions', fake_batch), \
+                patch('src.repo_map.llm_interaction.get_llm_descriptions', fake_single):
+            await enhance_repo_with_llm(structure, cache, model_name='model-a', batch_size=3)
+
+        self.assertEqual(len(batches), 2)
+        # Failed batch members and the leftover single file are described one by one
+        self.assertEqual(sorted(singles), ['module_0.py', 'module_3.py', 'module_6.py'])
+        self.assertEqual(structure[1]['description'], 'Batched module_1.py')
+        self.assertEqual(structure[3]['description'], 'Single module_3.py')
+        self.assertEqual(cache.get(FILES, '/test/batch/module_4.py')['description'], 'Batched module_4.py')
+
 if __name__ == '__main__':
     unittest.main()
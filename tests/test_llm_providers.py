@@ -0,0 +1,86 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.llm_providers import PROVIDERS, get_provider, parse_header_option, parse_endpoint_option
+
+class TestLLMProviders(unittest.TestCase):
+    def test_openrouter_is_the_default(self):
+        provider = get_provider()
+        self.assertEqual(provider.chat_url, 'https://openrouter.ai/api/v1/chat/completions')
+        self.assertEqual(provider.api_key_env, 'OPENROUTER_API_KEY')
+        self.assertEqual(provider.default_model, 'anthropic/claude-3.5-sonnet')
+
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': ''}):
+            self.assertFalse(provider.is_configured())
+        with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'sk-or-v1-test'}):
+            self.assertTrue(provider.is_configured())
+            headers = provider.request_headers()
+        self.assertEqual(headers['Authorization'], 'Bearer sk-or-v1-test')
+        self.assertEqual(headers['X-Title'], 'repo-map')
+
+    def test_local_providers_need_no_key(self):
+        for name in ('ollama', 'llama.cpp', 'vllm', 'openai-compatible'):
+            provider = get_provider(name)
+            with patch.dict(os.environ, {}, clear=True):
+                self.assertTrue(provider.is_configured())
+                self.assertNotIn('Authorization', provider.request_headers())
+            # Local servers get fewer parallel requests and more time than hosted APIs
+            self.assertGreater(provider.timeout, PROVIDERS['openrouter'].timeout)
+        self.assertLess(get_provider('ollama').concurrency, get_provider('openrouter').concurrency)
+
+    def test_overrides_do_not_modify_registry(self):
+        provider = get_provider(
+            'vllm',
+            base_url='http://gpu-box:8000/v1/',
+            api_key_env='TEAM_LLM_KEY',
+            headers={'X-Team': 'platform'},
+            concurrency=32,
+            timeout=5,
+            stream=False
+        )
+        self.assertEqual(provider.chat_url, 'http://gpu-box:8000/v1/chat/completions')
+        self.assertEqual(provider.concurrency, 32)
+        self.assertEqual(provider.timeout, 5)
+        self.assertFalse(provider.stream)
+        self.assertTrue(PROVIDERS['vllm'].stream)
+        with patch.dict(os.environ, {'TEAM_LLM_KEY': 'secret'}):
+            headers = provider.request_headers()
+        self.assertEqual(headers['Authorization'], 'Bearer secret')
+        self.assertEqual(headers['X-Team'], 'platform')
+
+        self.assertEqual(PROVIDERS['vllm'].base_url, 'http://localhost:8000/v1')
+        self.assertEqual(PROVIDERS['vllm'].headers, {})
+
+    def test_unknown_provider_and_bad_header(self):
+        with self.assertRaises(ValueError):
+            get_provider('nonexistent')
+        self.assertEqual(parse_header_option('X-Api-Version: 2024-01'), {'X-Api-Version': '2024-01'})
+        with self.assertRaises(ValueError):
+            parse_header_option('no separator')
+
+    def test_parse_endpoint_option(self):
+        self.assertEqual(parse_endpoint_option('http://node-1:8000/v1,model=qwen2.5-coder,concurrency=4'),
+                         {'base_url': 'http://node-1:8000/v1', 'model': 'qwen2.5-coder', 'concurrency': 4})
+        # A second key for the provider's own URL
+        self.assertEqual(parse_endpoint_option('key_env=OPENROUTER_API_KEY_2'),
+                         {'api_key_env': 'OPENROUTER_API_KEY_2'})
+        for value in ('', 'key_env=A,http://node-1', 'region=eu', 'http://node-1,concurrency=many'):
+            with self.assertRaises(ValueError):
+                parse_endpoint_option(value)
+
+    def test_endpoints_must_serve_the_run_model(self):
+        # Descriptions are cached under the run's model name
+        self.assertEqual(parse_endpoint_option('http://node-1:8000/v1,model=qwen2.5-coder', 'qwen2.5-coder'),
+                         {'base_url': 'http://node-1:8000/v1', 'model': 'qwen2.5-coder'})
+        self.assertEqual(parse_endpoint_option('http://node-1:8000/v1', 'qwen2.5-coder'),
+                         {'base_url': 'http://node-1:8000/v1'})
+        with self.assertRaises(ValueError):
+            parse_endpoint_option('http://node-1:8000/v1,model=llama3', 'qwen2.5-coder')
+
+if __name__ == '__main__':
+    unittest.main()
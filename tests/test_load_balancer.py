@@ -0,0 +1,88 @@
+import os
+import sys
+import asyncio
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.llm_providers import get_provider
+from src.repo_map.rate_limiting import RateLimiter
+from src.repo_map.resilience import CircuitBreaker
+from src.repo_map.load_balancer import Endpoint, LoadBalancer
+
+def make_endpoint(name, concurrency=2, failure_threshold=5):
+    return Endpoint(get_provider('openai-compatible', base_url=f'http://{name}:8000/v1', concurrency=concurrency),
+                    breaker=CircuitBreaker(failure_threshold=failure_threshold))
+
+class TestLoadBalancer(unittest.TestCase):
+    def test_prefers_headroom_and_low_latency(self):
+        fast, slow = make_endpoint('fast'), make_endpoint('slow')
+        balancer = LoadBalancer([slow, fast])
+        fast.record_success(0.1)
+        slow.record_success(1.0)
+
+        self.assertIs(balancer.try_acquire(), fast)
+        self.assertIs(balancer.try_acquire(), fast)
+        # fast is at its limit of two; slow takes the overflow
+        self.assertIs(balancer.try_acquire(), slow)
+        balancer.release(fast)
+        self.assertIs(balancer.try_acquire(exclude=[fast]), slow)
+        self.assertEqual((fast.requests, slow.requests), (2, 2))
+
+    def test_traffic_moves_away_from_failing_endpoints(self):
+        flaky, healthy = make_endpoint('flaky', failure_threshold=2), make_endpoint('healthy')
+        balancer = LoadBalancer([flaky, healthy])
+        for endpoint in (flaky, healthy):
+            endpoint.record_success(0.1)
+        flaky.latency = 0.08
+
+        flaky.record_failure(500)
+        # One failure already ranks it behind an equally free, slower endpoint
+        self.assertIs(balancer.try_acquire(), healthy)
+        flaky.record_failure(500)
+        self.assertFalse(flaky.breaker.available())
+        self.assertTrue(balancer.has_alternative(flaky))
+        self.assertIs(balancer.try_acquire(), healthy)
+        self.assertIsNone(balancer.try_acquire())
+
+        # A 429 pauses only the throttled endpoint and lowers its rank
+        paused = make_endpoint('paused')
+        paused.record_failure(429, {'Retry-After': '30'})
+        self.assertGreater(paused.rate_limiter.paused_for(), 29)
+        self.assertEqual(paused.breaker.failures, 0)
+
+        # ... and a probe it answered with a 429 reopens the breaker instead of leaving it half-open
+        flaky.breaker.reset_timeout = 0
+        self.assertIs(balancer.try_acquire(exclude=[healthy]), flaky)
+        self.assertEqual(flaky.breaker.state, CircuitBreaker.HALF_OPEN)
+        flaky.record_failure(429)
+        self.assertEqual(flaky.breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(flaky.breaker.available())
+
+    def test_acquire_waits_for_a_slot_and_fails_fast_when_all_are_open(self):
+        endpoint = make_endpoint('only', concurrency=1, failure_threshold=1)
+        balancer = LoadBalancer([endpoint])
+
+        async def run():
+            first = await balancer.acquire()
+            waiter = asyncio.ensure_future(balancer.acquire())
+            await asyncio.sleep(0.01)
+            self.assertFalse(waiter.done())
+            balancer.release(first)
+            second = await asyncio.wait_for(waiter, 1)
+            balancer.release(second)
+            endpoint.record_failure(500)
+            return await balancer.acquire()
+
+        self.assertIsNone(asyncio.run(run()))
+        self.assertEqual(balancer.rejected, 1)
+
+    def test_requires_an_endpoint(self):
+        with self.assertRaises(ValueError):
+            LoadBalancer([])
+        balancer = LoadBalancer([make_endpoint('a', concurrency=3), make_endpoint('b', concurrency=5)])
+        self.assertEqual(balancer.concurrency, 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,322 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import requests
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.mock_llm_server import serve_mock_llm, MockLLMBehavior
+from src.repo_map.llm_cassette import Cassette
+from src.repo_map.llm_providers import get_provider
+from src.repo_map.llm_interaction import enhance_repo_with_llm, summarize_directories
+from src.repo_map.cache_management import MemoryCacheBackend
+from src.repo_map.rate_limiting import LLMBudget
+from src.repo_map.work_scheduler import ImportanceRanker
+from src.repo_map.resilience import CircuitBreaker, RequestHedger
+from src.repo_map.load_balancer import Endpoint, LoadBalancer
+
+def make_structure(count):
+    return [{
+        'name': f'module_{i}.py',
+        'path': f'/test/mock/module_{i}.py',
+        'type': 'file',
+        'language': 'Python',
+        'hash': f'mock-hash-{i}',
+        'functions': [f'function_{i}'],
+        'level': 0
+    } for i in range(count)]
+
+class TestMockLLMServer(unittest.TestCase):
+    def setUp(self):
+        # Use existing test_output directory
+        self.test_dir = os.path.join(os.path.dirname(__file__), 'test_output')
+        self.cassette_path = os.path.join(self.test_dir, 'llm_cassette.jsonl')
+        if os.path.exists(self.cassette_path):
+            os.remove(self.cassette_path)
+        self.servers = []
+
+    def tearDown(self):
+        for server, thread in self.servers:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def start(self, behavior=None):
+        server, thread = serve_mock_llm(port=0, behavior=behavior)
+        self.servers.append((server, thread))
+        host, port = server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def enhance(self, structure, base_url, stream=True, **kwargs):
+        provider = get_provider('openai-compatible', base_url=base_url, timeout=5, stream=stream)
+        with patch.dict(os.environ, {'OPENAI_API_KEY': ''}):
+            asyncio.run(enhance_repo_with_llm(structure, MemoryCacheBackend(), model_name='mock',
+                                              provider=provider, **kwargs))
+
+    def test_describes_files_through_the_real_client(self):
+        behavior = MockLLMBehavior(latency=0.01)
+        structure = make_structure(6)
+        self.enhance(structure, self.start(behavior), concurrency=3)
+
+        self.assertEqual([item['description'] for item in structure],
+                         [f"Mock description of module_{i}.py" for i in range(6)])
+        self.assertEqual(behavior.stats[200], 6)
+
+    def test_batched_prompts(self):
+        behavior = MockLLMBehavior()
+        structure = make_structure(6)
+        self.enhance(structure, self.start(behavior), batch_size=3)
+
+        self.assertEqual(structure[4]['description'], "Mock description of module_4.py")
+        self.assertEqual(behavior.stats[200], 2)
+
+    def test_identical_prompts_are_sent_once(self):
+        behavior = MockLLMBehavior(latency=0.05)
+        structure = make_structure(2)
+        # Empty package markers in different directories produce the same prompt
+        for i in range(5):
+            structure.append({
+                'name': '__init__.py',
+                'path': f'/test/mock/package_{i}/__init__.py',
+                'type': 'file',
+                'language': 'Python',
+                'hash': f'init-hash-{i}',
+                'level': 1
+            })
+        self.enhance(structure, self.start(behavior))
+
+        self.assertEqual(behavior.stats[200], 3)
+        self.assertTrue(all(item['description'] == "Mock description of __init__.py" for item in structure[2:]))
+
+    def test_files_are_described_while_the_scan_continues(self):
+        behavior = MockLLMBehavior(latency=0.01)
+        structure = make_structure(6)
+        provider = get_provider('openai-compatible', base_url=self.start(behavior), timeout=5)
+
+        async def run():
+            queue = asyncio.Queue()
+            enhancement = asyncio.ensure_future(enhance_repo_with_llm(
+                structure, MemoryCacheBackend(), model_name='mock', provider=provider, file_queue=queue))
+            queue.put_nowait([(0, structure[0]), (1, structure[1])])
+            # The first directory is described before the scan has finished
+            for _ in range(200):
+                if 'description' in structure[0]:
+                    break
+                await asyncio.sleep(0.01)
+            described_early = 'description' in structure[0]
+            queue.put_nowait([(i, structure[i]) for i in range(2, 6)])
+            queue.put_nowait(None)
+            await enhancement
+            return described_early
+
+        with patch.dict(os.environ, {'OPENAI_API_KEY': ''}):
+            self.assertTrue(asyncio.run(run()))
+        self.assertEqual(structure[5]['description'], "Mock description of module_5.py")
+        self.assertEqual(behavior.stats[200], 6)
+
+    def test_batches_span_scan_chunks(self):
+        behavior = MockLLMBehavior()
+        structure = make_structure(8)
+        provider = get_provider('openai-compatible', base_url=self.start(behavior), timeout=5)
+
+        async def run():
+            queue = asyncio.Queue()
+            enhancement = asyncio.ensure_future(enhance_repo_with_llm(
+                structure, MemoryCacheBackend(), model_name='mock', provider=provider, file_queue=queue,
+                batch_size=3))
+            # One file per directory, as in a repository of small packages
+            for i in range(8):
+                queue.put_nowait([(i, structure[i])])
+                await asyncio.sleep(0)
+            queue.put_nowait(None)
+            await enhancement
+
+        with patch.dict(os.environ, {'OPENAI_API_KEY': ''}):
+            asyncio.run(run())
+        # Two full batches of three and the remaining two, flushed when the scan ended
+        self.assertEqual(behavior.stats[200], 3)
+        self.assertTrue(all(item['description'] == f"Mock description of {item['name']}" for item in structure))
+
+    def test_call_budget_describes_most_imported_files_first(self):
+        behavior = MockLLMBehavior()
+        structure = make_structure(6)
+        # module_4 is imported by three files and module_2 by one
+        for i in (0, 1, 3):
+            structure[i]['imports'] = ['module_4']
+        structure[5]['imports'] = ['module_2.function_2']
+        budget = LLMBudget(max_calls=2)
+        self.enhance(structure, self.start(behavior), concurrency=1, budget=budget,
+                     ranker=ImportanceRanker('/test/mock'))
+
+        self.assertEqual(behavior.stats[200], 2)
+        self.assertEqual([item['name'] for item in structure if item.get('description')],
+                         ['module_2.py', 'module_4.py'])
+
+    def test_breaker_stops_requests_during_an_outage(self):
+        behavior = MockLLMBehavior(error_rate=1.0)
+        structure = make_structure(30)
+        breaker = CircuitBreaker(failure_threshold=3)
+        started = time.monotonic()
+        self.enhance(structure, self.start(behavior), concurrency=4, breaker=breaker)
+
+        # Only the requests in flight when the breaker opened reached the server
+        self.assertLessEqual(behavior.stats[500], 4)
+        self.assertEqual(breaker.trips, 1)
+        self.assertFalse(any(item.get('description') for item in structure))
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_hedged_request_cuts_slow_tail(self):
+        def tail_draws(seed):
+            behavior = MockLLMBehavior(tail_rate=0.5, tail_latency=3.0, seed=seed)
+            return [behavior.draw()[0] > 1 for _ in range(2)]
+
+        # A seed whose first request is slow and whose second is fast
+        seed = next(seed for seed in range(100) if tail_draws(seed) == [True, False])
+        behavior = MockLLMBehavior(tail_rate=0.5, tail_latency=3.0, seed=seed)
+        hedger = RequestHedger(min_samples=1)
+        hedger.record(0.05)
+        started = time.monotonic()
+        self.enhance(make_structure(1), self.start(behavior), hedger=hedger)
+
+        self.assertLess(time.monotonic() - started, 2.5)
+        self.assertEqual((hedger.hedged, hedger.hedge_wins), (1, 1))
+
+    def test_balancer_spreads_requests_and_avoids_a_failing_endpoint(self):
+        healthy = [MockLLMBehavior(latency=0.02), MockLLMBehavior(latency=0.02)]
+        failing = MockLLMBehavior(error_rate=1.0)
+        endpoints = [
+            Endpoint(get_provider('openai-compatible', base_url=self.start(behavior), timeout=5, concurrency=2),
+                     breaker=CircuitBreaker(failure_threshold=2))
+            for behavior in healthy + [failing]
+        ]
+        structure = make_structure(24)
+        self.enhance(structure, 'http://127.0.0.1:9/v1', concurrency=6, balancer=LoadBalancer(endpoints))
+
+        self.assertTrue(all(item.get('description') for item in structure))
+        self.assertEqual(healthy[0].stats[200] + healthy[1].stats[200], 24)
+        self.assertGreater(min(healthy[0].stats[200], healthy[1].stats[200]), 0)
+        # Failed attempts were retried elsewhere and the breaker kept the rest away
+        self.assertLessEqual(failing.stats[500], 3)
+        self.assertEqual(endpoints[2].breaker.trips, 1)
+
+    def test_stream_is_closed_once_the_answer_is_complete(self):
+        chatter = "\n\nLet me know if you would like more detail about this module." * 10
+        behavior = MockLLMBehavior(trailing_text=chatter, stream_chunk_delay=0.02)
+        streamed = make_structure(1)
+        started = time.monotonic()
+        self.enhance(streamed, self.start(behavior))
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(behavior.last_request['stream'])
+        self.assertEqual(behavior.last_request['max_tokens'], 400)
+        # The remaining ~40 chunks would have taken close to a second
+        self.assertLess(elapsed, 0.6)
+        for _ in range(100):
+            if behavior.stats['closed_early']:
+                break
+            time.sleep(0.02)
+        self.assertEqual(behavior.stats['closed_early'], 1)
+
+        # Same result as reading the whole response
+        unstreamed = make_structure(1)
+        self.enhance(unstreamed, self.start(MockLLMBehavior(trailing_text=chatter)), stream=False)
+        self.assertEqual(streamed[0]['description'], unstreamed[0]['description'])
+        self.assertEqual(streamed[0]['developer_consideration'], unstreamed[0]['developer_consideration'])
+
+    def test_streamed_bare_array_batch_answer_is_read_whole(self):
+        chatter = "\n\nLet me know if you need anything else."
+        behavior = MockLLMBehavior(trailing_text=chatter, bare_batch_arrays=True, stream_chunk_size=8)
+        structure = make_structure(3)
+        self.enhance(structure, self.start(behavior), batch_size=3)
+
+        # One request: no file of the batch was cut off and re-requested on its own
+        self.assertEqual(behavior.stats[200], 1)
+        self.assertEqual([item['description'] for item in structure],
+                         [f"Mock description of module_{i}.py" for i in range(3)])
+
+    def test_directory_summaries_regenerate_only_changed_directories(self):
+        def make_tree():
+            return [
+                {'name': 'app', 'path': '/test/tree/app', 'type': 'directory', 'level': 0},
+                {'name': 'main.py', 'path': '/test/tree/app/main.py', 'type': 'file', 'level': 1,
+                 'description': 'Entry point'},
+                {'name': 'docs', 'path': '/test/tree/docs', 'type': 'directory', 'level': 0},
+                {'name': 'guide.py', 'path': '/test/tree/docs/guide.py', 'type': 'file', 'level': 1,
+                 'description': 'Builds the guide'},
+                {'name': 'assets', 'path': '/test/tree/docs/assets', 'type': 'directory', 'level': 1},
+                {'name': 'logo.png', 'path': '/test/tree/docs/assets/logo.png', 'type': 'file', 'level': 2}
+            ]
+
+        behavior = MockLLMBehavior()
+        provider = get_provider('openai-compatible', base_url=self.start(behavior), timeout=5)
+        cache = MemoryCacheBackend()
+
+        def summarize(structure):
+            with patch.dict(os.environ, {'OPENAI_API_KEY': ''}):
+                return asyncio.run(summarize_directories(structure, cache, 'mock', '/test/tree',
+                                                         provider=provider))
+
+        first = make_tree()
+        root = summarize(first)
+        # app, docs and the root; assets has nothing described to summarize
+        self.assertEqual(behavior.stats[200], 3)
+        self.assertEqual(root['description'], "Mock summary of tree/")
+        self.assertEqual(first[0]['description'], "Mock summary of app/")
+        self.assertNotIn('description', first[4])
+
+        unchanged = make_tree()
+        summarize(unchanged)
+        self.assertEqual(behavior.stats[200], 3)
+        self.assertEqual(unchanged[2]['description'], "Mock summary of docs/")
+
+        # Only the changed file's directory and the root are summarized again
+        changed = make_tree()
+        changed[1]['description'] = 'Entry point with a plugin loader'
+        summarize(changed)
+        self.assertEqual(behavior.stats[200], 5)
+        self.assertEqual(changed[2]['fingerprint'], first[2]['fingerprint'])
+        self.assertNotEqual(changed[0]['fingerprint'], first[0]['fingerprint'])
+
+    def test_injected_failures(self):
+        base_url = self.start(MockLLMBehavior(throttle_rate=1.0, retry_after=7))
+        response = requests.post(f"{base_url}/chat/completions", json={'messages': []}, timeout=5)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '7')
+
+        base_url = self.start(MockLLMBehavior(error_rate=1.0))
+        response = requests.post(f"{base_url}/chat/completions", json={'messages': []}, timeout=5)
+        self.assertEqual(response.status_code, 500)
+
+    def test_seeded_failures_are_reproducible(self):
+        def outcomes(seed):
+            behavior = MockLLMBehavior(error_rate=0.3, throttle_rate=0.3, seed=seed)
+            return [behavior.draw()[1] for _ in range(20)]
+
+        self.assertEqual(outcomes(42), outcomes(42))
+
+    def test_record_then_replay_offline(self):
+        recorded = make_structure(3)
+        cassette = Cassette(self.cassette_path, 'record')
+        self.enhance(recorded, self.start(), cassette=cassette)
+        self.assertEqual(len(cassette), 3)
+        with open(self.cassette_path) as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 3)
+
+        # Nothing listens on the replay URL; every answer comes from the cassette
+        replayed = make_structure(3)
+        self.enhance(replayed, 'http://127.0.0.1:9/v1', cassette=Cassette(self.cassette_path, 'replay'))
+        self.assertEqual([item['description'] for item in replayed],
+                         [item['description'] for item in recorded])
+
+    def test_replay_requires_existing_cassette(self):
+        with self.assertRaises(ValueError):
+            Cassette(os.path.join(self.test_dir, 'missing_cassette.jsonl'), 'replay')
+
+if __name__ == '__main__':
+    unittest.main()
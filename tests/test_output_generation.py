@@ -107,6 +107,39 @@ class TestOutputGeneration(unittest.TestCase):
         self.assertIn('utils/', content)
         self.assertIn('helpers.py (Python)', content)
 
+    def test_save_tree_map_with_directory_summaries(self):
+        output_path = os.path.join(self.test_dir, 'repo_map_summaries.md')
+        self.test_structure[0]['description'] = 'Application sources'
+        overview = {'name': 'test', 'type': 'directory', 'description': 'A test repository'}
+        save_tree_map(self.test_structure, self.test_dir, output_path, overview=overview)
+
+        with open(output_path, 'r') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[lines.index('/ (test_output)') + 1], '├── Summary: A test repository')
+        self.assertEqual(lines[lines.index('├── src/') + 1], '│   ├── Summary: Application sources')
+
+    def test_save_tree_map_lists_symbols_once(self):
+        output_path = os.path.join(self.test_dir, 'repo_map_symbols.md')
+        main = self.test_structure[1]
+        main['symbols'] = [
+            {'name': 'run', 'kind': 'function', 'description': 'Starts the app',
+             'developer_consideration': 'Keep startup fast'},
+            {'name': 'Config', 'kind': 'class', 'description': 'Holds settings', 'developer_consideration': ''}
+        ]
+        # As composed by compose_file_description()
+        main['description'] = 'run: Starts the app; Config: Holds settings'
+        main['developer_consideration'] = 'run: Keep startup fast'
+        save_tree_map(self.test_structure, self.test_dir, output_path)
+
+        with open(output_path, 'r') as f:
+            content = f.read()
+        self.assertNotIn('Description: run: Starts the app', content)
+        self.assertEqual(content.count('Starts the app'), 1)
+        self.assertEqual(content.count('Keep startup fast'), 1)
+        self.assertIn('├── Function run: Starts the app\n', content)
+        self.assertIn('│   └── Developer Consideration: "Keep startup fast"\n', content)
+        self.assertIn('├── Class Config: Holds settings\n', content)
+
     def test_print_tree(self):
         # Clear any previous log output
         self.log_output.seek(0)
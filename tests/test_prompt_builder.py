@@ -0,0 +1,35 @@
+import os
+import sys
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.prompt_builder import dedupe, fit_sections, select_excerpts
+from src.repo_map.rate_limiting import count_tokens
+
+class TestPromptBuilder(unittest.TestCase):
+    def test_dedupe_keeps_first_occurrences(self):
+        self.assertEqual(dedupe(['os', 'sys', 'os', 'json', 'sys']), ['os', 'sys', 'json'])
+
+    def test_small_sections_are_rendered_whole(self):
+        rendered = fit_sections([('Imports', ['os', 'os', 'sys']), ('Functions', []), ('Classes', ['Store'])])
+        self.assertEqual(rendered, "Imports:\n- os\n- sys\nClasses:\n- Store\n")
+
+    def test_large_sections_share_the_budget(self):
+        functions = [f'function_number_{i}' for i in range(800)]
+        rendered = fit_sections([('Imports', ['os', 'sys']), ('Functions', functions)], budget=200)
+        self.assertLessEqual(count_tokens(rendered), 200)
+        # The short list is kept whole, the long one is cut and says by how much
+        self.assertTrue(rendered.startswith("Imports:\n- os\n- sys\nFunctions:\n- function_number_0\n"))
+        kept = rendered.count('- function_number_')
+        self.assertGreater(kept, 10)
+        self.assertTrue(rendered.endswith(f"- ... and {800 - kept} more\n"))
+
+    def test_select_excerpts_in_priority_order(self):
+        excerpts = ['Module summary.', 'def ' + 'x' * 400 + '()', 'def run(self)']
+        self.assertEqual(select_excerpts(excerpts, 20), ['Module summary.', 'def run(self)'])
+        self.assertEqual(select_excerpts(excerpts, 0), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.prompt_packs import (
+    get_prompt_pack,
+    is_eligible,
+    parse_languages_option,
+    MEMBER_LIMIT
+)
+
+class TestPromptPacks(unittest.TestCase):
+    def test_eligibility_rules(self):
+        def entry(name, language, type='file'):
+            return {'name': name, 'language': language, 'type': type}
+
+        self.assertTrue(is_eligible(entry('app.py', 'Python')))
+        self.assertTrue(is_eligible(entry('Main.java', 'Java')))
+        self.assertTrue(is_eligible(entry('server.go', 'Go')))
+        # No prompt pack, not a file, or generated code
+        self.assertFalse(is_eligible(entry('README.md', 'Markdown')))
+        self.assertFalse(is_eligible(entry('pkg', None, type='directory')))
+        self.assertFalse(is_eligible(entry('api.pb.go', 'Go')))
+        self.assertFalse(is_eligible(entry('types.d.ts', 'TypeScript')))
+        self.assertFalse(is_eligible(entry('vendor.min.js', 'JavaScript')))
+        # Restricted to some languages
+        self.assertTrue(is_eligible(entry('server.go', 'Go'), ['Go', 'Java']))
+        self.assertFalse(is_eligible(entry('app.py', 'Python'), ['Go', 'Java']))
+
+    def test_parse_languages_option(self):
+        self.assertEqual(parse_languages_option('python, go,TYPESCRIPT'), ['Python', 'Go', 'TypeScript'])
+        with self.assertRaises(ValueError):
+            parse_languages_option('Python,Cobol')
+
+    def test_sections_follow_the_language(self):
+        methods = [f'method_{i}' for i in range(MEMBER_LIMIT + 5)]
+        file = {'imports': ['fmt'], 'functions': ['New'],
+                'classes': {'Server': methods, 'Handler': []}, 'constants': ['Version']}
+        self.assertEqual(get_prompt_pack('Go').sections(file), [
+            ('Imports', ['fmt']),
+            ('Functions', ['New']),
+            ('Types', [f"Server: {', '.join(methods[:MEMBER_LIMIT])}, ... (5 more)", 'Handler']),
+            ('Constants', ['Version'])
+        ])
+        # Python prompts list class names only
+        self.assertEqual(get_prompt_pack('Python').sections(file)[2], ('Classes', ['Server', 'Handler']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import asyncio
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.rate_limiting import (
+    parse_retry_after,
+    parse_reset,
+    parse_rate_limit_headers,
+    backoff_delay,
+    count_tokens,
+    TokenBucket,
+    AdaptiveConcurrency,
+    RateLimiter,
+    LLMBudget
+)
+
+class TestRateLimiting(unittest.TestCase):
+    def test_count_tokens(self):
+        self.assertEqual(count_tokens(''), 0)
+        # 'get' + '_' + 'user' + '_' + 'name'
+        self.assertEqual(count_tokens('get_user_name'), 5)
+        # 'def', 'run', '(', 'self', ')', ':' and two tokens for 'abcdefgh'
+        self.assertEqual(count_tokens('def run(self):  abcdefgh'), 8)
+        self.assertEqual(count_tokens('2026'), 2)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('12'), 12.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+        # HTTP dates are relative to now
+        now = 784111777.0  # Sun, 06 Nov 1994 08:49:37 GMT
+        self.assertEqual(parse_retry_after('Sun, 06 Nov 1994 08:49:47 GMT', now=now), 10.0)
+
+    def test_parse_reset_formats(self):
+        self.assertAlmostEqual(parse_reset('1m30s'), 90.0)
+        self.assertAlmostEqual(parse_reset('250ms'), 0.25)
+        self.assertEqual(parse_reset('7'), 7.0)
+        self.assertEqual(parse_reset('1700000005', now=1700000000.0), 5.0)
+        self.assertEqual(parse_reset('1700000005000', now=1700000000.0), 5.0)
+
+    def test_parse_rate_limit_headers(self):
+        info = parse_rate_limit_headers({
+            'X-RateLimit-Remaining': '0',
+            'X-RateLimit-Reset': '3',
+            'x-ratelimit-remaining-tokens': '1500',
+            'x-ratelimit-reset-tokens': '6s'
+        })
+        self.assertEqual(info, {
+            'remaining_requests': 0.0,
+            'reset_requests': 3.0,
+            'remaining_tokens': 1500.0,
+            'reset_tokens': 6.0
+        })
+
+    def test_backoff_delay_is_jittered_and_capped(self):
+        for attempt in range(10):
+            delay = backoff_delay(attempt, base=1.0, cap=8.0)
+            expected = min(8.0, 2 ** attempt)
+            self.assertGreaterEqual(delay, expected / 2)
+            self.assertLessEqual(delay, expected)
+
+    def test_token_bucket_waits_when_exhausted(self):
+        bucket = TokenBucket(rate_per_minute=60, capacity=2)
+        now = bucket._updated
+        self.assertEqual(bucket.reserve(1, now), 0.0)
+        self.assertEqual(bucket.reserve(1, now), 0.0)
+        # Refills at one token per second
+        self.assertAlmostEqual(bucket.reserve(1, now), 1.0)
+        self.assertAlmostEqual(bucket.reserve(1, now), 2.0)
+        self.assertAlmostEqual(bucket.reserve(1, now + 10), 0.0)
+
+    def test_adaptive_concurrency_aimd(self):
+        limiter = AdaptiveConcurrency(8, cooldown=60.0)
+        limiter.on_throttle()
+        self.assertEqual(int(limiter.limit), 4)
+        # Bursts of 429s within the cooldown count once
+        limiter.on_throttle()
+        self.assertEqual(int(limiter.limit), 4)
+
+        for _ in range(20):
+            limiter.on_success(0.1)
+        self.assertGreater(limiter.limit, 5)
+        self.assertLessEqual(limiter.limit, 8)
+
+    def test_adaptive_concurrency_bounds_in_flight(self):
+        limiter = AdaptiveConcurrency(3)
+        in_flight = 0
+        peak = 0
+
+        async def task():
+            nonlocal in_flight, peak
+            async with limiter:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        async def run():
+            await asyncio.gather(*(task() for _ in range(10)))
+
+        asyncio.run(run())
+        self.assertEqual(peak, 3)
+
+    def test_throttle_pauses_all_callers(self):
+        limiter = RateLimiter(concurrency=4)
+        delay = limiter.record_throttle({'Retry-After': '0.2'})
+        self.assertEqual(delay, 0.2)
+        self.assertEqual(int(limiter.concurrency.limit), 2)
+
+        started = time.monotonic()
+        asyncio.run(limiter.acquire())
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+    def test_exhausted_quota_header_pauses(self):
+        limiter = RateLimiter()
+        limiter.record_success(0.1, {'x-ratelimit-remaining-requests': '0', 'x-ratelimit-reset-requests': '30s'})
+        self.assertGreater(limiter._paused_until - time.monotonic(), 29)
+
+    def test_llm_budget_caps_calls_tokens_and_time(self):
+        budget = LLMBudget(max_calls=2)
+        self.assertTrue(budget.try_spend(100))
+        self.assertTrue(budget.try_spend(100))
+        self.assertFalse(budget.try_spend(100))
+        self.assertTrue(budget.exhausted)
+
+        budget = LLMBudget(max_tokens=1000)
+        self.assertTrue(budget.try_spend(600))
+        # Too large for what is left, but a smaller request still fits
+        self.assertFalse(budget.try_spend(600))
+        self.assertTrue(budget.try_spend(300))
+        # Reported usage replaces the estimate
+        budget.record_usage(300, 100)
+        self.assertEqual(budget.tokens, 700)
+
+        budget = LLMBudget(deadline=0)
+        self.assertFalse(budget.try_spend(1))
+        self.assertEqual(budget.remaining_time(), 0.0)
+        self.assertIsNone(LLMBudget().remaining_time())
+
+if __name__ == '__main__':
+    unittest.main()
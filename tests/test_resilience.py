@@ -0,0 +1,81 @@
+import os
+import sys
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.resilience import CircuitBreaker, RequestHedger
+
+class TestResilience(unittest.TestCase):
+    def test_breaker_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+        breaker.record_failure(now=0)
+        breaker.record_failure(now=0)
+        # A success in between resets the count
+        breaker.record_success()
+        breaker.record_failure(now=0)
+        breaker.record_failure(now=0)
+        self.assertTrue(breaker.allow(now=0))
+        breaker.record_failure(now=0)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow(now=5))
+        self.assertEqual(breaker.rejected, 1)
+
+    def test_breaker_probes_after_reset_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure(now=0)
+        # One probe is let through; others wait for its outcome
+        self.assertTrue(breaker.allow(now=10))
+        self.assertFalse(breaker.allow(now=10))
+        breaker.record_failure(now=11)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow(now=15))
+
+        self.assertTrue(breaker.allow(now=21))
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow(now=21))
+        self.assertEqual(breaker.trips, 2)
+
+    def test_breaker_probe_answered_with_429_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure(now=0)
+        self.assertTrue(breaker.allow(now=10))
+        breaker.record_throttle(now=11)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow(now=15))
+        # The next probe goes out after another reset timeout
+        self.assertTrue(breaker.available(now=21))
+        self.assertTrue(breaker.allow(now=21))
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        # A 429 outside a probe changes nothing
+        breaker.record_throttle(now=22)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_breaker_gives_up_on_a_silent_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure(now=0)
+        self.assertTrue(breaker.allow(now=10))
+        # The probe was cancelled and never reported back
+        self.assertFalse(breaker.allow(now=15))
+        self.assertTrue(breaker.allow(now=20))
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+    def test_hedger_delay_is_latency_quantile(self):
+        hedger = RequestHedger(quantile=0.9, min_samples=10, window=20, min_delay=0.0)
+        for latency in range(1, 10):
+            hedger.record(float(latency))
+        # Not enough samples to know the tail yet
+        self.assertIsNone(hedger.delay())
+        hedger.record(10.0)
+        self.assertEqual(hedger.delay(), 10.0)
+
+        # Old samples leave the window
+        for _ in range(20):
+            hedger.record(0.5)
+        self.assertEqual(hedger.delay(), 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import asyncio
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.response_cache import ResponseCache, normalize_prompt, prompt_key
+
+class TestResponseCache(unittest.TestCase):
+    def test_prompt_key_ignores_insignificant_whitespace(self):
+        self.assertEqual(normalize_prompt("File: a.py  \n\n\n\nImports:\t\n- os\n"), "File: a.py\n\nImports:\n- os")
+
+        messages = [{'role': 'user', 'content': 'File: __init__.py\n'}]
+        padded = [{'role': 'user', 'content': 'File: __init__.py   \n\n\n'}]
+        self.assertEqual(prompt_key('model-a', messages), prompt_key('model-a', padded))
+        # The model is part of the key
+        self.assertNotEqual(prompt_key('model-a', messages), prompt_key('model-b', messages))
+
+    def test_identical_requests_in_flight_share_one_call(self):
+        cache = ResponseCache()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return 'answer'
+
+        async def run():
+            results = await asyncio.gather(*(cache.get_or_fetch('key', fetch) for _ in range(10)))
+            # Answered from the cache once the first request completed
+            results.append(await cache.get_or_fetch('key', fetch))
+            return results
+
+        self.assertEqual(asyncio.run(run()), ['answer'] * 11)
+        self.assertEqual(calls, 1)
+        self.assertEqual(cache.coalesced, 9)
+        self.assertEqual(cache.hits, 1)
+
+    def test_failures_are_shared_but_not_cached(self):
+        cache = ResponseCache()
+        results = [None, 'second try']
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return results.pop(0)
+
+        async def run():
+            first = await asyncio.gather(cache.get_or_fetch('key', fetch), cache.get_or_fetch('key', fetch))
+            return first, await cache.get_or_fetch('key', fetch)
+
+        first, retry = asyncio.run(run())
+        self.assertEqual(first, [None, None])
+        self.assertEqual(retry, 'second try')
+        self.assertEqual(len(cache), 1)
+
+    def test_leader_error_releases_followers(self):
+        cache = ResponseCache()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('boom')
+
+        async def run():
+            return await asyncio.gather(cache.get_or_fetch('key', fetch), cache.get_or_fetch('key', fetch),
+                                        return_exceptions=True)
+
+        leader, follower = asyncio.run(run())
+        self.assertIsInstance(leader, RuntimeError)
+        self.assertIsNone(follower)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import threading
+import subprocess
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.run_journal import RunJournal, JOURNAL_FILE
+from src.repo_map.repo_map import summarize_repo
+from src.repo_map.cache_management import MemoryCacheBackend
+from src.repo_map.mock_llm_server import serve_mock_llm, MockLLMBehavior
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+class TestRunJournal(unittest.TestCase):
+    def setUp(self):
+        # Use existing test_output directory
+        self.test_dir = os.path.join(os.path.dirname(__file__), 'test_output', 'journal_repo')
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        for package in ('alpha', 'beta'):
+            os.makedirs(os.path.join(self.test_dir, package))
+            for i in range(3):
+                with open(os.path.join(self.test_dir, package, f'{package}_{i}.py'), 'w') as f:
+                    f.write(f"import os\n\ndef {package}_{i}():\n    return os.getcwd()\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_records_survive_a_torn_last_line(self):
+        journal = RunJournal(self.test_dir)
+        entries = [{'name': 'alpha', 'path': os.path.join(self.test_dir, 'alpha'), 'type': 'directory',
+                    'level': 0, 'language': None}]
+        journal.record_directory('alpha', entries)
+        journal.record_pending([os.path.join(self.test_dir, 'alpha', 'alpha_0.py')])
+        journal.close()
+        with open(journal.path, 'a') as f:
+            f.write('{"type": "directory", "path": "be')
+
+        resumed = RunJournal(self.test_dir, resume=True)
+        self.assertEqual(resumed.finished, {'alpha': entries})
+        self.assertEqual(resumed.pending, [os.path.join(self.test_dir, 'alpha', 'alpha_0.py')])
+        resumed.complete()
+        self.assertFalse(os.path.exists(journal.path))
+
+        # Without --resume the journal starts over
+        RunJournal(self.test_dir).record_directory('alpha', entries)
+        self.assertEqual(RunJournal(self.test_dir).finished, {})
+
+    def test_resumed_scan_restores_finished_directories(self):
+        journal = RunJournal(self.test_dir)
+        first = summarize_repo(self.test_dir, MemoryCacheBackend(), journal=journal)
+        journal.close()
+
+        # A file edited after its directory was journaled is not read again
+        with open(os.path.join(self.test_dir, 'alpha', 'alpha_0.py'), 'w') as f:
+            f.write("import sys\n")
+        resumed = summarize_repo(self.test_dir, MemoryCacheBackend(), journal=RunJournal(self.test_dir, resume=True))
+        self.assertEqual(resumed, first)
+
+    def test_stop_ends_the_scan_early(self):
+        stop = threading.Event()
+        delivered = []
+
+        def on_files(entries):
+            delivered.append(entries)
+            stop.set()
+
+        journal = RunJournal(self.test_dir)
+        summary = summarize_repo(self.test_dir, MemoryCacheBackend(), on_files=on_files, journal=journal, stop=stop)
+        journal.close()
+        self.assertEqual(len(delivered), 1)
+        self.assertEqual(len(RunJournal(self.test_dir, resume=True).finished), 2)
+        self.assertLess(len(summary), 8)
+
+    @unittest.skipIf(sys.platform == 'win32', "SIGINT handling needs a POSIX event loop")
+    def test_interrupted_run_writes_a_partial_map_and_resumes(self):
+        behavior = MockLLMBehavior(latency=1.0)
+        server, thread = serve_mock_llm(port=0, behavior=behavior)
+        host, port = server.server_address[:2]
+        command = [sys.executable, '-m', 'src.repo_map.repo_map', self.test_dir, '--yes',
+                   '--provider', 'openai-compatible', '--llm-base-url', f"http://{host}:{port}/v1",
+                   '--model', 'mock', '--llm-concurrency', '1']
+        env = dict(os.environ, OPENAI_API_KEY='test')
+        map_path = os.path.join(self.test_dir, 'journal_repo_repo_map.md')
+        try:
+            process = subprocess.Popen(command, cwd=PROJECT_ROOT, env=env,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            # Interrupt once the scan is done and the first slow requests are in flight
+            structure_path = os.path.join(self.test_dir, '.repo_map_structure.json')
+            for _ in range(200):
+                if os.path.exists(structure_path):
+                    break
+                time.sleep(0.05)
+            process.send_signal(signal.SIGINT)
+            self.assertEqual(process.wait(timeout=30), 0)
+
+            self.assertTrue(os.path.exists(map_path))
+            with open(os.path.join(self.test_dir, JOURNAL_FILE)) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(records[-1]['type'], 'pending')
+            self.assertTrue(records[-1]['paths'])
+
+            behavior.latency = 0.0
+            self.assertEqual(subprocess.run(command + ['--resume'], cwd=PROJECT_ROOT, env=env,
+                                            capture_output=True, timeout=60).returncode, 0)
+            self.assertFalse(os.path.exists(os.path.join(self.test_dir, JOURNAL_FILE)))
+            with open(map_path) as f:
+                self.assertEqual(f.read().count('Description: Mock description'), 6)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import shutil
+import asyncio
+import subprocess
+import unittest
+
+# Add src directory to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repo_map.rate_limiting import LLMBudget
+from src.repo_map.work_scheduler import (
+    ImportanceRanker,
+    PriorityWorkQueue,
+    git_recency,
+    import_prefixes,
+    module_names
+)
+
+def make_file(path, imports=()):
+    return {'name': os.path.basename(path), 'path': path, 'type': 'file', 'language': 'Python',
+            'imports': list(imports)}
+
+class TestWorkScheduler(unittest.TestCase):
+    def setUp(self):
+        # Use existing test_output directory
+        self.test_dir = os.path.join(os.path.dirname(__file__), 'test_output', 'scheduler_repo')
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        os.makedirs(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_module_names_and_import_prefixes(self):
+        self.assertEqual(module_names('/repo/src/pkg/core.py', '/repo'), ['src.pkg.core', 'pkg.core', 'core'])
+        self.assertEqual(module_names('/repo/src/pkg/__init__.py', '/repo'), ['src.pkg', 'pkg'])
+        self.assertEqual(import_prefixes('pkg.core.run'), ['pkg', 'pkg.core', 'pkg.core.run'])
+        self.assertEqual(import_prefixes('./utils/helpers'), ['utils', 'utils.helpers'])
+
+    def test_ranker_prefers_widely_imported_files(self):
+        root = self.test_dir
+        core = make_file(os.path.join(root, 'pkg', 'core.py'))
+        leaf = make_file(os.path.join(root, 'pkg', 'leaf.py'))
+        importers = [make_file(os.path.join(root, f'user_{i}.py'), ['pkg.core.run', 'os']) for i in range(3)]
+        ranker = ImportanceRanker(root)
+        ranker.observe([core, leaf] + importers)
+
+        self.assertEqual(ranker.fan_in(core), 3)
+        self.assertEqual(ranker.fan_in(leaf), 0)
+        self.assertGreater(ranker.score(core), ranker.score(leaf))
+
+        # Recently changed files rank above untouched ones
+        ranker.set_recency({os.path.normpath(leaf['path']): time.time()})
+        other = make_file(os.path.join(root, 'pkg', 'other.py'))
+        self.assertGreater(ranker.score(leaf), ranker.score(other))
+
+    def test_git_recency(self):
+        def git(*args):
+            subprocess.run(['git', *args], cwd=self.test_dir, check=True, capture_output=True)
+
+        try:
+            git('init', '-q')
+        except (OSError, subprocess.CalledProcessError):
+            self.skipTest("git is not available")
+        git('config', 'user.email', 'test@example.com')
+        git('config', 'user.name', 'Test')
+        with open(os.path.join(self.test_dir, 'tracked.py'), 'w') as f:
+            f.write("x = 1\n")
+        git('add', 'tracked.py')
+        git('commit', '-q', '-m', 'Add tracked file')
+
+        recency = git_recency(self.test_dir)
+        tracked = os.path.normpath(os.path.realpath(os.path.join(self.test_dir, 'tracked.py')))
+        self.assertIn(tracked, {os.path.realpath(path) for path in recency})
+
+    def test_queue_runs_highest_priority_first(self):
+        scores = {'low': 1.0, 'mid': 2.0, 'high': 3.0, 'late': 5.0}
+        order = []
+
+        def job(name):
+            async def run():
+                order.append(name)
+                await asyncio.sleep(0)
+            return run
+
+        async def main():
+            queue = PriorityWorkQueue(lambda file: scores[file['name']], limit=lambda: 1)
+            for name in ('low', 'mid', 'high'):
+                queue.submit(job(name), [{'name': name}])
+            runner = asyncio.ensure_future(queue.run())
+            await asyncio.sleep(0)
+            # Submitted while the first job runs, but still ahead of the rest
+            queue.submit(job('late'), [{'name': 'late'}])
+            queue.close()
+            await runner
+
+        asyncio.run(main())
+        self.assertEqual(order, ['high', 'late', 'mid', 'low'])
+
+    def test_queue_stops_when_budget_is_exhausted(self):
+        budget = LLMBudget(max_calls=2)
+        started = []
+
+        def job(name):
+            async def run():
+                started.append(name)
+                budget.try_spend(10)
+            return run
+
+        async def main():
+            queue = PriorityWorkQueue(lambda file: 0.0, limit=lambda: 1, budget=budget)
+            for i in range(5):
+                queue.submit(job(i), [{'name': str(i)}])
+            queue.close()
+            await queue.run()
+            return queue.skipped
+
+        self.assertEqual(asyncio.run(main()), 3)
+        self.assertEqual(started, [0, 1])
+
+    def test_job_failure_is_raised(self):
+        async def fail():
+            raise RuntimeError('boom')
+
+        async def main():
+            queue = PriorityWorkQueue(lambda file: 0.0, limit=lambda: 2)
+            queue.submit(fail, [{'name': 'a'}])
+            queue.close()
+            await queue.run()
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(main())
+
+if __name__ == '__main__':
+    unittest.main()